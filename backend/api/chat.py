@@ -31,21 +31,14 @@ def get_compliance_context():
         
         # Get summary metrics
         total = len(compliance_results)
-        compliant = len([r for r in compliance_results if r.get('status') == 'Compliant'])
-        non_compliant = len([r for r in compliance_results if r.get('status') == 'Non-Compliant'])
-        requires_action = len([r for r in compliance_results if r.get('status') == 'Requires Action'])
-        
-        # Get framework breakdown
-        frameworks = {}
-        for record in compliance_results:
-            fw = record.get('framework', 'Unknown')
-            frameworks[fw] = frameworks.get(fw, 0) + 1
-        
-        # Get severity breakdown
-        severities = {}
-        for record in compliance_results:
-            sev = record.get('severity', 'Unknown')
-            severities[sev] = severities.get(sev, 0) + 1
+        by_status = compliance_results.value_counts('status')
+        compliant = by_status.get('Compliant', 0)
+        non_compliant = by_status.get('Non-Compliant', 0)
+        requires_action = by_status.get('Requires Action', 0)
+        
+        # Get framework and severity breakdown
+        frameworks = compliance_results.value_counts('framework')
+        severities = compliance_results.value_counts('severity')
         
         context = f"""
 Current Compliance Data Summary:
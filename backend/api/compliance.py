@@ -1,12 +1,18 @@
 # api/compliance.py - Simplified without database dependency
 
 from flask import Blueprint, request, jsonify
-import math
+import numpy as np
+import pandas as pd
+
+from database.time_index import parse_time, epoch_to_iso
+from database.run_archive import get_run_archive, FILTER_FIELDS
+from database.result_index import ResultIndex
 
 compliance_bp = Blueprint('compliance', __name__)
 
-# In-memory storage for compliance results
-compliance_results = []
+# In-memory storage for compliance results (the columnar store is the index's own, so they change together)
+_results_index = ResultIndex()
+compliance_results = _results_index.records
 
 @compliance_bp.route('/results', methods=['GET'], strict_slashes=False)
 @compliance_bp.route('/results/', methods=['GET'], strict_slashes=False)
@@ -19,44 +25,44 @@ def get_results():
         status = request.args.get('status')
         severity = request.args.get('severity')
         action = request.args.get('action')
+        # Incident time window (ISO or epoch seconds), matched against event_time
+        start = request.args.get('start')
+        end = request.args.get('end')
         limit = int(request.args.get('limit', 100))
         offset = int(request.args.get('offset', 0))
         
-        # Filter results
-        filtered_results = compliance_results.copy()
-        
-        if framework:
-            filtered_results = [r for r in filtered_results if r.get('framework') == framework]
-        if status:
-            filtered_results = [r for r in filtered_results if r.get('status') == status]
-        if severity:
-            filtered_results = [r for r in filtered_results if r.get('severity') == severity]
-        if action:
-            filtered_results = [r for r in filtered_results if r.get('action') == action]
-        
-        # Apply pagination
-        paginated_results = filtered_results[offset:offset+limit]
-        
-        # Clean NaN values before returning
-        cleaned_results = []
-        for result in paginated_results:
-            cleaned = {}
-            for key, value in result.items():
-                # Check for NaN
-                if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
-                    cleaned[key] = None
-                else:
-                    cleaned[key] = value
-            cleaned_results.append(cleaned)
+        # Filter results: intersect the index's positions for the given values
+        index = _results_index
+        results = index.records
+        positions = index.positions({
+            'framework': framework or None,
+            'status': status or None,
+            'severity': severity or None,
+            'action': action or None
+        })
+        if start or end:
+            positions = _time_window_positions(results, positions, start, end)
+        
+        # Apply pagination: only the page's rows are read from the columns
+        total = len(results) if positions is None else len(positions)
+        page = np.arange(offset, min(offset + limit, total)) if positions is None else positions[offset:offset+limit]
+        page_results = results.take(page)
         
         return jsonify({
-            'results': cleaned_results,
-            'count': len(cleaned_results),
-            'total': len(filtered_results),
+            'results': page_results,
+            'count': len(page_results),
+            'total': total,
             'limit': limit,
             'offset': offset
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            'results': [],
+            'count': 0,
+            'total': 0,
+            'error': str(e)
+        }), 400
     except Exception as e:
         print(f"Error in /compliance/results: {str(e)}")
         return jsonify({
@@ -67,25 +73,158 @@ def get_results():
         }), 500
 
 
+@compliance_bp.route('/results/timeline', methods=['GET'])
+def get_results_timeline():
+    """Result counts per hour/day of incident time, by severity and action"""
+    
+    try:
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in TIMELINE_PREFIX:
+            return jsonify({'error': f'granularity must be one of: {", ".join(TIMELINE_PREFIX)}'}), 400
+        
+        results = _results_index.records
+        positions = _time_window_positions(results, None, request.args.get('start'), request.args.get('end'))
+        
+        # ISO times sort as text, so a prefix of event_time is its bucket
+        prefix_length, suffix = TIMELINE_PREFIX[granularity]
+        times = results.column('event_time', positions).astype(object)
+        timed = (times.notna() & (times != '')).to_numpy()
+        frame = pd.DataFrame({
+            'bucket': times[timed].astype(str).str[:prefix_length].to_numpy(),
+            'severity': _labels(results.column('severity', positions)[timed], 'Unknown'),
+            'action': _labels(results.column('action', positions)[timed], 'unknown')
+        })
+        
+        buckets = {key: {'count': int(n), 'severity': {}, 'action': {}} for key, n in frame.groupby('bucket').size().items()}
+        for field in ('severity', 'action'):
+            for (key, value), n in frame.groupby(['bucket', field]).size().items():
+                buckets[key][field][value] = int(n)
+        
+        return jsonify({
+            'granularity': granularity,
+            'buckets': [{'start': key + suffix, **buckets[key]} for key in sorted(buckets)],
+            'total': sum(b['count'] for b in buckets.values())
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@compliance_bp.route('/history', methods=['GET'])
+def get_history():
+    """Archived obligations of past runs, filtered by run date range and field values"""
+    
+    try:
+        filters = {k: request.args.get(k) for k in FILTER_FIELDS if request.args.get(k)}
+        columns = request.args.get('columns')
+        limit = int(request.args.get('limit', 100))
+        offset = int(request.args.get('offset', 0))
+        
+        page = get_run_archive().query(
+            filters,
+            start_date=_run_date(request.args.get('start_date')),
+            end_date=_run_date(request.args.get('end_date')),
+            columns=columns.split(',') if columns else None,
+            limit=limit,
+            offset=offset
+        )
+        
+        return jsonify({
+            'results': page['results'],
+            'count': len(page['results']),
+            'total': page['total'],
+            'limit': limit,
+            'offset': offset
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'results': [], 'count': 0, 'total': 0, 'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in /compliance/history: {str(e)}")
+        return jsonify({'results': [], 'count': 0, 'total': 0, 'error': str(e)}), 500
+
+
+@compliance_bp.route('/history/trend', methods=['GET'])
+def get_history_trend():
+    """Obligation counts per run date (and optionally status/severity/framework/action) across archived runs"""
+    
+    try:
+        filters = {k: request.args.get(k) for k in FILTER_FIELDS if request.args.get(k)}
+        group_by = ['run_date'] + [g for g in request.args.get('group_by', 'status').split(',') if g and g != 'run_date']
+        
+        trend = get_run_archive().trend(
+            group_by,
+            filters,
+            start_date=_run_date(request.args.get('start_date')),
+            end_date=_run_date(request.args.get('end_date'))
+        )
+        
+        return jsonify({'group_by': group_by, 'trend': trend}), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@compliance_bp.route('/history/runs', methods=['GET'])
+def get_history_runs():
+    """Manifest of archived runs (date, mode, obligation and status counts)"""
+    
+    try:
+        runs = get_run_archive().runs(_run_date(request.args.get('start_date')), _run_date(request.args.get('end_date')))
+        return jsonify({'runs': runs, 'total': len(runs)}), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @compliance_bp.route('/results/<result_id>', methods=['GET'])
 def get_result_by_id(result_id):
     """Get specific compliance result by ID"""
     
     try:
-        result = next((r for r in compliance_results if str(r.get('id')) == result_id), None)
+        result = _results_index.get(result_id)
         
-        if not result:
+        if result is None:
             return jsonify({'error': 'Result not found'}), 404
         
-        # Clean NaN values
-        cleaned = {}
-        for key, value in result.items():
-            if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
-                cleaned[key] = None
-            else:
-                cleaned[key] = value
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@compliance_bp.route('/results/bulk', methods=['GET', 'POST'])
+def get_results_by_ids():
+    """Get several compliance results by ID (JSON {"ids": [...]} or ?ids=a,b), in the order asked"""
+    
+    try:
+        if request.method == 'POST':
+            ids = (request.get_json(silent=True) or {}).get('ids') or []
+        else:
+            ids = [i for i in request.args.get('ids', '').split(',') if i]
+        
+        if not isinstance(ids, list):
+            return jsonify({'error': 'ids must be a list'}), 400
+        
+        results = []
+        missing = []
+        for result_id, result in zip(ids, _results_index.get_many(ids)):
+            if result is None:
+                missing.append(result_id)
+                continue
+            results.append(result)
         
-        return jsonify(cleaned), 200
+        return jsonify({
+            'results': results,
+            'count': len(results),
+            'missing': missing
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -107,23 +246,16 @@ def get_summary():
                 'by_severity': {}
             }), 200
         
-        # Calculate summary stats
+        # Calculate summary stats from the result columns
         total = len(compliance_results)
-        compliant = sum(1 for r in compliance_results if r.get('status') == 'Compliant')
-        non_compliant = sum(1 for r in compliance_results if r.get('status') == 'Non-Compliant')
-        requires_action = sum(1 for r in compliance_results if r.get('status') == 'Requires Action')
-        
-        # Group by framework
-        by_framework = {}
-        for r in compliance_results:
-            fw = r.get('framework', 'Unknown')
-            by_framework[fw] = by_framework.get(fw, 0) + 1
-        
-        # Group by severity
-        by_severity = {}
-        for r in compliance_results:
-            sev = r.get('severity', 'Unknown')
-            by_severity[sev] = by_severity.get(sev, 0) + 1
+        by_status = compliance_results.value_counts('status')
+        compliant = by_status.get('Compliant', 0)
+        non_compliant = by_status.get('Non-Compliant', 0)
+        requires_action = by_status.get('Requires Action', 0)
+        
+        # Group by framework and severity
+        by_framework = compliance_results.value_counts('framework')
+        by_severity = compliance_results.value_counts('severity')
         
         return jsonify({
             'total': total,
@@ -139,20 +271,62 @@ def get_summary():
         return jsonify({'error': str(e)}), 500
 
 
+# Bucket of an ISO event_time: (prefix length, text completing the bucket start)
+TIMELINE_PREFIX = {
+    'hour': (13, ':00:00'),
+    'day': (10, 'T00:00:00')
+}
+
+def _time_window_positions(results, positions, start, end):
+    """Positions (all, or the given ones) whose event_time lies in [start, end), compared column-wise"""
+    start = parse_time(start)
+    end = parse_time(end)
+    if start is None and end is None:
+        return positions
+    times = results.column('event_time', positions).astype(object)
+    keep = times.notna().to_numpy().copy()
+    times = times.where(keep, '')
+    if start is not None:
+        keep &= (times >= epoch_to_iso(start)).to_numpy()
+    if end is not None:
+        keep &= (times < epoch_to_iso(end)).to_numpy()
+    candidates = np.arange(len(results)) if positions is None else positions
+    return candidates[keep]
+
+
+def _labels(values, missing):
+    values = values.astype(object)
+    return values.where(values.notna(), missing).to_numpy()
+
+
+def _run_date(value):
+    """YYYY-MM-DD run date of a history query bound (any parse_time input; None if absent)"""
+    epoch = parse_time(value)
+    return epoch_to_iso(epoch)[:10] if epoch is not None else None
+
+
+def get_results_index():
+    """The current results with their indexes (replaced as a whole by each run)"""
+    return _results_index
+
+
 def add_compliance_result(result):
-    """Helper function to add compliance results"""
-    # Clean NaN values before adding
-    cleaned_result = {}
-    for key, value in result.items():
-        if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
-            cleaned_result[key] = None
-        else:
-            cleaned_result[key] = value
-    
-    compliance_results.append(cleaned_result)
+    """Helper function to add compliance results (returns the record with its id)"""
+    # NaN/inf are masked by the result store when the record is folded into its columns
+    record = dict(result)
+    _results_index.add(record)
+    return record
 
 
 def clear_compliance_results():
     """Helper function to clear all compliance results"""
-    global compliance_results
-    compliance_results = []
+    replace_compliance_results([])
+
+
+def replace_compliance_results(results):
+    """Swap in a new, already cleaned set of compliance results"""
+    global compliance_results, _results_index
+    # Built aside and swapped in, so a request sees either the old or the new results with their index
+    index = ResultIndex(list(results))
+    _results_index = index
+    compliance_results = index.records
@@ -1,7 +1,7 @@
 # api/dashboard.py - Updated with all KPI metrics
 
 from flask import Blueprint, jsonify
-from database.csv_storage import get_compliance_results
+from database import get_dashboard_metrics as get_result_metrics
 import yaml
 import os
 from datetime import datetime
@@ -12,24 +12,24 @@ dashboard_bp = Blueprint('dashboard', __name__)
 def get_dashboard_metrics():
     """Get comprehensive dashboard metrics"""
     try:
-        # Get compliance results
-        results = get_compliance_results(limit=10000)
+        # Aggregates over all results, kept up to date by storage as results are written
+        metrics = get_result_metrics()
         
         # Calculate metrics
-        total_records = len(results)
+        total_records = metrics.get('total_processed', 0)
         
-        compliant = len([r for r in results if r.get('status') == 'Compliant'])
-        non_compliant = len([r for r in results if r.get('status') == 'Non-Compliant'])
-        requires_action = len([r for r in results if r.get('status') == 'Requires Action'])
+        compliant = metrics.get('compliant', 0)
+        non_compliant = metrics.get('non_compliant', 0)
+        requires_action = metrics.get('requires_action', 0)
         
         # Average confidence score
         if total_records > 0:
-            avg_confidence = sum(r.get('confidence_score', 0) for r in results) / total_records
+            avg_confidence = metrics.get('confidence_sum', 0) / total_records
         else:
             avg_confidence = 0
         
         # High severity count
-        high_severity = len([r for r in results if r.get('severity') == 'High'])
+        high_severity = metrics.get('by_severity', {}).get('High', 0)
         
         # Count total rules from policy_rules.yaml
         try:
@@ -42,7 +42,7 @@ def get_dashboard_metrics():
             total_rules = 0
         
         # Count unique obligations from dataset
-        unique_obligations = len(set(r.get('obligationId', '') for r in results if r.get('obligationId')))
+        unique_obligations = metrics.get('unique_obligations', 0)
         
         # Fixed compliance accuracy (AI confidence)
         compliance_accuracy = 90.0
@@ -54,17 +54,9 @@ def get_dashboard_metrics():
         else:
             avg_processing_time = 0.5
         
-        # Framework breakdown
-        by_framework = {}
-        for record in results:
-            framework = record.get('framework', 'Unknown')
-            by_framework[framework] = by_framework.get(framework, 0) + 1
-        
-        # Action breakdown
-        by_action = {}
-        for record in results:
-            action = record.get('action', 'unknown')
-            by_action[action] = by_action.get(action, 0) + 1
+        # Framework and action breakdown
+        by_framework = metrics.get('by_framework', {})
+        by_action = metrics.get('by_action', {})
         
         return jsonify({
             'total_records': {
@@ -0,0 +1,148 @@
+# api/datasets.py - Exploration endpoints over uploaded datasets (served from their columnar copies)
+
+from flask import Blueprint, request, jsonify, current_app
+import os
+import numpy as np
+from werkzeug.utils import secure_filename
+
+from database.upload_profile import get_profile
+from database.upload_query import run_query
+from database.inverted_index import get_index, INDEXED_FIELDS
+from database.time_index import get_time_index, parse_time
+from database.upload_store import load_upload_rows, json_records
+
+datasets_bp = Blueprint('datasets', __name__)
+
+@datasets_bp.route('/<file_id>/profile', methods=['GET'])
+def get_dataset_profile(file_id):
+    """Column profile of an upload (built on first access, then cached next to it)"""
+
+    filepath, error_response = _dataset_path(file_id)
+    if error_response is not None:
+        return error_response
+
+    try:
+        profile = get_profile(filepath, refresh=request.args.get('refresh', 'false').lower() == 'true')
+        return jsonify({'success': True, 'file_id': file_id, 'profile': profile}), 200
+    except Exception as e:
+        print(f"❌ Profile error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@datasets_bp.route('/<file_id>/query', methods=['POST', 'OPTIONS'])
+def query_dataset(file_id):
+    """Filtered group-by with count/mean/percentile aggregates over an upload"""
+
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    filepath, error_response = _dataset_path(file_id)
+    if error_response is not None:
+        return error_response
+
+    try:
+        result = run_query(filepath, request.get_json() or {})
+        return jsonify({'success': True, 'file_id': file_id, **result}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Query error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@datasets_bp.route('/<file_id>/lookup', methods=['GET'])
+def lookup_dataset(file_id):
+    """Rows whose multi-valued fields contain the given terms, e.g. ?affected_users=user3151&response_actions=quarantine_host.
+
+    start/end (ISO or epoch seconds) restrict the rows to a time window; with no terms they select it on their own.
+    """
+
+    filepath, error_response = _dataset_path(file_id)
+    if error_response is not None:
+        return error_response
+
+    try:
+        # Repeat a field to require several of its values (?affected_users=a&affected_users=b)
+        terms = {field: request.args.getlist(field) for field in INDEXED_FIELDS if request.args.getlist(field)}
+        start, end = parse_time(request.args.get('start')), parse_time(request.args.get('end'))
+        if not terms and start is None and end is None:
+            return jsonify({'error': f'Give at least one term for: {", ".join(INDEXED_FIELDS)} (or a start/end)'}), 400
+
+        match = request.args.get('match', 'all').lower()
+        if match not in ('all', 'any'):
+            return jsonify({'error': 'match must be "all" or "any"'}), 400
+        limit = int(request.args.get('limit', 100))
+        offset = int(request.args.get('offset', 0))
+        columns = [c.strip() for c in request.args.get('columns', '').split(',') if c.strip()]
+
+        if start is None and end is None:
+            row_ids = get_index(filepath).lookup(terms, match=match)
+        else:
+            # Rows in the window come from the time index already in time order; filtering keeps that order
+            row_ids = get_time_index(filepath).rows_between(start, end)
+            if terms:
+                row_ids = row_ids[np.isin(row_ids, get_index(filepath).lookup(terms, match=match), assume_unique=True)]
+        page = row_ids[offset:offset + limit]
+
+        response = {
+            'success': True,
+            'file_id': file_id,
+            'terms': terms,
+            'match': match,
+            'start': request.args.get('start'),
+            'end': request.args.get('end'),
+            'total': int(len(row_ids)),
+            'limit': limit,
+            'offset': offset,
+            'row_ids': page.tolist()
+        }
+        # Only the page's rows are read, and only when columns are asked for
+        if columns:
+            response['rows'] = json_records(load_upload_rows(filepath, page, columns=columns, row_id=True))
+        return jsonify(response), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Lookup error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@datasets_bp.route('/<file_id>/timeline', methods=['GET'])
+def get_dataset_timeline(file_id):
+    """Incident counts per hour/day bucket, by severity and status (?granularity=day&start=...&end=...)"""
+
+    filepath, error_response = _dataset_path(file_id)
+    if error_response is not None:
+        return error_response
+
+    try:
+        index = get_time_index(filepath)
+        granularity = request.args.get('granularity', 'day')
+        buckets = index.timeline(granularity, parse_time(request.args.get('start')), parse_time(request.args.get('end')))
+        return jsonify({
+            'success': True,
+            'file_id': file_id,
+            'granularity': granularity,
+            'range': index.time_range(),
+            'buckets': buckets
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Timeline error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+def _dataset_path(file_id):
+    """Path of an uploaded dataset, or an error response; returns (filepath, error_response)"""
+    file_id = secure_filename(file_id)
+    if file_id.lower().endswith(('.xlsx', '.xls')):
+        return None, (jsonify({
+            'error': 'Workbooks are explored per sheet - use a dataset file_id from /api/upload/<file_id>/status',
+            'file_id': file_id
+        }), 400)
+
+    filepath = os.path.normpath(os.path.join(current_app.config['UPLOAD_FOLDER'], file_id))
+    if not os.path.exists(filepath):
+        return None, (jsonify({'error': 'Dataset not found', 'file_id': file_id}), 404)
+    return filepath, None
@@ -1,23 +1,28 @@
 # api/execute.py - COMPLETE WITH REAL PIPELINE INTEGRATION (FIXED)
 
 from flask import Blueprint, request, jsonify, current_app
-import time
-import pandas as pd
 import os
+import uuid
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Import your REAL pipeline modules
-from pipeline.rule_engine import RuleEngine
-from pipeline.data_segregator import DataSegregator
-from pipeline.llm_reasoner import LLMReasoner
-from pipeline.compliance_parser import ComplianceParser
-from pipeline.report_generator import ReportGenerator
+from pipeline.runner import PipelineRunner
+from pipeline.stages import build_execute_stages, build_batch_stages, CHUNK_STAGES, INPUT_COLUMNS
+from pipeline.checkpoint import CheckpointStore
+from pipeline.sampler import StratifiedSampler
+from database.upload_store import iter_upload_chunks
+from database.excel_converter import wait_for_conversion, READY, CONVERTING
+from database.dedup_index import get_dedup_index, DEDUP_KEY
+from database.run_archive import get_run_archive
 
 # ✅ REMOVED: check_compliance_issues() call from here (line 11)
 # ✅ REMOVED: duplicate import (line 18)
 
 execute_bp = Blueprint('execute', __name__)
 
+DEFAULT_SAMPLE_SIZE = 1000
+
 @execute_bp.route('/execute', methods=['POST', 'OPTIONS'], strict_slashes=False)
 @execute_bp.route('/execute/', methods=['POST', 'OPTIONS'], strict_slashes=False)
 def execute_pipeline():
@@ -38,8 +43,10 @@ def execute_pipeline():
         
         file_id = data.get('file_id')
         mode = data.get('mode', 'quick')
+        # Passing the run_id of a failed run resumes it from its last checkpoint
+        run_id = data.get('run_id') or uuid.uuid4().hex
         
-        print(f"File ID: {file_id}, Mode: {mode}")
+        print(f"File ID: {file_id}, Mode: {mode}, Run ID: {run_id}")
         
         if not file_id:
             return jsonify({'error': 'No file_id provided'}), 400
@@ -62,207 +69,288 @@ def execute_pipeline():
                 'upload_folder': current_app.config['UPLOAD_FOLDER']
             }), 404
         
-        # Read the CSV file
-        print(f"Reading file: {filepath}")
-        df = pd.read_csv(filepath)
-        print(f"Loaded {len(df)} records from CSV")
-        
-        stages = [
-            {'name': 'Data Upload', 'description': 'File uploaded and validated', 'status': 'completed', 'executionTime': 0.0, 'recordsProcessed': len(df)},
-            {'name': 'Rule Application', 'description': 'Applying policy rules to data', 'status': 'pending'},
-            {'name': 'Data Segregation', 'description': 'Extracting unique action-reason pairs', 'status': 'pending'},
-            {'name': 'LLM Reasoner', 'description': 'Fetching compliance metadata', 'status': 'pending'},
-            {'name': 'Compliance Parser', 'description': 'Parsing compliance obligations', 'status': 'pending'},
-            {'name': 'Report Generation', 'description': 'Generating final report', 'status': 'pending'}
-        ]
-        
-        # STAGE 2: Rule Application
-        print("\n--- STAGE 2: Rule Application ---")
-        try:
-            from api.logs import add_log
-            add_log('Rule Application', 'Applying policy rules...', 'info', 'rule_engine')
-        except:
-            pass
-        
-        stages[1]['status'] = 'running'
-        start_time = time.time()
+        # Workbooks are executed through their converted per-sheet datasets
+        datasets, error_response = _workbook_datasets(file_id)
+        if error_response is not None:
+            return error_response
+        if len(datasets) > 1:
+            return jsonify({
+                'error': 'Workbook has several sheets - execute one dataset or use /api/execute/batch',
+                'file_id': file_id,
+                'datasets': datasets
+            }), 400
+        if datasets:
+            file_id = datasets[0]
+            filepath = os.path.normpath(os.path.join(current_app.config['UPLOAD_FOLDER'], file_id))
+            print(f"Workbook resolved to dataset: {file_id}")
+        
+        chunk_size = int(data.get('chunk_size') or 0)
+        # Extra upload columns (e.g. incident_title, timestamp) to join onto the obligations
+        display_columns = _display_columns(data)
+        # Skip incidents (by correlation_id) that an earlier upload already brought in
+        dedup = _dedup_index(data) if mode != 'sample' else None
+        checkpoints = None
+        
+        if mode == 'sample':
+            # Sample mode: stratified preview, scaled to the full file (not saved as results)
+            sampler = StratifiedSampler(sample_size=int(data.get('sample_size') or DEFAULT_SAMPLE_SIZE))
+            stages = build_execute_stages(current_app.config['POLICY_RULES_FILE'], mode, loader=sampler.sample_upload,
+                                          display_columns=display_columns)
+            runner = PipelineRunner(stages, log=_add_log)
+            context = runner.run({'filepath': filepath}, targets=['report'])
+            context['report'].update(sampler.estimate_summary(context['parsed']))
+        elif chunk_size > 0:
+            stages = build_execute_stages(current_app.config['POLICY_RULES_FILE'], mode, display_columns=display_columns,
+                                          dedup=dedup, file_id=file_id)
+            # Chunked mode: stream the upload and overlap stages across chunks (no checkpoints)
+            print(f"Chunked mode: {chunk_size} rows per chunk")
+            runner = PipelineRunner(stages, log=_add_log)
+            source_key = stages[0].outputs[0]
+            columns = INPUT_COLUMNS + [DEDUP_KEY] if dedup is not None else INPUT_COLUMNS
+            chunks = ({source_key: chunk} for chunk in iter_upload_chunks(filepath, chunk_size, columns=columns, row_id=True))
+            context = runner.run_chunked(chunks, source='Data Upload', chunk_stages=CHUNK_STAGES,
+                                         context={'filepath': filepath})
+        else:
+            stages = build_execute_stages(current_app.config['POLICY_RULES_FILE'], mode, display_columns=display_columns,
+                                          dedup=dedup, file_id=file_id)
+            checkpoints = CheckpointStore(run_id)
+            checkpoints.open(file_id, mode)
+            resume_from = checkpoints.last_completed()
+            if resume_from:
+                print(f"Resuming run {run_id} after checkpoint: {resume_from}")
+                _add_log('Execute', f'Resuming run {run_id} after stage checkpoint "{resume_from}"', 'info', 'System')
+            
+            runner = PipelineRunner(stages, checkpoints=checkpoints, log=_add_log)
+            context = runner.run({'filepath': filepath}, targets=['report'])
         
-        rule_engine = RuleEngine(current_app.config['POLICY_RULES_FILE'])
-        df = rule_engine.apply_rules(df)
+        report = context['report']
         
-        execution_time = time.time() - start_time
-        stages[1]['status'] = 'completed'
-        stages[1]['executionTime'] = round(execution_time, 2)
-        stages[1]['recordsProcessed'] = len(df)
+        if mode != 'sample':
+            _publish_results(report['obligations'], run_id, mode)
+            _register_incidents(dedup, {file_id: filepath})
         
-        print(f"Rule Application completed: {len(df)} records in {execution_time:.2f}s")
-        try:
-            add_log('Rule Application', f'Applied rules to {len(df)} records', 'success', 'rule_engine')
-        except:
-            pass
+        # Run finished - its checkpoints are no longer needed
+        if checkpoints is not None:
+            checkpoints.clear()
         
-        # STAGE 3: Data Segregation
-        print("\n--- STAGE 3: Data Segregation ---")
-        try:
-            add_log('Data Segregation', 'Extracting unique action-reason pairs...', 'info', 'data_segregation')
-        except:
-            pass
-        
-        stages[2]['status'] = 'running'
-        start_time = time.time()
+        print("\n=== EXECUTE SUCCESS (REAL PIPELINE) ===\n")
         
-        segregator = DataSegregator()
-        unique_pairs = segregator.extract_unique_pairs(df)
+        return jsonify({
+            'success': True,
+            'stages': runner.stage_reports,
+            'report': report,
+            'message': f'Compliance workflow completed successfully in {mode} mode!',
+            'file_id': file_id,
+            'mode': mode,
+            'run_id': run_id,
+            'records_processed': report['summary']['total'],
+            'duplicates_skipped': int(context.get('dedup_skipped') or 0),
+            'obligations_generated': len(report['obligations']),
+            'completed_at': datetime.now().isoformat()
+        }), 200
         
-        execution_time = time.time() - start_time
-        stages[2]['status'] = 'completed'
-        stages[2]['executionTime'] = round(execution_time, 2)
-        stages[2]['recordsProcessed'] = len(unique_pairs)
+    except Exception as e:
+        print(f"\n=== EXECUTE ERROR: {str(e)} ===")
+        import traceback
+        traceback.print_exc()
         
-        print(f"Data Segregation completed: {len(unique_pairs)} unique pairs in {execution_time:.2f}s")
         try:
-            add_log('Data Segregation', f'Extracted {len(unique_pairs)} unique pairs', 'success', 'data_segregation')
+            from api.logs import add_log
+            add_log('Execute', f'Execution failed: {str(e)}', 'error', 'System')
         except:
             pass
         
-        # STAGE 4: LLM Reasoner (only if full mode)
-        if mode == 'full':
-            print("\n--- STAGE 4: LLM Reasoner (FULL MODE) ---")
-            try:
-                add_log('LLM Reasoner', 'Fetching compliance metadata from LLM...', 'info', 'llm_reasoner')
-            except:
-                pass
-            
-            stages[3]['status'] = 'running'
-            start_time = time.time()
-            
-            llm_reasoner = LLMReasoner()
-            knowledge_base = llm_reasoner.build_knowledge_base(unique_pairs)
-            
-            execution_time = time.time() - start_time
-            stages[3]['status'] = 'completed'
-            stages[3]['executionTime'] = round(execution_time, 2)
-            stages[3]['recordsProcessed'] = len(knowledge_base)
-            
-            print(f"LLM Reasoner completed: {len(knowledge_base)} KB entries in {execution_time:.2f}s")
-            try:
-                add_log('LLM Reasoner', f'Built KB with {len(knowledge_base)} entries', 'success', 'llm_reasoner')
-            except:
-                pass
-        else:
-            print("\n--- STAGE 4: LLM Reasoner (SKIPPED - QUICK MODE) ---")
-            knowledge_base = {}
-            stages[3]['status'] = 'completed'
-            stages[3]['executionTime'] = 0.0
-            stages[3]['recordsProcessed'] = 0
-            try:
-                add_log('LLM Reasoner', 'Skipped (quick mode)', 'info', 'llm_reasoner')
-            except:
-                pass
-        
-        # STAGE 5: Compliance Parser
-        print("\n--- STAGE 5: Compliance Parser ---")
-        try:
-            add_log('Compliance Parser', 'Parsing compliance obligations...', 'info', 'compliance_parser')
-        except:
-            pass
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'run_id': locals().get('run_id'),
+            'stages': runner.stage_reports if 'runner' in locals() else []
+        }), 500
+
+
+@execute_bp.route('/execute/batch', methods=['POST', 'OPTIONS'], strict_slashes=False)
+def execute_batch():
+    """Execute the pipeline over several uploads with one shared KB resolution"""
+    
+    if request.method == 'OPTIONS':
+        return '', 200
+    
+    print("\n=== BATCH EXECUTE ENDPOINT HIT ===")
+    
+    try:
+        data = request.get_json()
         
-        stages[4]['status'] = 'running'
-        start_time = time.time()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
         
-        parser = ComplianceParser(knowledge_base, mode=mode)
-        df = parser.parse(df)
+        file_ids = data.get('file_ids') or []
+        mode = data.get('mode', 'quick')
         
-        execution_time = time.time() - start_time
-        stages[4]['status'] = 'completed'
-        stages[4]['executionTime'] = round(execution_time, 2)
-        stages[4]['recordsProcessed'] = len(df)
+        if not isinstance(file_ids, list) or not file_ids:
+            return jsonify({'error': 'No file_ids provided'}), 400
         
-        print(f"Compliance Parser completed: {len(df)} records in {execution_time:.2f}s")
-        try:
-            add_log('Compliance Parser', f'Parsed {len(df)} records', 'success', 'compliance_parser')
-        except:
-            pass
+        # Keep request order but process each upload once
+        file_ids = list(dict.fromkeys(file_ids))
         
-        # STAGE 6: Report Generation
-        print("\n--- STAGE 6: Report Generation ---")
-        try:
-            add_log('Report Generation', 'Generating compliance report...', 'info', 'report_generation')
-        except:
-            pass
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        missing = [f for f in file_ids if not os.path.exists(os.path.normpath(os.path.join(upload_folder, f)))]
+        if missing:
+            return jsonify({'error': 'Files not found', 'missing_file_ids': missing}), 404
         
-        stages[5]['status'] = 'running'
-        start_time = time.time()
+        # Workbooks contribute one dataset per converted sheet
+        expanded = []
+        for file_id in file_ids:
+            datasets, error_response = _workbook_datasets(file_id)
+            if error_response is not None:
+                return error_response
+            expanded.extend(datasets or [file_id])
+        file_ids = list(dict.fromkeys(expanded))
         
-        generator = ReportGenerator()
-        report = generator.generate(df)
+        print(f"Batch of {len(file_ids)} files, Mode: {mode}")
         
-        execution_time = time.time() - start_time
-        stages[5]['status'] = 'completed'
-        stages[5]['executionTime'] = round(execution_time, 2)
-        stages[5]['recordsProcessed'] = len(report['obligations'])
+        dedup = _dedup_index(data)
+        max_workers = min(len(file_ids), os.cpu_count() or 4)
+        filepaths = {f: os.path.normpath(os.path.join(upload_folder, f)) for f in file_ids}
         
-        print(f"Report Generation completed: {len(report['obligations'])} obligations in {execution_time:.2f}s")
-        try:
-            add_log('Report Generation', 'Report generated successfully', 'success', 'report_generation')
-        except:
-            pass
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            stages = build_batch_stages(current_app.config['POLICY_RULES_FILE'], mode, pool,
+                                        display_columns=_display_columns(data), dedup=dedup)
+            runner = PipelineRunner(stages, log=_add_log)
+            context = runner.run({'filepaths': filepaths})
         
-        # Save REAL compliance results
-        print("\n--- Saving Compliance Results ---")
-        try:
-            from api.compliance import add_compliance_result, clear_compliance_results
-            
-            # Clear old data first
-            clear_compliance_results()
-            
-            # Add real data from report
-            for record in report['obligations']:
-                add_compliance_result(record)
-            
-            print(f"Saved {len(report['obligations'])} REAL compliance records")
-            try:
-                add_log('Execute', f'Saved {len(report["obligations"])} compliance records', 'success', 'System')
-            except:
-                pass
-        except Exception as e:
-            print(f"Warning: Could not save compliance data: {str(e)}")
+        combined_report = context['report']
+        combined_obligations = combined_report['obligations']
+        unique_pairs = context['pairs']
         
-        # ✅ FIXED: Check for compliance issues AFTER processing
-        try:
-            from api.notifications import check_compliance_issues
-            check_compliance_issues()
-            print("Checked for critical compliance issues and generated notifications")
-        except Exception as e:
-            print(f"Warning: Could not generate notifications: {str(e)}")
+        run_id = uuid.uuid4().hex
+        _publish_results(combined_obligations, run_id, mode)
+        _register_incidents(dedup, filepaths)
         
-        print("\n=== EXECUTE SUCCESS (REAL PIPELINE) ===\n")
+        skipped = context.get('dedup_skipped') or {}
+        for file_report in context['file_reports']:
+            file_report['duplicates_skipped'] = int(skipped.get(file_report['file_id'], 0))
+        
+        _add_log('Execute', f'Batch of {len(file_ids)} files processed with {len(unique_pairs)} shared pairs', 'success', 'System')
+        
+        print("\n=== BATCH EXECUTE SUCCESS ===\n")
         
         return jsonify({
             'success': True,
-            'stages': stages,
-            'report': report,
-            'message': f'Compliance workflow completed successfully in {mode} mode!',
-            'file_id': file_id,
+            'stages': runner.stage_reports,
+            'files': context['file_reports'],
+            'report': combined_report,
+            'message': f'Batch of {len(file_ids)} files completed successfully in {mode} mode!',
+            'file_ids': file_ids,
+            'run_id': run_id,
             'mode': mode,
-            'records_processed': len(df),
-            'obligations_generated': len(report['obligations']),
+            'unique_pairs': len(unique_pairs),
+            'records_processed': sum(f['records_processed'] for f in context['file_reports']),
+            'duplicates_skipped': int(sum(skipped.values())),
+            'obligations_generated': len(combined_obligations),
             'completed_at': datetime.now().isoformat()
         }), 200
         
     except Exception as e:
-        print(f"\n=== EXECUTE ERROR: {str(e)} ===")
+        print(f"\n=== BATCH EXECUTE ERROR: {str(e)} ===")
         import traceback
         traceback.print_exc()
         
         try:
             from api.logs import add_log
-            add_log('Execute', f'Execution failed: {str(e)}', 'error', 'System')
+            add_log('Execute', f'Batch execution failed: {str(e)}', 'error', 'System')
         except:
             pass
         
         return jsonify({
             'success': False,
             'error': str(e),
-            'stages': stages if 'stages' in locals() else []
+            'stages': runner.stage_reports if 'runner' in locals() else []
         }), 500
+
+
+def _publish_results(obligations, run_id, mode):
+    """Store a run's results, make them the current ones, archive them and raise notifications"""
+    from api.compliance import replace_compliance_results
+    from database import save_compliance_results
+    
+    # One atomic batch replacing the previous run's stored results; the saved records (with ids) become the current results
+    saved = save_compliance_results(obligations, replace=True)
+    if obligations and not saved:
+        # Nothing was stored: the previous run's results stay current and the run fails
+        raise RuntimeError(f'Could not store the {len(obligations)} compliance results of this run')
+    replace_compliance_results(saved)
+    _add_log('Execute', f'Stored {len(saved)} compliance records', 'success', 'System')
+    
+    # The current results are replaced by the next run; the archive keeps every run for history queries
+    if current_app.config.get('ARCHIVE_RUNS', True):
+        try:
+            get_run_archive().archive_run(run_id, saved, mode=mode)
+        except Exception as e:
+            print(f"Warning: Could not archive run {run_id}: {str(e)}")
+    
+    try:
+        from api.notifications import check_compliance_issues
+        check_compliance_issues()
+    except Exception as e:
+        print(f"Warning: Could not generate notifications: {str(e)}")
+
+
+def _dedup_index(data):
+    """The cross-upload dedup index, unless the request turns it off with ``"dedup": false``"""
+    if str(data.get('dedup', True)).lower() in ('false', '0', 'no', 'off'):
+        return None
+    try:
+        return get_dedup_index(bloom=current_app.config.get('DEDUP_BLOOM', True))
+    except Exception as e:
+        print(f"Warning: Could not open dedup index: {str(e)}")
+        return None
+
+
+def _register_incidents(dedup, filepaths):
+    """Record the incidents of successfully processed uploads, in order, so later uploads skip them"""
+    if dedup is None:
+        return
+    try:
+        for file_id, filepath in filepaths.items():
+            added = dedup.register(file_id, filepath)
+            if added:
+                _add_log('Execute', f'Recorded {added} new incidents from {file_id} for deduplication', 'info', 'System')
+    except Exception as e:
+        print(f"Warning: Could not update dedup index: {str(e)}")
+
+
+def _workbook_datasets(file_id):
+    """Dataset file_ids of a workbook upload (waiting for its conversion), or [] for other uploads.
+
+    Returns (datasets, error_response).
+    """
+    if not file_id.lower().endswith(('.xlsx', '.xls')):
+        return [], None
+    
+    filepath = os.path.normpath(os.path.join(current_app.config['UPLOAD_FOLDER'], file_id))
+    metadata = wait_for_conversion(filepath, timeout=current_app.config.get('EXCEL_WAIT_SECONDS'),
+                                   max_workers=current_app.config.get('EXCEL_WORKERS', 2))
+    if metadata is None:
+        return None, (jsonify({'error': 'Workbook has no conversion record - upload it again', 'file_id': file_id}), 404)
+    if metadata.get('status') == CONVERTING:
+        return None, (jsonify({'error': 'Workbook is still converting', 'file_id': file_id, 'status': CONVERTING}), 409)
+    if metadata.get('status') != READY:
+        return None, (jsonify({'error': f"Workbook conversion failed: {metadata.get('error')}", 'file_id': file_id}), 422)
+    return [d['file_id'] for d in metadata['datasets']], None
+
+
+def _display_columns(data):
+    """Requested ``include_columns`` (list or comma-separated string)"""
+    columns = data.get('include_columns') or []
+    if isinstance(columns, str):
+        columns = [c.strip() for c in columns.split(',') if c.strip()]
+    return list(dict.fromkeys(columns)) or None
+
+
+def _add_log(stage, message, log_type='info', process='System'):
+    """Forward pipeline logs to the log panel"""
+    try:
+        from api.logs import add_log
+        add_log(stage, message, log_type, process)
+    except:
+        pass
@@ -30,17 +30,18 @@ def add_notification(title, message, severity='info', category='compliance'):
 def check_compliance_issues():
     """Check for critical/high severity compliance issues and create notifications"""
     try:
-        from api.compliance import compliance_results
+        from api.compliance import get_results_index
         
-        if not compliance_results:
+        index = get_results_index()
+        if not len(index):
             return
         
-        # Check for critical severity issues
-        critical_issues = [r for r in compliance_results if r.get('severity') == 'High']
-        non_compliant = [r for r in compliance_results if r.get('status') == 'Non-Compliant']
+        # Check for critical severity issues (positions from the result indexes)
+        critical_issues = index.positions({'severity': 'High'})
+        non_compliant = index.positions({'status': 'Non-Compliant'})
         
         # Create notifications for critical issues
-        for issue in critical_issues[:5]:  # Limit to top 5
+        for issue in index.records.take(critical_issues[:5]):  # Limit to top 5
             framework = issue.get('framework', 'Unknown')
             obligation = issue.get('obligationId', 'Unknown')
             description = issue.get('description', 'No description')
@@ -53,7 +54,7 @@ def check_compliance_issues():
             )
         
         # Create notification for non-compliant summary
-        if non_compliant:
+        if len(non_compliant):
             add_notification(
                 title=f'{len(non_compliant)} Non-Compliant Records Detected',
                 message=f'Found {len(non_compliant)} compliance violations requiring immediate attention.',
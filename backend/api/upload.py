@@ -6,6 +6,12 @@ import uuid
 from werkzeug.utils import secure_filename
 from datetime import datetime
 
+from pipeline.ingest import StreamingIngest
+from database.upload_store import (
+    convert_to_columnar, content_file_id, save_upload_metadata, load_upload_metadata, upload_stats
+)
+from database.excel_converter import submit_conversion, conversion_status, FAILED
+
 upload_bp = Blueprint('upload', __name__)
 
 ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls'}
@@ -34,36 +40,79 @@ def upload_file():
         return jsonify({'error': 'Invalid file type. Only CSV, XLSX, XLS allowed'}), 400
     
     try:
-        # Generate unique filename with original extension
         original_filename = secure_filename(file.filename)
         file_extension = original_filename.rsplit('.', 1)[1].lower()
-        unique_id = str(uuid.uuid4())
-        file_id = f"{unique_id}.{file_extension}"  # ← Include extension!
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        
+        # Stream to a temporary name - hashed, row-counted and header-checked as it is written, so the
+        # body is read once - then move it to its content address (or drop it for a byte-identical re-upload)
+        incoming_path = os.path.join(upload_folder, f".incoming-{uuid.uuid4().hex}.{file_extension}")
+        ingest = StreamingIngest(incoming_path, is_csv=(file_extension == 'csv'))
+        info = ingest.ingest(file.stream)
         
-        # Save file with extension
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], file_id)
-        file.save(filepath)
+        duplicate = _existing_upload(upload_folder, info['sha256'], file_extension, original_filename)
+        if duplicate:
+            os.remove(incoming_path)
+            return jsonify(duplicate), 200
         
-        # Get file metadata
-        file_size = os.path.getsize(filepath)
+        file_id = content_file_id(info['sha256'], file_extension)
+        filepath = os.path.join(upload_folder, file_id)
+        os.replace(incoming_path, filepath)
+        file_size = info['size']
         
-        # Convert XLSX/XLS to CSV if needed
+        # XLSX/XLS: convert in the background, one Parquet dataset per sheet
         if file_extension in ['xlsx', 'xls']:
-            import pandas as pd
-            df = pd.read_excel(filepath)
-            csv_file_id = f"{unique_id}.csv"
-            csv_filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], csv_file_id)
-            df.to_csv(csv_filepath, index=False)
+            metadata = submit_conversion(filepath, {
+                'file_id': file_id,
+                'filename': original_filename,
+                'size': file_size,
+                'rows': None,
+                'sha256': info['sha256'],
+                'uploaded_at': datetime.utcnow().isoformat()
+            }, max_workers=current_app.config.get('EXCEL_WORKERS', 2))
+            
+            try:
+                from api.logs import add_log
+                add_log('Upload', f'Workbook uploaded: {original_filename} (converting in background)', 'info', 'System')
+            except:
+                pass
             
-            # Use CSV version for processing
-            file_id = csv_file_id
-            filepath = csv_filepath
-            file_size = os.path.getsize(csv_filepath)
+            print(f"✅ Workbook uploaded, converting in background: {file_id}")
+            return jsonify({
+                'success': True,
+                'duplicate': False,
+                **metadata,
+                'status_url': f"/api/upload/{file_id}/status"
+            }), 202
+        
+        row_count = info['rows']
+        schema = info['schema']
+        
+        if not schema['valid']:
+            os.remove(filepath)
+            return jsonify({
+                'error': f"File is missing required columns: {', '.join(schema['missing_required'])}",
+                'schema': schema
+            }), 400
+        
+        # Columnar copy so executes never parse the CSV again
+        try:
+            convert_to_columnar(filepath)
+        except Exception as e:
+            print(f"Warning: Could not build columnar copy: {str(e)}")
         
-        # Get row count
-        import pandas as pd
-        df = pd.read_csv(filepath)
-        row_count = len(df)
+        metadata = {
+            'file_id': file_id,
+            'filename': original_filename,
+            'size': file_size,
+            'rows': row_count,
+            'sha256': info['sha256'],
+            'schema': schema,
+            'stats': upload_stats(filepath),
+            'status': 'ready',
+            'uploaded_at': datetime.utcnow().isoformat()
+        }
+        save_upload_metadata(filepath, metadata)
         
         # Log the upload
         try:
@@ -74,15 +123,39 @@ def upload_file():
         
         print(f"✅ File uploaded successfully: {file_id} ({row_count} rows)")
         
-        return jsonify({
-            'success': True,
-            'file_id': file_id,
-            'filename': original_filename,
-            'size': file_size,
-            'rows': row_count,
-            'uploaded_at': datetime.utcnow().isoformat()
-        }), 200
+        return jsonify({'success': True, 'duplicate': False, **metadata}), 200
         
     except Exception as e:
         print(f"❌ Upload error: {str(e)}")
+        if 'incoming_path' in locals() and os.path.exists(incoming_path):
+            os.remove(incoming_path)
         return jsonify({'error': str(e)}), 500
+
+
+@upload_bp.route('/upload/<file_id>/status', methods=['GET'])
+def upload_status(file_id):
+    """Conversion status of an upload (workbooks list their per-sheet datasets once ready)"""
+    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], secure_filename(file_id))
+    metadata = conversion_status(filepath, max_workers=current_app.config.get('EXCEL_WORKERS', 2))
+    if metadata is None:
+        return jsonify({'error': 'Upload not found', 'file_id': file_id}), 404
+    return jsonify({'success': True, **metadata}), 200
+
+
+def _existing_upload(upload_folder, sha256, file_extension, filename):
+    """Response for an upload whose content is already stored, or None"""
+    source_path = os.path.join(upload_folder, content_file_id(sha256, file_extension))
+    metadata = load_upload_metadata(source_path)
+    if not metadata or not os.path.exists(os.path.join(upload_folder, metadata['file_id'])):
+        return None
+    if metadata.get('status') == FAILED:
+        return None  # let a failed workbook conversion run again
+    
+    try:
+        from api.logs import add_log
+        add_log('Upload', f'Duplicate upload: {filename} matches {metadata["file_id"]}', 'info', 'System')
+    except:
+        pass
+    
+    print(f"♻️ Duplicate upload: {filename} -> {metadata['file_id']}")
+    return {**metadata, 'success': True, 'duplicate': True, 'filename': filename}
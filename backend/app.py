@@ -13,6 +13,7 @@ from api.logs import logs_bp
 from api.chat import chat_bp
 from api.notifications import notifications_bp
 from api.auth import auth_bp
+from api.datasets import datasets_bp
 
 app = Flask(__name__)
 
@@ -30,6 +31,10 @@ CORS(app, resources={
 app.config['UPLOAD_FOLDER'] = './data/uploads'
 app.config['POLICY_RULES_FILE'] = './policy_rules.yaml'
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB
+app.config['EXCEL_WORKERS'] = int(os.getenv('EXCEL_WORKERS', 2))  # background workbook converters
+app.config['EXCEL_WAIT_SECONDS'] = float(os.getenv('EXCEL_WAIT_SECONDS', 300))  # execute waits this long for a converting workbook
+app.config['DEDUP_BLOOM'] = os.getenv('DEDUP_BLOOM', 'true').lower() == 'true'  # Bloom filter in front of the seen-incident set
+app.config['ARCHIVE_RUNS'] = os.getenv('ARCHIVE_RUNS', 'true').lower() == 'true'  # keep every run's obligations in the Parquet history
 
 # Create directories
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -43,6 +48,7 @@ app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
 app.register_blueprint(compliance_bp, url_prefix='/api/compliance')
 app.register_blueprint(logs_bp, url_prefix='/api')
 app.register_blueprint(chat_bp, url_prefix='/api/chat')
+app.register_blueprint(datasets_bp, url_prefix='/api/datasets')
 app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 # Add CORS headers to ALL responses
@@ -83,10 +89,16 @@ if __name__ == '__main__':
     print("Health: http://localhost:5000/api/health")
     print("\n📡 API Endpoints:")
     print("   - POST /api/upload")
+    print("   - GET  /api/upload/<file_id>/status")
     print("   - POST /api/execute")
+    print("   - POST /api/execute/batch")
     print("   - GET  /api/logs")
     print("   - GET  /api/dashboard/metrics")
     print("   - GET  /api/compliance/results")
+    print("   - GET  /api/datasets/<file_id>/profile")
+    print("   - POST /api/datasets/<file_id>/query")
+    print("   - GET  /api/datasets/<file_id>/lookup")
+    print("   - GET  /api/datasets/<file_id>/timeline")
     print("   - POST /api/chat/")
     print("="*60 + "\n")
     
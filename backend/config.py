@@ -23,6 +23,10 @@ class Config:
     LOGS_FILE = './data/processed/execution_logs.csv'
     KB_CACHE_FILE = './data/kb_cache/knowledge_base.csv'
     
+    # Storage backend for results, logs and the KB cache: 'csv' or 'sqlite'
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'csv').lower()
+    SQLITE_DB_FILE = os.getenv('SQLITE_DB_FILE', './data/processed/compliance.db')
+    
     # Policy Rules
     POLICY_RULES_FILE = os.getenv('POLICY_RULES_FILE', 'policy_rules.yaml')
 
@@ -1,5 +1,6 @@
-from .csv_storage import (
+from .storage import (
     save_compliance_result,
+    save_compliance_results,
     get_compliance_results,
     clear_all_compliance_results,
     save_log,
@@ -19,6 +20,7 @@ from .knowledge_base import (
 
 __all__ = [
     'save_compliance_result',
+    'save_compliance_results',
     'get_compliance_results',
     'clear_all_compliance_results',
     'save_log',
@@ -0,0 +1,109 @@
+# database/aggregates.py - Dashboard counts kept up to date as compliance results are written
+
+import threading
+import pandas as pd
+from collections import Counter
+from typing import Any, Callable, Dict
+
+# Result fields counted per value
+COUNTED_FIELDS = {'status': 'Unknown', 'severity': 'Unknown', 'framework': 'Unknown', 'action': 'unknown'}
+
+
+class ResultAggregates:
+    """Counts by status/severity/framework/action, distinct obligations and a running confidence sum.
+
+    Writes add to the counts (``add``); clears ``reset`` them. Each update records the
+    storage stamp it brings the counts up to, so ``current`` can tell when something
+    else changed the results and rebuild once from a full read.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stamp: Any = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.total = 0
+        self.confidence_sum = 0.0
+        self.counts: Dict[str, Counter] = {field: Counter() for field in COUNTED_FIELDS}
+        self.obligations: Counter = Counter()
+
+    def reset(self, stamp: Any = None) -> None:
+        with self._lock:
+            self._reset()
+            self.stamp = stamp
+
+    def replace(self, records: pd.DataFrame, stamp: Any) -> None:
+        """Counts for storage that now holds exactly ``records``"""
+        with self._lock:
+            self._reset()
+            self._count(records)
+            self.stamp = stamp
+
+    def add(self, records: pd.DataFrame, before: Any, after: Any) -> None:
+        """Count newly written records, if the counts matched the storage just before the write"""
+        with self._lock:
+            if self.stamp is None or self.stamp != before:
+                # Out of step already - the next read rebuilds
+                return
+            self._count(records)
+            self.stamp = after
+
+    def current(self, stamp: Any, load: Callable[[], pd.DataFrame]) -> 'ResultAggregates':
+        """The counts for storage at ``stamp``, rebuilt from ``load()`` only if they are out of step"""
+        with self._lock:
+            if self.stamp is not None and self.stamp == stamp:
+                return self
+        records = load()
+        with self._lock:
+            self._reset()
+            self._count(records)
+            self.stamp = stamp
+        return self
+
+    def _count(self, records: pd.DataFrame) -> None:
+        if records is None or records.empty:
+            return
+        self.total += len(records)
+        for field, default in COUNTED_FIELDS.items():
+            values = records[field] if field in records.columns else pd.Series(default, index=records.index)
+            values = values.astype(object).where(values.notna(), default)
+            self.counts[field].update(values.value_counts().to_dict())
+        if 'confidence_score' in records.columns:
+            self.confidence_sum += float(pd.to_numeric(records['confidence_score'], errors='coerce').fillna(0).sum())
+        if 'obligationId' in records.columns:
+            ids = records['obligationId']
+            self.obligations.update(ids[ids.notna() & (ids.astype(str) != '')].value_counts().to_dict())
+
+    def snapshot(self) -> Dict:
+        """Counts as plain dicts (O(distinct values), independent of the number of results)"""
+        with self._lock:
+            by = {field: {str(k): int(v) for k, v in counts.items() if v} for field, counts in self.counts.items()}
+            return {
+                'total': self.total,
+                'confidence_sum': self.confidence_sum,
+                'avg_confidence': self.confidence_sum / self.total if self.total else 0,
+                'by_status': by['status'],
+                'by_severity': by['severity'],
+                'by_framework': by['framework'],
+                'by_action': by['action'],
+                'unique_obligations': len(self.obligations)
+            }
+
+
+def metrics_from_snapshot(snapshot: Dict) -> Dict:
+    """get_dashboard_metrics() result built from a snapshot"""
+    by_status = snapshot['by_status']
+    return {
+        'total_processed': snapshot['total'],
+        'compliant': by_status.get('Compliant', 0),
+        'non_compliant': by_status.get('Non-Compliant', 0),
+        'requires_action': by_status.get('Requires Action', 0),
+        'avg_confidence': round(snapshot['avg_confidence'], 2),
+        'high_severity': sum(n for sev, n in snapshot['by_severity'].items() if sev.lower() in ['high', 'critical']),
+        'by_framework': snapshot['by_framework'],
+        'by_action': snapshot['by_action'],
+        'by_severity': snapshot['by_severity'],
+        'confidence_sum': snapshot['confidence_sum'],
+        'unique_obligations': snapshot['unique_obligations']
+    }
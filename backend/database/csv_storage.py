@@ -2,14 +2,27 @@
 
 import pandas as pd
 import os
-from typing import Dict, List, Optional
+import io
+import csv
+import threading
+from filelock import FileLock
+from typing import Dict, List, Optional, Union
 from datetime import datetime
 import json
 
-# Storage file paths
-COMPLIANCE_RESULTS_FILE = './data/processed/compliance_results.csv'
-LOGS_FILE = './data/processed/execution_logs.csv'
-KB_CACHE_FILE = './data/kb_cache/knowledge_base.csv'
+from database.storage_common import (
+    COMPLIANCE_RESULTS_FILE, LOGS_FILE, KB_CACHE_FILE, RESULT_COLUMNS, LOG_COLUMNS, KB_COLUMNS,
+    LOG_SEGMENT_ROWS, LOG_RETENTION, new_ids, clean_records, log_segments
+)
+from database.writer import create_writer
+from database.aggregates import ResultAggregates, metrics_from_snapshot
+
+# Appends and log rotation from concurrent requests go through here; the FileLock
+# next to each file (<file>.lock) keeps other processes out of the same read-modify-write
+_write_lock = threading.Lock()
+# Data rows in the live log file (counted once per process, then tracked on append)
+_log_rows: Dict[str, int] = {}
+_files_ready = threading.Event()
 
 def ensure_files_exist():
     """Create CSV files if they don't exist"""
@@ -18,76 +31,244 @@ def ensure_files_exist():
     
     # Create compliance results file
     if not os.path.exists(COMPLIANCE_RESULTS_FILE):
-        df = pd.DataFrame(columns=[
-            'id', 'framework', 'obligationId', 'description', 'status',
-            'confidence_score', 'category', 'severity', 'action', 'reason',
-            'rule_id', 'created_at'
-        ])
-        df.to_csv(COMPLIANCE_RESULTS_FILE, index=False)
+        pd.DataFrame(columns=RESULT_COLUMNS).to_csv(COMPLIANCE_RESULTS_FILE, index=False)
     
     # Create logs file
     if not os.path.exists(LOGS_FILE):
-        df = pd.DataFrame(columns=[
-            'id', 'timestamp', 'stage', 'message', 'type', 'process'
-        ])
-        df.to_csv(LOGS_FILE, index=False)
+        pd.DataFrame(columns=LOG_COLUMNS).to_csv(LOGS_FILE, index=False)
     
     # Create KB cache file
     if not os.path.exists(KB_CACHE_FILE):
-        df = pd.DataFrame(columns=['key', 'value', 'created_at'])
-        df.to_csv(KB_CACHE_FILE, index=False)
+        pd.DataFrame(columns=KB_COLUMNS).to_csv(KB_CACHE_FILE, index=False)
+
+def _ensure_ready():
+    """ensure_files_exist once per process (reads recreate a file that disappears later)"""
+    if not _files_ready.is_set():
+        ensure_files_exist()
+        _files_ready.set()
+
+# ============================================
+# TABLE CACHE
+# ============================================
+
+def _stamp(path: str) -> Optional[tuple]:
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _parse(path: str) -> pd.DataFrame:
+    # Ids stay strings (as assigned), not 20-digit integers
+    return pd.read_csv(path, dtype={'id': str})
+
+class _TableCache:
+    """Parsed CSV tables held in memory and checked against the file's (mtime, size) on every read.
+
+    Writes made through this module update the cached frame directly; any other
+    change to a file shows up as a different stamp and the file is parsed again.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, tuple] = {}  # path -> (stamp, frame)
+        self._lock = threading.Lock()
+
+    def read(self, path: str) -> pd.DataFrame:
+        """The table's frame - shared, so callers must not modify it in place"""
+        stamp = _stamp(path)
+        if stamp is None:
+            ensure_files_exist()
+            stamp = _stamp(path)
+        with self._lock:
+            cached = self._tables.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        df = _parse(path)
+        with self._lock:
+            self._tables[path] = (stamp, df)
+        return df
+
+    def appended(self, path: str, before: Optional[tuple], offset: int) -> None:
+        """After an append at ``offset``: parse just the new bytes onto the cached frame"""
+        with self._lock:
+            cached = self._tables.get(path)
+            if cached is None or cached[0] != before:
+                self._tables.pop(path, None)
+                return
+        with open(path, 'rb') as f:
+            header = f.readline()
+            f.seek(offset)
+            new = pd.read_csv(io.BytesIO(header + f.read()), dtype={'id': str})
+        frame = pd.concat([cached[1], new], ignore_index=True) if not cached[1].empty else new
+        with self._lock:
+            self._tables[path] = (_stamp(path), frame)
+
+    def replaced(self, path: str, df: pd.DataFrame) -> None:
+        """After this module rewrote a file with ``df``"""
+        with self._lock:
+            self._tables[path] = (_stamp(path), df.reset_index(drop=True))
+
+    def renamed(self, old: str, new: str) -> None:
+        with self._lock:
+            cached = self._tables.pop(old, None)
+            if cached is not None and cached[0] == _stamp(new):
+                self._tables[new] = cached
+
+    def forget(self, path: str) -> None:
+        with self._lock:
+            self._tables.pop(path, None)
+
+_tables = _TableCache()
+
+# Dashboard counts over the results file, advanced by each write made here
+_aggregates = ResultAggregates()
+
+# ============================================
+# APPEND-ONLY WRITES
+# ============================================
+
+def _read_header(path: str) -> Optional[List[str]]:
+    """Column names of a CSV file (None if it is missing or empty)"""
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            return next(csv.reader(f), None) or None
+    except FileNotFoundError:
+        return None
+
+def _file_lock(path: str) -> FileLock:
+    return FileLock(path + '.lock', timeout=30)
+
+def _append_rows(path: str, rows: Union[List[Dict], pd.DataFrame], columns: List[str], sync: bool = False) -> None:
+    """Append rows (dicts or a frame) under the file's existing header, writing only the new rows.
+
+    A missing or empty file gets ``columns`` as its header. Only rows bringing a
+    column the file does not have yet cost a rewrite (to widen the header). A failed
+    append is truncated away, so a batch lands completely or not at all.
+    """
+    header = _read_header(path)
+    keys = list(rows.columns) if isinstance(rows, pd.DataFrame) else dict.fromkeys(k for row in rows for k in row)
+    extra = [c for c in keys if c not in (header or columns)]
+
+    if header is None:
+        header = columns + extra
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(header)
+    elif extra:
+        df = _parse(path)
+        header = header + extra
+        df.reindex(columns=header).to_csv(path, index=False)
+        _tables.forget(path)
+
+    size = os.path.getsize(path)
+    before = _stamp(path)
+    try:
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            if isinstance(rows, pd.DataFrame):
+                rows.reindex(columns=header).to_csv(f, header=False, index=False)
+            else:
+                csv.writer(f).writerows([_cell(row.get(column)) for column in header] for row in rows)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+    except Exception:
+        with open(path, 'r+b') as f:
+            f.truncate(size)
+        _tables.forget(path)
+        raise
+    _tables.appended(path, before, size)
+
+def _write_replacing(path: str, df: pd.DataFrame) -> None:
+    """Write ``df`` as the whole file: a temp file next to it, synced, then swapped in"""
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _cell(value):
+    # Missing values are written as empty cells, as to_csv does
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return value
 
 # ============================================
 # COMPLIANCE RESULTS OPERATIONS
 # ============================================
 
 def save_compliance_result(data: Dict) -> Dict:
-    """Save compliance result to CSV"""
+    """Save compliance result to CSV (appends one row)"""
     try:
-        ensure_files_exist()
+        _ensure_ready()
         
         # Add ID and timestamp
-        data['id'] = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+        data['id'] = new_ids(1)[0]
         data['created_at'] = datetime.utcnow().isoformat()
         
-        # Read existing data
-        try:
-            df = pd.read_csv(COMPLIANCE_RESULTS_FILE)
-        except:
-            # If file is corrupted, create fresh one
-            df = pd.DataFrame(columns=[
-                'id', 'framework', 'obligationId', 'description', 'status',
-                'confidence_score', 'category', 'severity', 'action', 'reason',
-                'rule_id', 'created_at'
-            ])
-        
-        # Ensure data has all required columns
-        for col in df.columns:
-            if col not in data:
-                data[col] = None
-        
-        # Append new record
-        new_row = pd.DataFrame([data])
-        df = pd.concat([df, new_row], ignore_index=True)
-        
-        # Save back to CSV
-        df.to_csv(COMPLIANCE_RESULTS_FILE, index=False)
+        with _write_lock, _file_lock(COMPLIANCE_RESULTS_FILE):
+            # Ensure data has all required columns
+            for col in _read_header(COMPLIANCE_RESULTS_FILE) or RESULT_COLUMNS:
+                if col not in data:
+                    data[col] = None
+            
+            before = _stamp(COMPLIANCE_RESULTS_FILE)
+            _append_rows(COMPLIANCE_RESULTS_FILE, [data], RESULT_COLUMNS)
+            _aggregates.add(pd.DataFrame([data]), before, _stamp(COMPLIANCE_RESULTS_FILE))
         
         return data
     except Exception as e:
         print(f"Error saving compliance result: {str(e)}")
         return {}
 
+def save_compliance_results(records: List[Dict], replace: bool = False) -> List[Dict]:
+    """Save a batch of compliance results with one append (all rows or none).
+
+    With ``replace``, the batch takes the place of every stored result instead, in one
+    atomic file swap, so a run's results never add up with the previous run's.
+    """
+    try:
+        _ensure_ready()
+        if not records and not replace:
+            return []
+        
+        df = clean_records(records) if records else pd.DataFrame(columns=RESULT_COLUMNS)
+        df['id'] = new_ids(len(df))
+        df['created_at'] = datetime.utcnow().isoformat()
+        
+        with _write_lock, _file_lock(COMPLIANCE_RESULTS_FILE):
+            if replace:
+                df = df.reindex(columns=RESULT_COLUMNS + [c for c in df.columns if c not in RESULT_COLUMNS])
+                _write_replacing(COMPLIANCE_RESULTS_FILE, df)
+                _tables.forget(COMPLIANCE_RESULTS_FILE)
+                _aggregates.replace(df, _stamp(COMPLIANCE_RESULTS_FILE))
+            else:
+                for col in _read_header(COMPLIANCE_RESULTS_FILE) or RESULT_COLUMNS:
+                    if col not in df.columns:
+                        df[col] = None
+                before = _stamp(COMPLIANCE_RESULTS_FILE)
+                _append_rows(COMPLIANCE_RESULTS_FILE, df, RESULT_COLUMNS)
+                _aggregates.add(df, before, _stamp(COMPLIANCE_RESULTS_FILE))
+        
+        return df.to_dict('records')
+    except Exception as e:
+        print(f"Error saving compliance results: {str(e)}")
+        return []
+
 def get_compliance_results(filters: Optional[Dict] = None, limit: int = 100, offset: int = 0) -> List[Dict]:
     """Get compliance results from CSV with optional filters"""
     try:
-        ensure_files_exist()
+        _ensure_ready()
         
         if not os.path.exists(COMPLIANCE_RESULTS_FILE):
             return []
         
-        # Read CSV
-        df = pd.read_csv(COMPLIANCE_RESULTS_FILE)
+        # Parsed once, then served from memory until the file changes
+        df = _tables.read(COMPLIANCE_RESULTS_FILE)
         
         if df.empty:
             return []
@@ -114,12 +295,11 @@ def get_compliance_results(filters: Optional[Dict] = None, limit: int = 100, off
 def clear_all_compliance_results() -> bool:
     """Clear all compliance results"""
     try:
-        df = pd.DataFrame(columns=[
-            'id', 'framework', 'obligationId', 'description', 'status',
-            'confidence_score', 'category', 'severity', 'action', 'reason',
-            'rule_id', 'created_at'
-        ])
-        df.to_csv(COMPLIANCE_RESULTS_FILE, index=False)
+        with _write_lock, _file_lock(COMPLIANCE_RESULTS_FILE):
+            empty = pd.DataFrame(columns=RESULT_COLUMNS)
+            empty.to_csv(COMPLIANCE_RESULTS_FILE, index=False)
+            _tables.replaced(COMPLIANCE_RESULTS_FILE, empty)
+            _aggregates.reset(_stamp(COMPLIANCE_RESULTS_FILE))
         return True
     except Exception as e:
         print(f"Error clearing compliance results: {str(e)}")
@@ -129,13 +309,13 @@ def clear_all_compliance_results() -> bool:
 # EXECUTION LOGS OPERATIONS
 # ============================================
 
-def save_log(stage: str, message: str, log_type: str = 'info', process: str = 'system') -> Dict:
-    """Save execution log to CSV"""
+def save_log(stage: str, message: str, log_type: str = 'info', process: str = 'system', wait: bool = False) -> Dict:
+    """Queue an execution log row for the storage writer (``wait`` blocks until it is on disk)"""
     try:
-        ensure_files_exist()
+        _ensure_ready()
         
         log_entry = {
-            'id': datetime.utcnow().strftime('%Y%m%d%H%M%S%f'),
+            'id': new_ids(1)[0],
             'timestamp': datetime.utcnow().isoformat(),
             'stage': stage,
             'message': message,
@@ -143,38 +323,66 @@ def save_log(stage: str, message: str, log_type: str = 'info', process: str = 's
             'process': process
         }
         
-        # Read existing logs
-        df = pd.read_csv(LOGS_FILE)
-        
-        # Append new log
-        new_row = pd.DataFrame([log_entry])
-        df = pd.concat([df, new_row], ignore_index=True)
-        
-        # Keep only last 1000 logs to prevent file from growing too large
-        if len(df) > 1000:
-            df = df.tail(1000)
-        
-        # Save back to CSV
-        df.to_csv(LOGS_FILE, index=False)
+        future = _writer.submit('logs', log_entry)
+        if wait:
+            future.result()
         
         return log_entry
     except Exception as e:
         print(f"Error saving log: {str(e)}")
         return {}
 
+def _flush_logs(entries: List[Dict]) -> None:
+    """Writer flush: append queued log rows at once, rotating full segments out"""
+    with _write_lock, _file_lock(LOGS_FILE):
+        if LOGS_FILE not in _log_rows:
+            _log_rows[LOGS_FILE] = len(_tables.read(LOGS_FILE))
+        
+        while entries:
+            # Fill the live file up to the segment size, then seal it instead of rewriting it
+            room = max(1, LOG_SEGMENT_ROWS - _log_rows[LOGS_FILE])
+            _append_rows(LOGS_FILE, entries[:room], LOG_COLUMNS, sync=True)
+            _log_rows[LOGS_FILE] += len(entries[:room])
+            entries = entries[room:]
+            
+            if _log_rows[LOGS_FILE] >= LOG_SEGMENT_ROWS:
+                _rotate_logs()
+
+def _rotate_logs() -> None:
+    """Move the live log file to the next segment and drop segments past the retention"""
+    base, ext = os.path.splitext(LOGS_FILE)
+    segments = log_segments()
+    last = segments[-1][0] if segments else 0
+    
+    segment = f'{base}.{last + 1}{ext}'
+    os.replace(LOGS_FILE, segment)
+    _tables.renamed(LOGS_FILE, segment)
+    empty = pd.DataFrame(columns=LOG_COLUMNS)
+    empty.to_csv(LOGS_FILE, index=False)
+    _tables.replaced(LOGS_FILE, empty)
+    _log_rows[LOGS_FILE] = 0
+    
+    keep = max(1, LOG_RETENTION // LOG_SEGMENT_ROWS)
+    for _, path in log_segments()[:-keep]:
+        os.remove(path)
+        _tables.forget(path)
+
 def get_logs(limit: int = 100, filters: Optional[Dict] = None) -> List[Dict]:
-    """Get execution logs from CSV"""
+    """Get execution logs from CSV (live file plus retained segments)"""
     try:
-        ensure_files_exist()
+        _ensure_ready()
+        _writer.wait_idle()
         
         if not os.path.exists(LOGS_FILE):
             return []
         
         # Read CSV
-        df = pd.read_csv(LOGS_FILE)
+        frames = [_tables.read(path) for _, path in log_segments()] + [_tables.read(LOGS_FILE)]
+        frames = [f for f in frames if not f.empty]
         
-        if df.empty:
+        if not frames:
             return []
+        df = pd.concat(frames, ignore_index=True)
         
         # Apply filters
         if filters:
@@ -198,8 +406,15 @@ def get_logs(limit: int = 100, filters: Optional[Dict] = None) -> List[Dict]:
 def clear_all_logs() -> bool:
     """Clear all execution logs"""
     try:
-        df = pd.DataFrame(columns=['id', 'timestamp', 'stage', 'message', 'type', 'process'])
-        df.to_csv(LOGS_FILE, index=False)
+        _writer.wait_idle()
+        with _write_lock, _file_lock(LOGS_FILE):
+            for _, path in log_segments():
+                os.remove(path)
+                _tables.forget(path)
+            empty = pd.DataFrame(columns=LOG_COLUMNS)
+            empty.to_csv(LOGS_FILE, index=False)
+            _tables.replaced(LOGS_FILE, empty)
+            _log_rows[LOGS_FILE] = 0
         return True
     except Exception as e:
         print(f"Error clearing logs: {str(e)}")
@@ -212,13 +427,13 @@ def clear_all_logs() -> bool:
 def get_kb_entry(key: str) -> Optional[Dict]:
     """Get knowledge base entry from CSV cache"""
     try:
-        ensure_files_exist()
+        _ensure_ready()
+        _writer.wait_idle()
         
         if not os.path.exists(KB_CACHE_FILE):
             return None
         
-        # Read CSV
-        df = pd.read_csv(KB_CACHE_FILE)
+        df = _tables.read(KB_CACHE_FILE)
         
         if df.empty:
             return None
@@ -236,16 +451,10 @@ def get_kb_entry(key: str) -> Optional[Dict]:
         print(f"Error getting KB entry: {str(e)}")
         return None
 
-def save_kb_entry(key: str, value: Dict) -> Dict:
-    """Save knowledge base entry to CSV cache"""
+def save_kb_entry(key: str, value: Dict, wait: bool = False) -> Dict:
+    """Queue a knowledge base upsert for the storage writer (``wait`` blocks until it is on disk)"""
     try:
-        ensure_files_exist()
-        
-        # Read existing cache
-        df = pd.read_csv(KB_CACHE_FILE)
-        
-        # Remove existing entry with same key (upsert behavior)
-        df = df[df['key'] != key]
+        _ensure_ready()
         
         # Create new entry
         entry = {
@@ -254,27 +463,40 @@ def save_kb_entry(key: str, value: Dict) -> Dict:
             'created_at': datetime.utcnow().isoformat()
         }
         
-        # Append new entry
-        new_row = pd.DataFrame([entry])
-        df = pd.concat([df, new_row], ignore_index=True)
-        
-        # Save back to CSV
-        df.to_csv(KB_CACHE_FILE, index=False)
+        future = _writer.submit('kb', entry)
+        if wait:
+            future.result()
         
         return entry
     except Exception as e:
         print(f"Error saving KB entry: {str(e)}")
         return {}
 
+def _flush_kb(entries: List[Dict]) -> None:
+    """Writer flush: apply queued upserts with one rewrite (the latest entry per key wins)"""
+    latest = {entry['key']: entry for entry in entries}
+    with _write_lock, _file_lock(KB_CACHE_FILE):
+        # Read existing cache
+        df = _tables.read(KB_CACHE_FILE)
+        
+        # Remove existing entries with the same keys (upsert behavior)
+        df = df[~df['key'].isin(list(latest))]
+        df = pd.concat([df, pd.DataFrame(list(latest.values()), columns=KB_COLUMNS)], ignore_index=True)
+        
+        # Replace the file in one step, so readers never see it half-written
+        _write_replacing(KB_CACHE_FILE, df)
+        _tables.replaced(KB_CACHE_FILE, df)
+
 def get_all_kb_entries() -> List[Dict]:
     """Get all knowledge base entries"""
     try:
-        ensure_files_exist()
+        _ensure_ready()
+        _writer.wait_idle()
         
         if not os.path.exists(KB_CACHE_FILE):
             return []
         
-        df = pd.read_csv(KB_CACHE_FILE)
+        df = _tables.read(KB_CACHE_FILE)
         
         if df.empty:
             return []
@@ -296,8 +518,11 @@ def get_all_kb_entries() -> List[Dict]:
 def clear_kb_cache() -> bool:
     """Clear all knowledge base cache"""
     try:
-        df = pd.DataFrame(columns=['key', 'value', 'created_at'])
-        df.to_csv(KB_CACHE_FILE, index=False)
+        _writer.wait_idle()
+        with _write_lock, _file_lock(KB_CACHE_FILE):
+            empty = pd.DataFrame(columns=KB_COLUMNS)
+            empty.to_csv(KB_CACHE_FILE, index=False)
+            _tables.replaced(KB_CACHE_FILE, empty)
         return True
     except Exception as e:
         print(f"Error clearing KB cache: {str(e)}")
@@ -330,56 +555,12 @@ def get_kb_stats() -> Dict:
 # ============================================
 
 def get_dashboard_metrics() -> Dict:
-    """Get aggregated metrics for dashboard"""
+    """Get aggregated metrics for dashboard (maintained as results are written, over all results)"""
     try:
-        results = get_compliance_results(limit=10000)
-        
-        if not results:
-            return {
-                'total_processed': 0,
-                'compliant': 0,
-                'non_compliant': 0,
-                'requires_action': 0,
-                'avg_confidence': 0,
-                'high_severity': 0,
-                'by_framework': {},
-                'by_action': {}
-            }
-        
-        total = len(results)
-        compliant = sum(1 for r in results if r.get('status') == 'Compliant')
-        non_compliant = sum(1 for r in results if r.get('status') == 'Non-Compliant')
-        requires_action = sum(1 for r in results if r.get('status') == 'Requires Action')
-        
-        # Calculate average confidence
-        confidence_scores = [float(r.get('confidence_score', 0)) for r in results]
-        avg_confidence = sum(confidence_scores) / total if total > 0 else 0
-        
-        # Count high severity
-        high_severity = sum(1 for r in results if str(r.get('severity', '')).lower() in ['high', 'critical'])
-        
-        # Group by framework
-        by_framework = {}
-        for r in results:
-            fw = r.get('framework', 'Unknown')
-            by_framework[fw] = by_framework.get(fw, 0) + 1
-        
-        # Group by action
-        by_action = {}
-        for r in results:
-            action = r.get('action', 'unknown')
-            by_action[action] = by_action.get(action, 0) + 1
-        
-        return {
-            'total_processed': total,
-            'compliant': compliant,
-            'non_compliant': non_compliant,
-            'requires_action': requires_action,
-            'avg_confidence': round(avg_confidence, 2),
-            'high_severity': high_severity,
-            'by_framework': by_framework,
-            'by_action': by_action
-        }
+        _ensure_ready()
+        aggregates = _aggregates.current(_stamp(COMPLIANCE_RESULTS_FILE),
+                                         lambda: _tables.read(COMPLIANCE_RESULTS_FILE))
+        return metrics_from_snapshot(aggregates.snapshot())
     except Exception as e:
         print(f"Error getting dashboard metrics: {str(e)}")
         return {
@@ -398,10 +579,13 @@ def get_dashboard_metrics() -> Dict:
 def check_storage_health() -> bool:
     """Check if CSV storage is accessible"""
     try:
-        ensure_files_exist()
+        _ensure_ready()
         return os.path.exists(COMPLIANCE_RESULTS_FILE) and \
                os.path.exists(LOGS_FILE) and \
                os.path.exists(KB_CACHE_FILE)
     except Exception as e:
         print(f"Storage health check failed: {str(e)}")
         return False
+
+# Log rows and KB upserts are written in groups by a background thread
+_writer = create_writer({'logs': _flush_logs, 'kb': _flush_kb})
@@ -0,0 +1,275 @@
+# database/dedup_index.py - Incidents already seen in earlier uploads, keyed by correlation_id
+
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+from database.upload_store import iter_upload_batches
+
+DEDUP_KEY = 'correlation_id'
+DEDUP_FOLDER = './data/dedup'
+MANIFEST_FILE = 'seen_incidents.json'
+
+# Bloom filter in front of the exact set: ~1% false positives at 10 bits and 7 probes per incident.
+# It is sized for twice the incidents it holds and rebuilt (at twice the size again) once it fills up.
+BLOOM_BITS_PER_KEY = 10
+BLOOM_HEADROOM = 2
+BLOOM_PROBES = 7
+BUILD_SLICE = 1_000_000
+
+# An incident with no correlation_id is never a duplicate
+NO_KEY = np.uint64(np.iinfo(np.uint64).max)
+
+
+def hash_keys(values: pd.Series) -> np.ndarray:
+    """64-bit hashes of correlation ids (stable across processes; NO_KEY for missing ids)"""
+    keys = values.to_numpy(dtype=object)
+    missing = pd.isna(keys)
+    hashes = pd.util.hash_array(np.where(missing, '', keys.astype(str)).astype(object))
+    hashes[missing] = NO_KEY
+    return hashes
+
+
+class BloomFilter:
+    """Bit array answering 'maybe seen' / 'definitely not seen' for 64-bit hashes"""
+
+    def __init__(self, bits: np.ndarray, size: int):
+        self.bits = bits    # packed, little-endian bit order
+        self.size = size    # number of bits
+
+    @classmethod
+    def build(cls, hashes: np.ndarray, capacity: int) -> 'BloomFilter':
+        """Filter with room for ``capacity`` incidents, holding ``hashes``"""
+        size = max(64, capacity * BLOOM_BITS_PER_KEY)
+        bloom = cls(np.zeros((size + 7) // 8, dtype=np.uint8), size)
+        bloom.add(hashes)
+        return bloom
+
+    @property
+    def capacity(self) -> int:
+        return self.size // BLOOM_BITS_PER_KEY
+
+    def add(self, hashes: np.ndarray) -> None:
+        # In slices, so adding never holds more than one slice's probes
+        for start in range(0, len(hashes), BUILD_SLICE):
+            for probe in self._probes(np.asarray(hashes[start:start + BUILD_SLICE]), self.size):
+                np.bitwise_or.at(self.bits, probe >> 3, np.left_shift(1, probe & 7).astype(np.uint8))
+
+    def might_contain(self, hashes: np.ndarray) -> np.ndarray:
+        result = np.ones(len(hashes), dtype=bool)
+        for probe in self._probes(hashes, self.size):
+            result &= (self.bits[probe >> 3] >> (probe & 7).astype(np.uint8)) & 1 == 1
+        return result
+
+    @staticmethod
+    def _probes(hashes: np.ndarray, size: int):
+        # Double hashing: probe i is h1 + i * h2 (mod size)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        for i in range(BLOOM_PROBES):
+            yield ((h1 + np.uint64(i) * h2) % np.uint64(size)).astype(np.int64)
+
+
+class DedupIndex:
+    """Sorted correlation id hashes, each owned by the upload it was first seen in.
+
+    The exact set and the Bloom filter bits are memory-mapped from disk; with
+    ``bloom`` on, only hashes the filter flags are looked up in the exact set.
+    The bits are kept up to date either way, so every process can use them.
+    """
+
+    def __init__(self, folder: str = DEDUP_FOLDER, bloom: bool = True):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_FILE)
+        self.generation = 0
+        self.use_bloom = bloom
+        self._lock = threading.Lock()
+        self._loaded_stamp = None
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.owners = np.empty(0, dtype=np.int32)
+        self.files: List[str] = []
+        self.bloom: Optional[BloomFilter] = None
+
+    # ---- lookups ----
+
+    def owners_of(self, hashes: np.ndarray) -> np.ndarray:
+        """Owning upload code per hash (-1 where the incident has not been seen)"""
+        self._refresh()
+        result = np.full(len(hashes), -1, dtype=np.int32)
+        candidates = np.flatnonzero(hashes != NO_KEY)
+        if len(self.hashes) == 0 or len(candidates) == 0:
+            return result
+        if self.use_bloom and self.bloom is not None:
+            candidates = candidates[self.bloom.might_contain(hashes[candidates])]
+
+        positions = np.searchsorted(self.hashes, hashes[candidates])
+        positions[positions == len(self.hashes)] = 0
+        found = self.hashes[positions] == hashes[candidates]
+        result[candidates[found]] = self.owners[positions[found]]
+        return result
+
+    def filter(self, frames: Dict[str, pd.DataFrame]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, int]]:
+        """Drop incidents first seen in another upload - earlier runs, or earlier files of this batch.
+
+        Returns the filtered frames (without the correlation_id column) and the skipped count per file.
+        """
+        filtered, skipped = {}, {}
+        earlier = np.empty(0, dtype=np.uint64)  # sorted hashes of the files ahead of this one in the batch
+        for file_id, df in frames.items():
+            if DEDUP_KEY not in df.columns:
+                filtered[file_id], skipped[file_id] = df, 0
+                continue
+
+            hashes = hash_keys(df[DEDUP_KEY])
+            owners = self.owners_of(hashes)
+            own_code = self._code(file_id)
+            duplicate = (owners >= 0) & (owners != own_code)
+            if len(earlier):
+                duplicate |= np.isin(hashes, earlier) & (hashes != NO_KEY)
+            earlier = np.union1d(earlier, hashes[~duplicate & (hashes != NO_KEY)])
+
+            kept = df[~duplicate] if duplicate.any() else df
+            filtered[file_id] = kept.drop(columns=[DEDUP_KEY]).reset_index(drop=True)
+            skipped[file_id] = int(duplicate.sum())
+        return filtered, skipped
+
+    # ---- updates ----
+
+    def register(self, file_id: str, filepath: str) -> int:
+        """Record the incidents of an upload that no earlier upload owns; returns how many were new"""
+        start_time = time.time()
+        chunks = []
+        for batch in iter_upload_batches(filepath, columns=[DEDUP_KEY]):
+            if DEDUP_KEY in batch.schema.names:
+                chunks.append(hash_keys(batch.column(DEDUP_KEY).to_pandas()))
+        if not chunks:
+            return 0
+        hashes = np.unique(np.concatenate(chunks))
+        hashes = hashes[hashes != NO_KEY]
+
+        with self._lock:
+            self._refresh(locked=True)
+            if len(self.hashes):
+                positions = np.searchsorted(self.hashes, hashes)
+                positions[positions == len(self.hashes)] = 0
+                hashes = hashes[self.hashes[positions] != hashes]
+            if len(hashes) == 0:
+                return 0
+
+            files = self.files if file_id in self.files else self.files + [file_id]
+            code = files.index(file_id)
+            merged = np.concatenate([np.asarray(self.hashes), hashes])
+            owners = np.concatenate([np.asarray(self.owners), np.full(len(hashes), code, dtype=np.int32)])
+            order = np.argsort(merged, kind='stable')
+            merged, owners = merged[order], owners[order]
+            self._save(merged, owners, files, self._bloom_with(hashes, merged))
+
+        print(f"🧬 Registered {len(hashes)} new incidents from {file_id} in {time.time() - start_time:.2f}s")
+        return int(len(hashes))
+
+    def clear(self) -> None:
+        """Forget every seen incident"""
+        with self._lock:
+            self._refresh(locked=True)
+            paths = [self.path] + [self._array_path(name, self.generation) for name in ('hashes', 'owners', 'bloom')]
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            self._loaded_stamp = None
+            self._set(np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int32), [], None)
+
+    def stats(self) -> Dict:
+        self._refresh()
+        return {
+            'incidents': int(len(self.hashes)),
+            'uploads': len(self.files),
+            'bloom_bytes': int(self.bloom.bits.nbytes) if self.use_bloom and self.bloom is not None else 0
+        }
+
+    # ---- storage ----
+
+    def _code(self, file_id: str) -> int:
+        return self.files.index(file_id) if file_id in self.files else -1
+
+    def _refresh(self, locked: bool = False) -> None:
+        """Reload when another run (or process) has replaced the manifest"""
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._loaded_stamp:
+            return
+        if not locked:
+            with self._lock:
+                return self._refresh(locked=True)
+        if stamp is None:
+            self._set(np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int32), [], None)
+            self.generation = 0
+        else:
+            with open(self.path) as f:
+                manifest = json.load(f)
+            # Memory-map the exact set and the Bloom bits rather than reading them in
+            generation = manifest['generation']
+            hashes = np.load(self._array_path('hashes', generation), mmap_mode='r')
+            owners = np.load(self._array_path('owners', generation), mmap_mode='r')
+            bloom = BloomFilter(np.load(self._array_path('bloom', generation), mmap_mode='r'), manifest['bloom_size'])
+            self._set(hashes, owners, manifest['files'], bloom)
+            self.generation = generation
+        self._loaded_stamp = stamp
+
+    def _set(self, hashes: np.ndarray, owners: np.ndarray, files: List[str], bloom: Optional[BloomFilter]) -> None:
+        self.hashes, self.owners, self.files, self.bloom = hashes, owners, files, bloom
+
+    def _bloom_with(self, new_hashes: np.ndarray, hashes: np.ndarray) -> BloomFilter:
+        """Current Bloom bits plus ``new_hashes``; rebuilt from all ``hashes`` only once the filter is full"""
+        if self.bloom is not None and len(hashes) <= self.bloom.capacity:
+            bloom = BloomFilter(np.array(self.bloom.bits), self.bloom.size)
+            bloom.add(new_hashes)
+            return bloom
+        return BloomFilter.build(hashes, len(hashes) * BLOOM_HEADROOM)
+
+    def _save(self, hashes: np.ndarray, owners: np.ndarray, files: List[str], bloom: BloomFilter) -> None:
+        """Write a new generation of the arrays, then switch the manifest over to it"""
+        os.makedirs(self.folder, exist_ok=True)
+        previous, generation = self.generation, self.generation + 1
+        np.save(self._array_path('hashes', generation), hashes.astype(np.uint64))
+        np.save(self._array_path('owners', generation), owners.astype(np.int32))
+        np.save(self._array_path('bloom', generation), bloom.bits)
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'generation': generation,
+                'incidents': int(len(hashes)),
+                'bloom_size': bloom.size,
+                'files': files
+            }, f)
+        os.replace(tmp_path, self.path)
+
+        self._loaded_stamp = None
+        self._refresh(locked=True)
+        for name in ('hashes', 'owners', 'bloom'):
+            try:
+                os.remove(self._array_path(name, previous))
+            except OSError:
+                pass
+
+    def _array_path(self, name: str, generation: int) -> str:
+        return os.path.join(self.folder, f'seen_{name}.{generation}.npy')
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_dedup_index(bloom: bool = True) -> DedupIndex:
+    """The shared index (``bloom`` applies when it is first opened)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DedupIndex(bloom=bloom)
+        return _index
@@ -0,0 +1,128 @@
+# database/excel_converter.py - Background conversion of Excel uploads into columnar datasets
+
+import os
+import threading
+import pandas as pd
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pipeline.schema import validate_header
+from database.upload_store import (
+    write_columnar, save_upload_metadata, load_upload_metadata, upload_stats
+)
+
+# Workbook metadata status values
+CONVERTING = 'converting'
+READY = 'ready'
+FAILED = 'error'
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending: Dict[str, Future] = {}
+_lock = threading.Lock()
+
+def sheet_file_id(sha256: str, index: int) -> str:
+    """file_id of one sheet of a workbook (each sheet is its own dataset)"""
+    return f"{sha256}-{index}.parquet"
+
+def submit_conversion(filepath: str, metadata: Dict, max_workers: int = 2) -> Dict:
+    """Mark a stored workbook as converting and queue it on the worker pool"""
+    metadata = {**metadata, 'status': CONVERTING, 'datasets': [], 'skipped_sheets': [], 'error': None}
+    save_upload_metadata(filepath, metadata)
+    _submit(filepath, max_workers)
+    return metadata
+
+def conversion_status(filepath: str, max_workers: int = 2) -> Optional[Dict]:
+    """Workbook metadata; re-queues a conversion that was lost (e.g. the server restarted mid-way)"""
+    metadata = load_upload_metadata(filepath)
+    if metadata and metadata.get('status') == CONVERTING and os.path.exists(filepath):
+        _submit(filepath, max_workers)
+    return metadata
+
+def wait_for_conversion(filepath: str, timeout: Optional[float] = None, max_workers: int = 2) -> Optional[Dict]:
+    """Block until the workbook's conversion finishes (or ``timeout`` passes); returns its metadata"""
+    metadata = conversion_status(filepath, max_workers)
+    with _lock:
+        future = _pending.get(os.path.abspath(filepath))
+    if future is not None:
+        try:
+            future.result(timeout=timeout)
+        except Exception:
+            pass  # outcome is recorded in the metadata
+    return load_upload_metadata(filepath) or metadata
+
+def _submit(filepath: str, max_workers: int) -> None:
+    global _executor
+    key = os.path.abspath(filepath)  # the same upload is reached through differently spelled paths
+    with _lock:
+        if key in _pending and not _pending[key].done():
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='excel-convert')
+        future = _executor.submit(_convert, filepath)
+        _pending[key] = future
+    future.add_done_callback(lambda f: _forget(key, f))
+
+def _forget(key: str, future: Future) -> None:
+    with _lock:
+        if _pending.get(key) is future:
+            del _pending[key]
+
+def _convert(filepath: str) -> None:
+    """Write every sheet of a workbook as its own Parquet dataset and record the outcome"""
+    metadata = load_upload_metadata(filepath) or {}
+    upload_folder = os.path.dirname(filepath)
+    print(f"📊 Converting workbook {os.path.basename(filepath)} in the background")
+
+    try:
+        datasets: List[Dict] = []
+        skipped: List[Dict] = []
+        with pd.ExcelFile(filepath) as workbook:
+            for index, sheet in enumerate(workbook.sheet_names):
+                df = workbook.parse(sheet)
+                schema = validate_header(list(df.columns))
+                if not schema['valid']:
+                    skipped.append({'sheet': sheet, 'rows': len(df), 'schema': schema})
+                    continue
+
+                file_id = sheet_file_id(metadata['sha256'], index)
+                target = write_columnar(df, os.path.join(upload_folder, file_id))
+                dataset = {
+                    'file_id': file_id,
+                    'filename': f"{metadata.get('filename', '')} [{sheet}]",
+                    'sheet': sheet,
+                    'source_file_id': metadata.get('file_id'),
+                    'size': os.path.getsize(target),
+                    'rows': len(df),
+                    'sha256': metadata['sha256'],
+                    'schema': schema,
+                    'stats': upload_stats(target),
+                    'status': READY,
+                    'uploaded_at': metadata.get('uploaded_at')
+                }
+                save_upload_metadata(target, dataset)
+                datasets.append({k: dataset[k] for k in ('file_id', 'sheet', 'rows', 'schema')})
+
+        metadata.update({
+            'status': READY if datasets else FAILED,
+            'datasets': datasets,
+            'skipped_sheets': skipped,
+            'rows': sum(d['rows'] for d in datasets),
+            'error': None if datasets else 'No sheet has the required columns',
+            'converted_at': datetime.utcnow().isoformat()
+        })
+        print(f"✅ Workbook converted: {len(datasets)} datasets, {len(skipped)} sheets skipped")
+    except Exception as e:
+        print(f"❌ Workbook conversion failed: {str(e)}")
+        metadata.update({'status': FAILED, 'error': str(e), 'converted_at': datetime.utcnow().isoformat()})
+
+    save_upload_metadata(filepath, metadata)
+
+    try:
+        from api.logs import add_log
+        if metadata['status'] == READY:
+            add_log('Upload', f"Workbook converted: {metadata.get('filename')} ({len(metadata['datasets'])} datasets, {metadata['rows']} rows)", 'success', 'System')
+        else:
+            add_log('Upload', f"Workbook conversion failed: {metadata.get('filename')} ({metadata['error']})", 'error', 'System')
+    except:
+        pass
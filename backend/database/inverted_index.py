@@ -0,0 +1,141 @@
+# database/inverted_index.py - Term -> row id index over the semicolon-joined fields of an upload
+
+import io
+import json
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Dict, List, Tuple
+
+from database.upload_store import SidecarCache, iter_upload_batches, replacing
+
+INDEXED_FIELDS = ['affected_users', 'affected_hosts', 'domains_involved', 'response_actions']
+SEPARATOR = ';'
+INDEX_SUFFIX = '.terms.npz'
+
+
+class InvertedIndex:
+    """Per field: sorted terms, and for term i the row ids rows[offsets[i]:offsets[i + 1]] (ascending)"""
+
+    def __init__(self, fields: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]], rows: int):
+        self.fields = fields
+        self.rows = rows
+
+    @classmethod
+    def build(cls, filepath: str) -> 'InvertedIndex':
+        """Explode the indexed fields of an upload in one streaming pass"""
+        start_time = time.time()
+        terms = {field: [] for field in INDEXED_FIELDS}
+        parents = {field: [] for field in INDEXED_FIELDS}
+        offset = 0
+
+        for batch in iter_upload_batches(filepath, columns=INDEXED_FIELDS):
+            for name, column in zip(batch.schema.names, batch.columns):
+                lists = pc.split_pattern(column.cast(pa.string()), SEPARATOR)
+                values = pc.utf8_trim_whitespace(pc.list_flatten(lists))
+                rows = pc.list_parent_indices(lists).to_numpy() + offset
+                keep = pc.greater(pc.utf8_length(values), 0)
+                terms[name].append(values.filter(keep))
+                parents[name].append(rows[keep.to_numpy(zero_copy_only=False)])
+            offset += batch.num_rows
+
+        fields = {
+            field: cls._postings(terms[field], parents[field], offset)
+            for field in INDEXED_FIELDS if terms[field]
+        }
+        print(f"🔎 Built inverted index over {offset} rows in {time.time() - start_time:.2f}s")
+        return cls(fields, offset)
+
+    @staticmethod
+    def _postings(term_chunks: List[pa.Array], row_chunks: List[np.ndarray], rows: int):
+        """Sorted unique terms, posting offsets and deduplicated, ascending row ids"""
+        encoded = pa.chunked_array(term_chunks, type=pa.string()).combine_chunks().dictionary_encode()
+        dictionary = encoded.dictionary
+        row_ids = np.concatenate(row_chunks) if row_chunks else np.empty(0, dtype=np.int64)
+
+        # Renumber dictionary codes in sorted term order
+        sort_order = pc.array_sort_indices(dictionary).to_numpy()
+        rank = np.empty(len(sort_order), dtype=np.int64)
+        rank[sort_order] = np.arange(len(sort_order))
+        codes = rank[encoded.indices.to_numpy(zero_copy_only=False)]
+
+        order = np.lexsort((row_ids, codes))
+        codes, row_ids = codes[order], row_ids[order]
+        if len(codes):
+            # A value repeated within one row (quarantine_host;...;quarantine_host) is one posting
+            keep = np.ones(len(codes), dtype=bool)
+            keep[1:] = (codes[1:] != codes[:-1]) | (row_ids[1:] != row_ids[:-1])
+            codes, row_ids = codes[keep], row_ids[keep]
+
+        offsets = np.zeros(len(sort_order) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(codes, minlength=len(sort_order)))
+        sorted_terms = np.array([t.encode('utf-8') for t in dictionary.take(pa.array(sort_order)).to_pylist()], dtype=bytes)
+        row_dtype = np.int32 if rows < 2 ** 31 else np.int64
+        return sorted_terms, offsets, row_ids.astype(row_dtype)
+
+    def postings(self, field: str, term: str) -> np.ndarray:
+        """Row ids whose ``field`` contains ``term`` (binary search, then a slice)"""
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f'Not an indexed field: {field} (indexed: {", ".join(INDEXED_FIELDS)})')
+        if field not in self.fields:
+            return np.empty(0, dtype=np.int64)
+
+        terms, offsets, rows = self.fields[field]
+        key = term.strip().encode('utf-8')
+        i = int(np.searchsorted(terms, key))
+        if i >= len(terms) or terms[i] != key:
+            return np.empty(0, dtype=rows.dtype)
+        return rows[offsets[i]:offsets[i + 1]]
+
+    def lookup(self, query: Dict[str, List[str]], match: str = 'all') -> np.ndarray:
+        """Row ids matching every (``all``) or any (``any``) of the field/term pairs"""
+        postings = [self.postings(field, term) for field, terms in query.items() for term in terms]
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+
+        if match == 'any':
+            return np.unique(np.concatenate(postings))
+
+        # Intersect smallest first, so the work follows the result size rather than the file size
+        postings.sort(key=len)
+        result = postings[0]
+        for posting in postings[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+        return result
+
+    def term_counts(self) -> Dict[str, int]:
+        return {field: len(self.fields[field][0]) for field in self.fields}
+
+    def save(self, path: str, stamp: Dict) -> None:
+        arrays = {'meta': np.frombuffer(json.dumps({'rows': self.rows, 'source': stamp}).encode(), dtype=np.uint8)}
+        for field, (terms, offsets, rows) in self.fields.items():
+            arrays[f'{field}.terms'] = terms
+            arrays[f'{field}.offsets'] = offsets
+            arrays[f'{field}.rows'] = rows
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        with replacing(path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.getvalue())
+
+    @classmethod
+    def load(cls, path: str) -> Tuple['InvertedIndex', Dict]:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data['meta'].tobytes().decode())
+            fields = {
+                field: (data[f'{field}.terms'], data[f'{field}.offsets'], data[f'{field}.rows'])
+                for field in INDEXED_FIELDS if f'{field}.terms' in data.files
+            }
+        return cls(fields, meta['rows']), meta.get('source')
+
+
+_indexes = SidecarCache(INDEX_SUFFIX, InvertedIndex.build, InvertedIndex.load,
+                        lambda path, index, stamp: index.save(path, stamp))
+
+def get_index(filepath: str) -> InvertedIndex:
+    """Index of an upload: memory, then the sidecar, then built (and stored) on first use"""
+    return _indexes.get(filepath)
@@ -1,5 +1,5 @@
 from typing import Dict, Optional, List
-from database.csv_storage import (
+from database.storage import (
     get_kb_entry as csv_get_kb_entry,
     save_kb_entry as csv_save_kb_entry,
     get_all_kb_entries,
@@ -10,9 +10,9 @@ def get_kb_entry(key: str) -> Optional[Dict]:
     """Get knowledge base entry from cache"""
     return csv_get_kb_entry(key)
 
-def save_kb_entry(key: str, value: Dict) -> Dict:
-    """Save knowledge base entry to cache"""
-    return csv_save_kb_entry(key, value)
+def save_kb_entry(key: str, value: Dict, wait: bool = False) -> Dict:
+    """Save knowledge base entry to cache (``wait`` blocks until it is stored)"""
+    return csv_save_kb_entry(key, value, wait=wait)
 
 def get_kb_stats() -> Dict:
     """Get statistics about the knowledge base cache"""
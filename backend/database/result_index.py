@@ -0,0 +1,106 @@
+# database/result_index.py - Secondary indexes over the in-memory compliance results
+
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+
+from database.storage_common import new_ids
+from database.result_store import ResultStore
+
+# Result fields /api/compliance/results can filter on
+INDEXED_FIELDS = ['framework', 'status', 'severity', 'action']
+
+
+class ResultIndex:
+    """The current results (a columnar ResultStore) plus, per indexed field, value -> positions.
+
+    Positions only ever grow, so every posting array is sorted and a filtered query
+    is an intersection of sorted arrays followed by a slice. Postings are caught up
+    from the store's columns, for the rows added since, whenever a query needs them.
+    Every record gets an id on insert (storage-style, if it has none) and an entry
+    in the id -> position map used by ``get``.
+    """
+
+    def __init__(self, records: Optional[List[Dict]] = None):
+        self.records = ResultStore()
+        self._lock = threading.Lock()
+        self._positions_by_id: Dict[str, int] = {}
+        self._postings: Dict[str, Dict] = {field: {} for field in INDEXED_FIELDS}
+        self._indexed = 0  # rows covered by the postings
+        if records:
+            self.extend(records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, record: Dict) -> None:
+        with self._lock:
+            self._assign_ids([record], len(self.records))
+            self.records.append(record)
+
+    def extend(self, records: List[Dict]) -> None:
+        with self._lock:
+            self._assign_ids(records, len(self.records))
+            self.records.extend(records)
+
+    def position_of(self, result_id) -> Optional[int]:
+        return self._positions_by_id.get(str(result_id))
+
+    def get(self, result_id) -> Optional[Dict]:
+        """The record with this id, or None"""
+        position = self.position_of(result_id)
+        return self.records[position] if position is not None else None
+
+    def get_many(self, result_ids: List) -> List[Optional[Dict]]:
+        """Records for each id, in the order asked (None where an id is unknown)"""
+        positions = [self.position_of(result_id) for result_id in result_ids]
+        found = iter(self.records.take([p for p in positions if p is not None]))
+        return [next(found) if p is not None else None for p in positions]
+
+    def positions(self, filters: Dict) -> Optional[np.ndarray]:
+        """Sorted positions of the records equal to every given filter value (None when there are no filters)"""
+        filters = {k: v for k, v in filters.items() if k in INDEXED_FIELDS and v is not None}
+        if not filters:
+            return None
+        with self._lock:
+            self._catch_up()
+            arrays = [self._postings[field].get(value, _EMPTY) for field, value in filters.items()]
+        # Smallest first, so each intersection works on as few positions as possible
+        arrays.sort(key=len)
+        result = arrays[0]
+        for array in arrays[1:]:
+            if len(result) == 0:
+                break
+            # Both sorted: binary-search the smaller set in the larger
+            found = np.searchsorted(array, result)
+            found[found == len(array)] = 0
+            result = result[array[found] == result]
+        return result
+
+    def _catch_up(self) -> None:
+        """Add the rows appended since the last query to the postings, one grouping per field"""
+        total = len(self.records)
+        if self._indexed >= total:
+            return
+        start = self._indexed
+        for field in INDEXED_FIELDS:
+            values = self.records.column(field).iloc[start:].astype(object)
+            postings = self._postings[field]
+            for value, positions in values.groupby(values.fillna(_MISSING), sort=False).indices.items():
+                value = None if value == _MISSING else value
+                positions = positions.astype(np.int64) + start
+                postings[value] = np.concatenate([postings[value], positions]) if value in postings else positions
+        self._indexed = total
+
+    def _assign_ids(self, records: List[Dict], start: int) -> None:
+        """Give id-less records a new id and map every id to its position (the first record keeps a repeated id)"""
+        missing = [r for r in records if r.get('id') in (None, '')]
+        for record, new_id in zip(missing, new_ids(len(missing))):
+            record['id'] = new_id
+        for position, record in enumerate(records, start):
+            self._positions_by_id.setdefault(str(record['id']), position)
+
+
+# Stands in for missing values while grouping (groupby drops NaN keys)
+_MISSING = '\x00missing'
+_EMPTY = np.empty(0, dtype=np.int64)
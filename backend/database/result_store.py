@@ -0,0 +1,148 @@
+# database/result_store.py - Compliance results held column by column instead of as a list of dicts
+
+import threading
+import numpy as np
+import pandas as pd
+from collections.abc import Sequence
+from typing import Dict, List, Optional
+
+# Text columns with at most this share of distinct values are stored as categories
+CATEGORY_RATIO = 0.5
+# Rows materialized per block when the store is iterated as dicts
+ITER_BLOCK = 10_000
+
+
+class ResultStore(Sequence):
+    """Results as one frame of typed columns.
+
+    Numbers are nullable Float64/Int64 arrays and text is categorical or string,
+    so every column carries a validity mask and NaN/inf are masked out once, on
+    insert, for a whole batch. Single appends are buffered and folded into the
+    columns on the next read. Records come out as plain, JSON-safe dicts (masked
+    values as None) one at a time (``record``) or a page at a time (``take``), and
+    indexing and iterating yield the same dicts for callers that expect the old list.
+    """
+
+    def __init__(self, records: Optional[List[Dict]] = None):
+        self._lock = threading.Lock()
+        self._frame = pd.DataFrame()
+        self._pending: List[Dict] = []
+        if records:
+            self.extend(records)
+
+    # ---- writes ----
+
+    def append(self, record: Dict) -> None:
+        with self._lock:
+            self._pending.append(record)
+
+    def extend(self, records: List[Dict]) -> None:
+        with self._lock:
+            self._pending.extend(records)
+            self._fold()
+
+    # ---- reads ----
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The columns, with any buffered appends folded in"""
+        with self._lock:
+            if self._pending:
+                self._fold()
+            return self._frame
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._frame) + len(self._pending)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return _records(self.frame.iloc[item])
+        return self.record(item)
+
+    def __iter__(self):
+        frame = self.frame
+        for start in range(0, len(frame), ITER_BLOCK):
+            yield from _records(frame.iloc[start:start + ITER_BLOCK])
+
+    def column(self, name: str, positions: Optional[np.ndarray] = None) -> pd.Series:
+        """One column (all missing if no result has the field), optionally only at ``positions``"""
+        frame = self.frame
+        values = frame[name] if name in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+        return values if positions is None else values.iloc[positions]
+
+    def value_counts(self, name: str, missing='Unknown') -> Dict:
+        """Number of records per value of a column (``missing`` for records without one)"""
+        values = self.column(name).astype(object)
+        return values.where(values.notna(), missing).value_counts(sort=False).to_dict()
+
+    def record(self, position: int) -> Dict:
+        """The record at ``position`` as a plain dict (masked values as None)"""
+        position = range(len(self))[position]
+        return _records(self.frame.iloc[[position]])[0]
+
+    def take(self, positions) -> List[Dict]:
+        """Records at ``positions``, in that order, as plain dicts"""
+        return _records(self.frame.iloc[positions])
+
+    # ---- internals ----
+
+    def _fold(self) -> None:
+        batch = _columns(self._pending)
+        self._pending = []
+        if self._frame.empty and not len(self._frame.columns):
+            self._frame = batch
+            return
+        frame = pd.concat([self._frame, batch], ignore_index=True)
+        # Columns whose types did not line up (e.g. categories with new values) are typed again
+        for name in frame.columns:
+            dtypes = {part[name].dtype for part in (self._frame, batch) if name in part.columns}
+            if dtypes != {frame[name].dtype}:
+                frame[name] = _typed(frame[name].astype(object))
+        self._frame = frame
+
+
+def _columns(records: List[Dict]) -> pd.DataFrame:
+    """Typed, masked columns for a batch of records (NaN/inf cleaned in one pass per column)"""
+    frame = pd.DataFrame.from_records(records) if records else pd.DataFrame()
+    return pd.DataFrame({name: _typed(frame[name]) for name in frame.columns}, index=pd.RangeIndex(len(frame)))
+
+def _typed(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(values):
+        return values.astype('boolean')
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype('Int64')
+    if pd.api.types.is_float_dtype(values):
+        return _floats(values)
+
+    # What the present values are, decided in one C pass
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == 'empty':
+        return values.astype(object).where(values.notna(), None)
+    if kind == 'boolean':
+        return values.astype('boolean')
+    if kind == 'integer':
+        return pd.to_numeric(values).astype('Int64')
+    if kind in ('floating', 'mixed-integer-float', 'decimal'):
+        return _floats(pd.to_numeric(values, errors='coerce'))
+    if kind == 'string':
+        if values.nunique() <= max(1, len(values) * CATEGORY_RATIO):
+            return values.astype('category')
+        return values.astype('string')
+    # Mixed values, lists, dicts: kept as they are
+    return values.astype(object).where(values.notna(), None)
+
+def _floats(values: pd.Series) -> pd.Series:
+    # inf/-inf are masked along with NaN
+    floats = values.astype('float64')
+    return floats.where(np.isfinite(floats.to_numpy())).astype('Float64')
+
+def _records(frame: pd.DataFrame) -> List[Dict]:
+    """Rows as plain dicts (masked values as None)"""
+    if frame.empty:
+        return []
+    columns = {}
+    for name in frame.columns:
+        values = frame[name].astype(object)
+        columns[name] = values.where(frame[name].notna(), None)
+    return pd.DataFrame(columns, index=frame.index).to_dict('records')
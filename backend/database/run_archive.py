@@ -0,0 +1,261 @@
+# database/run_archive.py - Parquet archive of every run's obligations, partitioned by run date and framework
+
+import os
+import json
+import glob
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from datetime import datetime
+from typing import Dict, List, Optional
+
+ARCHIVE_FOLDER = './data/archive'
+MANIFEST_FILE = 'runs.json'
+
+# Rows per Parquet row group; each group carries min/max statistics that filters are checked against
+ROW_GROUP_ROWS = 64 * 1024
+
+# Partition keys, as directories: run_date=YYYY-MM-DD/framework=<name>/
+PARTITION_FIELDS = ['run_date', 'framework']
+PARTITIONING = ds.partitioning(pa.schema([('run_date', pa.string()), ('framework', pa.string())]), flavor='hive')
+
+# Archived obligation fields (other report fields stay with the live results only)
+ARCHIVE_SCHEMA = pa.schema([
+    ('run_id', pa.string()),
+    ('id', pa.string()),
+    ('obligationId', pa.string()),
+    ('status', pa.string()),
+    ('severity', pa.string()),
+    ('action', pa.string()),
+    ('reason', pa.string()),
+    ('category', pa.string()),
+    ('rule_id', pa.string()),
+    ('description', pa.string()),
+    ('confidence_score', pa.float64()),
+    ('file_id', pa.string()),
+    ('event_time', pa.string()),
+    ('created_at', pa.string()),
+    ('run_date', pa.string()),
+    ('framework', pa.string())
+])
+
+# Equality filters accepted by query()/trend()
+FILTER_FIELDS = ['run_id', 'framework', 'status', 'severity', 'action', 'obligationId', 'rule_id', 'file_id']
+
+
+class RunArchive:
+    """Append-only history of runs.
+
+    Each run is written once as Parquet files under its run date / framework
+    partitions, sorted so that row groups hold narrow status/severity/action
+    ranges. The manifest lists every run with its date and files, so a query
+    opens only the files of runs in its date range, and the remaining filters
+    are evaluated by Arrow against partition values and row-group statistics.
+    """
+
+    def __init__(self, folder: str = ARCHIVE_FOLDER):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_FILE)
+        self._lock = threading.Lock()
+
+    # ---- writes ----
+
+    def archive_run(self, run_id: str, obligations: List[Dict], mode: Optional[str] = None,
+                    run_time: Optional[datetime] = None) -> Dict:
+        """Write a run's obligations and record it in the manifest; returns the manifest entry"""
+        run_time = run_time or datetime.utcnow()
+        table = self._table(run_id, obligations, run_time.date().isoformat())
+
+        with self._lock:
+            manifest = self._read_manifest()
+            previous = manifest['runs'].pop(run_id, None)
+
+            prefix = f'run-{run_id}-'
+            written = []
+            if table.num_rows:
+                ds.write_dataset(
+                    table, self.folder, format='parquet', partitioning=PARTITIONING,
+                    basename_template=prefix + '{i}.parquet', existing_data_behavior='overwrite_or_ignore',
+                    max_rows_per_group=ROW_GROUP_ROWS, min_rows_per_group=min(ROW_GROUP_ROWS, table.num_rows),
+                    file_visitor=lambda f: written.append(os.path.relpath(f.path, self.folder))
+                )
+
+            entry = {
+                'run_id': run_id,
+                'run_date': run_time.date().isoformat(),
+                'archived_at': run_time.isoformat(),
+                'mode': mode,
+                'obligations': table.num_rows,
+                'frameworks': sorted(set(table.column('framework').to_pylist())),
+                'by_status': _counts(table, 'status'),
+                'files': sorted(written)
+            }
+            manifest['runs'][run_id] = entry
+            self._write_manifest(manifest)
+
+            # A re-archived run (e.g. resumed under the same run_id) replaces its old files
+            for path in set((previous or {}).get('files', [])) - set(written):
+                try:
+                    os.remove(os.path.join(self.folder, path))
+                except OSError:
+                    pass
+
+        print(f"🗄️ Archived run {run_id}: {table.num_rows} obligations in {len(written)} files")
+        return entry
+
+    # ---- reads ----
+
+    def runs(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+        """Manifest entries of runs dated within [start_date, end_date], oldest first"""
+        runs = self._read_manifest()['runs'].values()
+        selected = [
+            r for r in runs
+            if (start_date is None or r['run_date'] >= start_date) and (end_date is None or r['run_date'] <= end_date)
+        ]
+        return sorted(selected, key=lambda r: (r['run_date'], r['archived_at']))
+
+    def query(self, filters: Optional[Dict] = None, start_date: Optional[str] = None, end_date: Optional[str] = None,
+              columns: Optional[List[str]] = None, limit: int = 100, offset: int = 0) -> Dict:
+        """Archived obligations matching equality ``filters`` and the run date range"""
+        dataset = self._dataset(filters, start_date, end_date)
+        if dataset is None:
+            return {'results': [], 'total': 0}
+        expression = _expression(filters, start_date, end_date)
+        columns = [c for c in columns if c in ARCHIVE_SCHEMA.names] if columns else ARCHIVE_SCHEMA.names
+
+        # Count first (row-group statistics skip non-matching groups), then read just the page
+        total = dataset.count_rows(filter=expression)
+        page = dataset.scanner(filter=expression, columns=columns)
+        table = _slice(page, offset, limit)
+        return {'results': _records(table), 'total': total}
+
+    def trend(self, group_by: List[str], filters: Optional[Dict] = None, start_date: Optional[str] = None,
+              end_date: Optional[str] = None) -> List[Dict]:
+        """Obligation counts and mean confidence per ``group_by`` combination (e.g. run_date x status)"""
+        group_by = [g for g in group_by if g in ARCHIVE_SCHEMA.names] or ['run_date']
+        dataset = self._dataset(filters, start_date, end_date)
+        if dataset is None:
+            return []
+        table = dataset.to_table(filter=_expression(filters, start_date, end_date),
+                                 columns=list(dict.fromkeys(group_by + ['confidence_score'])))
+        if table.num_rows == 0:
+            return []
+        grouped = table.group_by(group_by).aggregate([([], 'count_all'), ('confidence_score', 'mean')])
+        names = {'count_all': 'count', 'confidence_score_mean': 'avg_confidence'}
+        grouped = grouped.rename_columns([names.get(n, n) for n in grouped.column_names])
+        return sorted(_records(grouped), key=lambda r: tuple(str(r[g]) for g in group_by))
+
+    def clear(self) -> None:
+        """Delete the whole archive"""
+        with self._lock:
+            for path in glob.glob(os.path.join(self.folder, '**', '*.parquet'), recursive=True):
+                os.remove(path)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    # ---- internals ----
+
+    def _dataset(self, filters: Optional[Dict], start_date: Optional[str], end_date: Optional[str]) -> Optional[ds.Dataset]:
+        """Dataset over only the files of runs that can match (by date, run_id and framework)"""
+        run_id = (filters or {}).get('run_id')
+        framework = (filters or {}).get('framework')
+        paths = []
+        for run in self.runs(start_date, end_date):
+            if run_id is not None and run['run_id'] != run_id:
+                continue
+            if framework is not None and framework not in run['frameworks']:
+                continue
+            paths.extend(os.path.join(self.folder, f) for f in run['files'])
+        if not paths:
+            return None
+        return ds.dataset(paths, schema=ARCHIVE_SCHEMA, format='parquet',
+                          partitioning=PARTITIONING, partition_base_dir=self.folder)
+
+    def _table(self, run_id: str, obligations: List[Dict], run_date: str) -> pa.Table:
+        df = pd.DataFrame(obligations, columns=[c for c in ARCHIVE_SCHEMA.names if c not in ('run_id', 'run_date')])
+        df['confidence_score'] = pd.to_numeric(df['confidence_score'], errors='coerce')
+        for name in ARCHIVE_SCHEMA.names:
+            if name not in ('confidence_score', 'run_id', 'run_date'):
+                df[name] = df[name].astype(object).where(df[name].notna(), None).map(
+                    lambda v: None if v is None else str(v))
+        # Results without a framework go to one named partition rather than Hive's null directory
+        df['framework'] = df['framework'].fillna('Unknown')
+        df['run_id'] = run_id
+        df['run_date'] = run_date
+        # Clustered rows give each row group tight min/max ranges on the common filters
+        df = df.sort_values(['framework', 'status', 'severity', 'action'], na_position='last', kind='stable')
+        return pa.Table.from_pandas(df[ARCHIVE_SCHEMA.names], schema=ARCHIVE_SCHEMA, preserve_index=False)
+
+    def _read_manifest(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {'runs': {}}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read run manifest: {str(e)}")
+            return {'runs': {}}
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.path)
+
+
+def _expression(filters: Optional[Dict], start_date: Optional[str], end_date: Optional[str]):
+    """Arrow filter: partition fields prune directories, the rest is checked against row-group statistics"""
+    expression = None
+    clauses = [ds.field(k) == str(v) for k, v in (filters or {}).items() if k in FILTER_FIELDS and v is not None]
+    if start_date:
+        clauses.append(ds.field('run_date') >= start_date)
+    if end_date:
+        clauses.append(ds.field('run_date') <= end_date)
+    for clause in clauses:
+        expression = clause if expression is None else expression & clause
+    return expression
+
+def _slice(scanner: ds.Scanner, offset: int, limit: int) -> pa.Table:
+    """Rows [offset, offset + limit) of a scan, reading batches only until the page is full"""
+    batches, skipped, kept = [], 0, 0
+    for batch in scanner.to_batches():
+        if kept >= limit:
+            break
+        if skipped + batch.num_rows <= offset:
+            skipped += batch.num_rows
+            continue
+        start = max(0, offset - skipped)
+        skipped += start
+        batch = batch.slice(start, limit - kept)
+        batches.append(batch)
+        kept += batch.num_rows
+    return pa.Table.from_batches(batches, schema=scanner.projected_schema)
+
+def _counts(table: pa.Table, column: str) -> Dict[str, int]:
+    if table.num_rows == 0:
+        return {}
+    counts = pc.value_counts(pc.fill_null(table.column(column), 'Unknown'))
+    return {v['values'].as_py(): v['counts'].as_py() for v in counts}
+
+def _records(table: pa.Table) -> List[Dict]:
+    records = table.to_pylist()
+    for record in records:
+        for key, value in record.items():
+            if isinstance(value, float) and value != value:
+                record[key] = None
+    return records
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+def get_run_archive() -> RunArchive:
+    """The shared run archive"""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = RunArchive()
+        return _archive
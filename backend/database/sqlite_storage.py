@@ -0,0 +1,429 @@
+# database/sqlite_storage.py - SQLite (WAL) storage with the same functions as csv_storage
+
+import os
+import json
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from datetime import datetime
+
+from database.aggregates import COUNTED_FIELDS, ResultAggregates, metrics_from_snapshot
+from database.storage_common import (
+    COMPLIANCE_RESULTS_FILE, LOGS_FILE, KB_CACHE_FILE,
+    RESULT_COLUMNS, LOG_COLUMNS, LOG_RETENTION, LOG_SEGMENT_ROWS, new_ids, clean_records, log_segments
+)
+
+DB_FILE = './data/processed/compliance.db'
+
+# Result fields outside RESULT_COLUMNS (file_id, event_time, ...) are kept as JSON in `extra`
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS compliance_results (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE NOT NULL,
+    framework TEXT, obligationId TEXT, description TEXT, status TEXT,
+    confidence_score REAL, category TEXT, severity TEXT, action TEXT, reason TEXT,
+    rule_id TEXT, created_at TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_framework ON compliance_results(framework);
+CREATE INDEX IF NOT EXISTS idx_results_status ON compliance_results(status);
+CREATE INDEX IF NOT EXISTS idx_results_severity ON compliance_results(severity);
+CREATE INDEX IF NOT EXISTS idx_results_action ON compliance_results(action);
+CREATE INDEX IF NOT EXISTS idx_results_created_at ON compliance_results(created_at);
+
+CREATE TABLE IF NOT EXISTS execution_logs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL,
+    timestamp TEXT, stage TEXT, message TEXT, type TEXT, process TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON execution_logs(timestamp);
+
+CREATE TABLE IF NOT EXISTS kb_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at TEXT
+);
+'''
+
+# Pipeline records can carry numpy scalars
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+sqlite3.register_adapter(np.float32, float)
+sqlite3.register_adapter(np.bool_, bool)
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+# Dashboard counts, advanced by each insert made here and keyed by the table's seq range
+_aggregates = ResultAggregates()
+
+def _connect() -> sqlite3.Connection:
+    """Per-thread connection (created on first use, with the schema in place)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and getattr(_local, 'path', None) == DB_FILE:
+        return conn
+
+    with _init_lock:
+        created = not os.path.exists(DB_FILE)
+        os.makedirs(os.path.dirname(DB_FILE) or '.', exist_ok=True)
+        conn = sqlite3.connect(DB_FILE, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL: readers never block the writer (and the other way round)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        if DB_FILE not in _initialized:
+            conn.executescript(SCHEMA)
+            _initialized.add(DB_FILE)
+        _local.conn, _local.path = conn, DB_FILE
+
+    if created:
+        # A fresh database starts out with whatever the CSV backend had stored
+        migrate_from_csv()
+    return conn
+
+def _where(filters: Optional[Dict], fields: List[str], extra: bool) -> tuple:
+    """WHERE clause and parameters for equality filters (unknown keys are ignored, as in CSV storage)"""
+    clauses, params = [], []
+    for key, value in (filters or {}).items():
+        if key in fields:
+            clauses.append(f'"{key}" = ?')
+        elif extra:
+            clauses.append('json_extract(extra, ?) = ?')
+            params.append(f'$."{key}"')
+        else:
+            continue
+        params.append(value)
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+# ============================================
+# COMPLIANCE RESULTS OPERATIONS
+# ============================================
+
+def _result_row(data: Dict) -> tuple:
+    extra = {k: v for k, v in data.items() if k not in RESULT_COLUMNS and v is not None}
+    values = [data.get(c) for c in RESULT_COLUMNS]
+    return tuple(values) + (json.dumps(extra, default=_json_default) if extra else None,)
+
+def _json_default(value):
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+def save_compliance_result(data: Dict) -> Dict:
+    """Save compliance result to SQLite"""
+    try:
+        conn = _connect()
+
+        # Add ID and timestamp
+        data['id'] = new_ids(1)[0]
+        data['created_at'] = datetime.utcnow().isoformat()
+        for col in RESULT_COLUMNS:
+            if col not in data:
+                data[col] = None
+
+        _insert_results(conn, [data])
+        return data
+    except Exception as e:
+        print(f"Error saving compliance result: {str(e)}")
+        return {}
+
+def save_compliance_results(records: List[Dict], replace: bool = False) -> List[Dict]:
+    """Save a batch of compliance results in one transaction (``replace``: deleting every stored result first)"""
+    try:
+        conn = _connect()
+        if not records and not replace:
+            return []
+
+        df = clean_records(records) if records else pd.DataFrame(columns=RESULT_COLUMNS)
+        df['id'] = new_ids(len(df))
+        df['created_at'] = datetime.utcnow().isoformat()
+        for col in RESULT_COLUMNS:
+            if col not in df.columns:
+                df[col] = None
+
+        saved = df.to_dict('records')
+        _insert_results(conn, saved, df, replace=replace)
+        return saved
+    except Exception as e:
+        print(f"Error saving compliance results: {str(e)}")
+        return []
+
+def _insert_results(conn: sqlite3.Connection, records: List[Dict], df: Optional[pd.DataFrame] = None,
+                    replace: bool = False) -> None:
+    """Insert results in one write transaction and count them into the dashboard aggregates"""
+    placeholders = ', '.join('?' * (len(RESULT_COLUMNS) + 1))
+    with conn:
+        # IMMEDIATE: the delete, the insert and the stamps around them land as one write,
+        # with no other writer in between
+        conn.execute('BEGIN IMMEDIATE')
+        before = _results_stamp(conn)
+        if replace:
+            conn.execute('DELETE FROM compliance_results')
+        conn.executemany(
+            f'INSERT INTO compliance_results ({", ".join(RESULT_COLUMNS)}, extra) VALUES ({placeholders})',
+            [_result_row(record) for record in records]
+        )
+        after = _results_stamp(conn)
+    df = df if df is not None else pd.DataFrame(records)
+    if replace:
+        _aggregates.replace(df, after)
+    else:
+        _aggregates.add(df, before, after)
+
+def _results_stamp(conn: sqlite3.Connection) -> tuple:
+    # seq only grows, so the range changes with every insert and delete at either end (an index lookup)
+    return tuple(conn.execute('SELECT MIN(seq), MAX(seq) FROM compliance_results').fetchone())
+
+def get_compliance_results(filters: Optional[Dict] = None, limit: int = 100, offset: int = 0) -> List[Dict]:
+    """Get compliance results with filters and pagination evaluated in SQLite"""
+    try:
+        conn = _connect()
+        where, params = _where(filters, RESULT_COLUMNS, extra=True)
+        rows = conn.execute(
+            f'SELECT {", ".join(RESULT_COLUMNS)}, extra FROM compliance_results{where} '
+            'ORDER BY created_at DESC, seq DESC LIMIT ? OFFSET ?',
+            params + [int(limit), int(offset)]
+        ).fetchall()
+
+        results = []
+        for row in rows:
+            record = {c: row[c] for c in RESULT_COLUMNS}
+            if row['extra']:
+                record.update(json.loads(row['extra']))
+            results.append(record)
+        return results
+    except Exception as e:
+        print(f"Error getting compliance results: {str(e)}")
+        return []
+
+def clear_all_compliance_results() -> bool:
+    """Clear all compliance results"""
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute('DELETE FROM compliance_results')
+        _aggregates.reset(_results_stamp(conn))
+        return True
+    except Exception as e:
+        print(f"Error clearing compliance results: {str(e)}")
+        return False
+
+# ============================================
+# EXECUTION LOGS OPERATIONS
+# ============================================
+
+def save_log(stage: str, message: str, log_type: str = 'info', process: str = 'system', wait: bool = False) -> Dict:
+    """Save execution log to SQLite (keeping about the last LOG_RETENTION rows; always committed on return)"""
+    try:
+        conn = _connect()
+
+        log_entry = {
+            'id': new_ids(1)[0],
+            'timestamp': datetime.utcnow().isoformat(),
+            'stage': stage,
+            'message': message,
+            'type': log_type,
+            'process': process
+        }
+
+        with conn:
+            cursor = conn.execute(
+                f'INSERT INTO execution_logs ({", ".join(LOG_COLUMNS)}) VALUES ({", ".join("?" * len(LOG_COLUMNS))})',
+                tuple(log_entry[c] for c in LOG_COLUMNS)
+            )
+            # Trim in steps rather than on every insert
+            if cursor.lastrowid % LOG_SEGMENT_ROWS == 0:
+                conn.execute('DELETE FROM execution_logs WHERE seq <= ?', (cursor.lastrowid - LOG_RETENTION,))
+
+        return log_entry
+    except Exception as e:
+        print(f"Error saving log: {str(e)}")
+        return {}
+
+def get_logs(limit: int = 100, filters: Optional[Dict] = None) -> List[Dict]:
+    """Get execution logs from SQLite"""
+    try:
+        conn = _connect()
+        where, params = _where(filters, LOG_COLUMNS, extra=False)
+        rows = conn.execute(
+            f'SELECT {", ".join(LOG_COLUMNS)} FROM execution_logs{where} ORDER BY timestamp DESC, seq DESC LIMIT ?',
+            params + [int(limit)]
+        ).fetchall()
+        return [dict(row) for row in rows]
+    except Exception as e:
+        print(f"Error getting logs: {str(e)}")
+        return []
+
+def clear_all_logs() -> bool:
+    """Clear all execution logs"""
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute('DELETE FROM execution_logs')
+        return True
+    except Exception as e:
+        print(f"Error clearing logs: {str(e)}")
+        return False
+
+# ============================================
+# KNOWLEDGE BASE CACHE OPERATIONS
+# ============================================
+
+def get_kb_entry(key: str) -> Optional[Dict]:
+    """Get knowledge base entry (primary key lookup)"""
+    try:
+        row = _connect().execute('SELECT value FROM kb_cache WHERE key = ?', (key,)).fetchone()
+        return json.loads(row['value']) if row else None
+    except Exception as e:
+        print(f"Error getting KB entry: {str(e)}")
+        return None
+
+def save_kb_entry(key: str, value: Dict, wait: bool = False) -> Dict:
+    """Save knowledge base entry (upsert; always committed on return)"""
+    try:
+        conn = _connect()
+        entry = {
+            'key': key,
+            'value': json.dumps(value),
+            'created_at': datetime.utcnow().isoformat()
+        }
+        with conn:
+            conn.execute(
+                'INSERT INTO kb_cache (key, value, created_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value, created_at = excluded.created_at',
+                (entry['key'], entry['value'], entry['created_at'])
+            )
+        return entry
+    except Exception as e:
+        print(f"Error saving KB entry: {str(e)}")
+        return {}
+
+def get_all_kb_entries() -> List[Dict]:
+    """Get all knowledge base entries"""
+    try:
+        rows = _connect().execute('SELECT key, value, created_at FROM kb_cache ORDER BY created_at').fetchall()
+        return [{'key': r['key'], 'value': json.loads(r['value']), 'created_at': r['created_at']} for r in rows]
+    except Exception as e:
+        print(f"Error getting all KB entries: {str(e)}")
+        return []
+
+def clear_kb_cache() -> bool:
+    """Clear all knowledge base cache"""
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute('DELETE FROM kb_cache')
+        return True
+    except Exception as e:
+        print(f"Error clearing KB cache: {str(e)}")
+        return False
+
+def get_kb_stats() -> Dict:
+    """Get statistics about the knowledge base cache"""
+    try:
+        rows = _connect().execute(
+            "SELECT COALESCE(json_extract(value, '$.compliance_framework'), 'Unknown') AS fw, COUNT(*) AS n "
+            'FROM kb_cache GROUP BY fw'
+        ).fetchall()
+        by_framework = {r['fw']: r['n'] for r in rows}
+        return {
+            'total_entries': sum(by_framework.values()),
+            'by_framework': by_framework,
+            'cache_enabled': True
+        }
+    except Exception as e:
+        print(f"Error getting KB stats: {str(e)}")
+        return {'total_entries': 0, 'by_framework': {}, 'cache_enabled': False}
+
+# ============================================
+# DASHBOARD METRICS (AGGREGATED)
+# ============================================
+
+def get_dashboard_metrics() -> Dict:
+    """Get aggregated metrics for dashboard (maintained as results are inserted, over all results)"""
+    try:
+        conn = _connect()
+        columns = ', '.join(list(COUNTED_FIELDS) + ['confidence_score', 'obligationId'])
+        aggregates = _aggregates.current(
+            _results_stamp(conn),
+            lambda: pd.read_sql_query(f'SELECT {columns} FROM compliance_results', conn)
+        )
+        return metrics_from_snapshot(aggregates.snapshot())
+    except Exception as e:
+        print(f"Error getting dashboard metrics: {str(e)}")
+        return {
+            'total_processed': 0,
+            'compliant': 0,
+            'non_compliant': 0,
+            'requires_action': 0,
+            'avg_confidence': 0,
+            'high_severity': 0
+        }
+
+# ============================================
+# HEALTH CHECK
+# ============================================
+
+def check_storage_health() -> bool:
+    """Check if the SQLite database is accessible"""
+    try:
+        _connect().execute('SELECT 1').fetchone()
+        return True
+    except Exception as e:
+        print(f"Storage health check failed: {str(e)}")
+        return False
+
+# ============================================
+# MIGRATION FROM CSV STORAGE
+# ============================================
+
+def migrate_from_csv() -> Dict[str, int]:
+    """Copy results, logs and KB entries from the CSV files (rows already present are skipped)"""
+    conn = _connect()
+    counts = {'compliance_results': 0, 'execution_logs': 0, 'kb_cache': 0}
+
+    def read(path):
+        try:
+            df = pd.read_csv(path, dtype={'id': str}) if os.path.exists(path) else pd.DataFrame()
+        except Exception as e:
+            print(f"Warning: Could not read {path}: {str(e)}")
+            return []
+        return df.astype(object).where(df.notna(), None).to_dict('records')
+
+    with conn:
+        for record in read(COMPLIANCE_RESULTS_FILE):
+            if record.get('id') is None:
+                continue
+            cursor = conn.execute(
+                f'INSERT OR IGNORE INTO compliance_results ({", ".join(RESULT_COLUMNS)}, extra) '
+                f'VALUES ({", ".join("?" * (len(RESULT_COLUMNS) + 1))})',
+                _result_row(record)
+            )
+            counts['compliance_results'] += cursor.rowcount
+
+        # Oldest segment first, so log order is kept
+        if not conn.execute('SELECT 1 FROM execution_logs LIMIT 1').fetchone():
+            for path in [p for _, p in log_segments()] + [LOGS_FILE]:
+                for record in read(path):
+                    conn.execute(
+                        f'INSERT INTO execution_logs ({", ".join(LOG_COLUMNS)}) VALUES ({", ".join("?" * len(LOG_COLUMNS))})',
+                        tuple(record.get(c) for c in LOG_COLUMNS)
+                    )
+                    counts['execution_logs'] += 1
+
+        for record in read(KB_CACHE_FILE):
+            if record.get('key') is None or record.get('value') is None:
+                continue
+            cursor = conn.execute('INSERT OR IGNORE INTO kb_cache (key, value, created_at) VALUES (?, ?, ?)',
+                                  (record['key'], record['value'], record.get('created_at')))
+            counts['kb_cache'] += cursor.rowcount
+
+    if any(counts.values()):
+        print(f"📦 Migrated CSV storage into {DB_FILE}: {counts}")
+    return counts
+
+
+if __name__ == '__main__':
+    # python -m database.sqlite_storage  (run from backend/) copies the CSV data in
+    print(migrate_from_csv())
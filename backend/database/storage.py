@@ -0,0 +1,26 @@
+# database/storage.py - The storage backend selected in config.py (CSV files or SQLite)
+
+from config import Config
+
+if Config.STORAGE_BACKEND == 'sqlite':
+    from database import sqlite_storage as backend
+    backend.DB_FILE = Config.SQLITE_DB_FILE
+else:
+    from database import csv_storage as backend
+
+BACKEND = Config.STORAGE_BACKEND
+
+save_compliance_result = backend.save_compliance_result
+save_compliance_results = backend.save_compliance_results
+get_compliance_results = backend.get_compliance_results
+clear_all_compliance_results = backend.clear_all_compliance_results
+save_log = backend.save_log
+get_logs = backend.get_logs
+clear_all_logs = backend.clear_all_logs
+get_kb_entry = backend.get_kb_entry
+save_kb_entry = backend.save_kb_entry
+get_all_kb_entries = backend.get_all_kb_entries
+clear_kb_cache = backend.clear_kb_cache
+get_kb_stats = backend.get_kb_stats
+get_dashboard_metrics = backend.get_dashboard_metrics
+check_storage_health = backend.check_storage_health
@@ -0,0 +1,55 @@
+# database/storage_common.py - File paths, columns and id generation shared by the storage backends
+
+import os
+import re
+import glob
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+from datetime import datetime
+
+# Storage file paths
+COMPLIANCE_RESULTS_FILE = './data/processed/compliance_results.csv'
+LOGS_FILE = './data/processed/execution_logs.csv'
+KB_CACHE_FILE = './data/kb_cache/knowledge_base.csv'
+
+RESULT_COLUMNS = [
+    'id', 'framework', 'obligationId', 'description', 'status',
+    'confidence_score', 'category', 'severity', 'action', 'reason',
+    'rule_id', 'created_at'
+]
+LOG_COLUMNS = ['id', 'timestamp', 'stage', 'message', 'type', 'process']
+KB_COLUMNS = ['key', 'value', 'created_at']
+
+# Log retention: every LOG_SEGMENT_ROWS rows the live log file is sealed into a numbered
+# segment (execution_logs.<n>.csv), and only the newest LOG_RETENTION rows' segments are kept
+LOG_SEGMENT_ROWS = 250
+LOG_RETENTION = 1000
+
+_id_lock = threading.Lock()
+_last_id = [0]
+
+def new_ids(count: int) -> List[str]:
+    """Timestamp ids (YYYYmmddHHMMSSffffff), consecutive within a batch and never repeated by this process"""
+    with _id_lock:
+        start = max(int(datetime.utcnow().strftime('%Y%m%d%H%M%S%f')), _last_id[0] + 1)
+        _last_id[0] = start + count - 1
+    return [str(start + i) for i in range(count)]
+
+def clean_records(records: List[Dict]) -> pd.DataFrame:
+    """Records as an object frame with NaN/inf turned into None in one pass"""
+    df = pd.DataFrame.from_records(records)
+    df = df.replace([np.inf, -np.inf], np.nan)
+    return df.astype(object).where(df.notna(), None)
+
+def log_segments() -> List[tuple]:
+    """Sealed log segments as (number, path), oldest first"""
+    base, ext = os.path.splitext(LOGS_FILE)
+    pattern = re.compile(re.escape(os.path.basename(base)) + r'\.(\d+)' + re.escape(ext) + '$')
+    numbered = []
+    for path in glob.glob(f'{base}.*{ext}'):
+        match = pattern.search(os.path.basename(path))
+        if match:
+            numbered.append((int(match.group(1)), path))
+    return sorted(numbered)
@@ -0,0 +1,179 @@
+# database/time_index.py - Epoch column and hourly/daily buckets over an upload's incident timestamps
+
+import io
+import json
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+from database.upload_store import SidecarCache, iter_upload_batches, replacing
+
+TIMESTAMP_COLUMN = 'timestamp'
+# Per-bucket counts are kept for these upload columns
+COUNT_COLUMNS = ['severity', 'status']
+GRANULARITIES = {'hour': 3600, 'day': 86400}
+TIME_INDEX_SUFFIX = '.time.npz'
+
+# Epoch of a timestamp that could not be parsed
+NO_TIME = np.iinfo(np.int64).min
+
+
+class TimeIndex:
+    """Epoch seconds per row, the rows in time order, and per-bucket offsets and counts"""
+
+    def __init__(self, epochs: np.ndarray, order: np.ndarray, labels: Dict[str, np.ndarray],
+                 buckets: Dict[str, Dict[str, np.ndarray]]):
+        self.epochs = epochs            # row id -> epoch seconds (NO_TIME if unparsed)
+        self.order = order              # row ids of parsed rows, ascending by time
+        self.sorted_epochs = epochs[order]
+        self.labels = labels            # count column -> category labels
+        self.buckets = buckets          # granularity -> starts / offsets / <count column> matrices
+
+    @classmethod
+    def build(cls, filepath: str) -> 'TimeIndex':
+        """Parse timestamps once (streaming) and bucket the rows by hour and day"""
+        start_time = time.time()
+        epochs, codes = [], {column: [] for column in COUNT_COLUMNS}
+        labels = {column: {} for column in COUNT_COLUMNS}
+
+        for batch in iter_upload_batches(filepath, columns=[TIMESTAMP_COLUMN] + COUNT_COLUMNS):
+            frame = batch.to_pandas()
+            if TIMESTAMP_COLUMN in frame.columns:
+                epochs.append(parse_epochs(frame[TIMESTAMP_COLUMN]))
+            else:
+                epochs.append(np.full(len(frame), NO_TIME, dtype=np.int64))
+            for column in COUNT_COLUMNS:
+                values = frame[column] if column in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+                local_codes, uniques = pd.factorize(values, use_na_sentinel=False)
+                # Map per-batch codes onto codes shared by all batches
+                shared = np.array([labels[column].setdefault(_label(v), len(labels[column])) for v in uniques], dtype=np.int32)
+                codes[column].append(shared[local_codes] if len(shared) else np.empty(0, dtype=np.int32))
+
+        epochs = np.concatenate(epochs) if epochs else np.empty(0, dtype=np.int64)
+        valid = np.flatnonzero(epochs != NO_TIME)
+        order = valid[np.argsort(epochs[valid], kind='stable')]
+        row_dtype = np.int32 if len(epochs) < 2 ** 31 else np.int64
+        order = order.astype(row_dtype)
+
+        label_arrays = {c: np.array([str(v).encode('utf-8') for v in labels[c]], dtype=bytes) for c in COUNT_COLUMNS}
+        sorted_codes = {c: np.concatenate(codes[c])[order] if codes[c] else np.empty(0, dtype=np.int32) for c in COUNT_COLUMNS}
+        sorted_epochs = epochs[order]
+
+        buckets = {}
+        for granularity, size in GRANULARITIES.items():
+            keys = sorted_epochs // size
+            bucket_keys, offsets = np.unique(keys, return_index=True)
+            bucket_ids = np.repeat(np.arange(len(bucket_keys)), np.diff(np.append(offsets, len(keys))))
+            buckets[granularity] = {
+                'starts': bucket_keys * size,
+                'offsets': np.append(offsets, len(keys)).astype(np.int64)
+            }
+            for column in COUNT_COLUMNS:
+                n_labels = max(len(label_arrays[column]), 1)
+                flat = np.bincount(bucket_ids * n_labels + sorted_codes[column], minlength=len(bucket_keys) * n_labels)
+                buckets[granularity][column] = flat.reshape(len(bucket_keys), n_labels)
+
+        print(f"🕒 Built time index over {len(epochs)} rows in {time.time() - start_time:.2f}s")
+        return cls(epochs, order, label_arrays, buckets)
+
+    def rows_between(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Row ids with start <= epoch < end, in time order (binary search, then a slice)"""
+        low = 0 if start is None else int(np.searchsorted(self.sorted_epochs, start, side='left'))
+        high = len(self.order) if end is None else int(np.searchsorted(self.sorted_epochs, end, side='left'))
+        return self.order[low:max(low, high)]
+
+    def timeline(self, granularity: str = 'day', start: Optional[int] = None, end: Optional[int] = None) -> List[Dict]:
+        """Per-bucket counts (total and by severity/status) for buckets overlapping [start, end)"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f'granularity must be one of: {", ".join(GRANULARITIES)}')
+
+        size = GRANULARITIES[granularity]
+        buckets = self.buckets[granularity]
+        starts = buckets['starts']
+        low = 0 if start is None else int(np.searchsorted(starts, (start // size) * size, side='left'))
+        high = len(starts) if end is None else int(np.searchsorted(starts, end, side='left'))
+
+        labels = {c: [v.decode('utf-8') for v in self.labels[c]] for c in COUNT_COLUMNS}
+        timeline = []
+        for i in range(low, max(low, high)):
+            entry = {
+                'start': epoch_to_iso(int(starts[i])),
+                'count': int(buckets['offsets'][i + 1] - buckets['offsets'][i])
+            }
+            for column in COUNT_COLUMNS:
+                entry[column] = {label: int(n) for label, n in zip(labels[column], buckets[column][i]) if n}
+            timeline.append(entry)
+        return timeline
+
+    def time_range(self) -> Dict:
+        if len(self.sorted_epochs) == 0:
+            return {'min': None, 'max': None, 'unparsed': int(len(self.epochs))}
+        return {
+            'min': epoch_to_iso(int(self.sorted_epochs[0])),
+            'max': epoch_to_iso(int(self.sorted_epochs[-1])),
+            'unparsed': int(len(self.epochs) - len(self.order))
+        }
+
+    def save(self, path: str, stamp: Dict) -> None:
+        arrays = {
+            'meta': np.frombuffer(json.dumps({'source': stamp}).encode(), dtype=np.uint8),
+            'epochs': self.epochs,
+            'order': self.order
+        }
+        for column, values in self.labels.items():
+            arrays[f'labels.{column}'] = values
+        for granularity, parts in self.buckets.items():
+            for name, values in parts.items():
+                arrays[f'{granularity}.{name}'] = values
+
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        with replacing(path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.getvalue())
+
+    @classmethod
+    def load(cls, path: str) -> Tuple['TimeIndex', Dict]:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data['meta'].tobytes().decode())
+            labels = {c: data[f'labels.{c}'] for c in COUNT_COLUMNS}
+            buckets = {
+                granularity: {name: data[f'{granularity}.{name}'] for name in ['starts', 'offsets'] + COUNT_COLUMNS}
+                for granularity in GRANULARITIES
+            }
+            index = cls(data['epochs'], data['order'], labels, buckets)
+        return index, meta.get('source')
+
+
+def parse_epochs(values: pd.Series) -> np.ndarray:
+    """ISO timestamps -> epoch seconds (naive times are taken as UTC; NO_TIME if unparsable)"""
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601', utc=True)
+    epochs = parsed.dt.tz_localize(None).to_numpy(dtype='datetime64[s]').astype(np.int64)
+    epochs[parsed.isna().to_numpy()] = NO_TIME
+    return epochs
+
+def parse_time(value: Optional[str]) -> Optional[int]:
+    """A request's start/end (ISO timestamp or epoch seconds) -> epoch seconds"""
+    if value in (None, ''):
+        return None
+    if str(value).lstrip('-').isdigit():
+        return int(value)
+    epochs = parse_epochs(pd.Series([value]))
+    if epochs[0] == NO_TIME:
+        raise ValueError(f'Could not parse time: {value}')
+    return int(epochs[0])
+
+def epoch_to_iso(epoch: int) -> str:
+    return pd.Timestamp(epoch, unit='s').isoformat()
+
+def _label(value) -> str:
+    return 'unknown' if pd.isna(value) else str(value)
+
+
+_time_indexes = SidecarCache(TIME_INDEX_SUFFIX, TimeIndex.build, TimeIndex.load,
+                             lambda path, index, stamp: index.save(path, stamp))
+
+def get_time_index(filepath: str) -> TimeIndex:
+    """Time index of an upload: memory, then the sidecar, then built (and stored) on first use"""
+    return _time_indexes.get(filepath)
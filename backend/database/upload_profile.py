@@ -0,0 +1,142 @@
+# database/upload_profile.py - Column profile of an upload, built in one streaming pass and cached next to it
+
+import json
+import time
+import numpy as np
+import pandas as pd
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+from database.upload_store import SidecarCache, iter_upload_batches, replacing
+
+SCORE_COLUMNS = ['final_confidence_score', 'false_positive_likelihood', 'correlation_score']
+TOP_K_COLUMNS = ['severity', 'mitre_tactic', 'attack_stage']
+TIMESTAMP_COLUMN = 'timestamp'
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+TOP_K = 10
+
+# Quantiles are exact up to this many values per column, then estimated from a uniform sample of this size
+RESERVOIR_SIZE = 100_000
+
+PROFILE_SUFFIX = '.profile.json'
+
+def get_profile(filepath: str, refresh: bool = False) -> Dict:
+    """Profile of an upload: memory, then the sidecar, then one streaming pass (cached both ways)"""
+    return _profiles.get(filepath, refresh=refresh)
+
+def build_profile(filepath: str) -> Dict:
+    """Null counts, score distributions, top values and timestamp range in a single pass"""
+    start_time = time.time()
+    rows = 0
+    nulls: Counter = Counter()
+    scores = {column: _ScoreAccumulator() for column in SCORE_COLUMNS}
+    top_values = {column: Counter() for column in TOP_K_COLUMNS}
+    timestamps = {'min': None, 'max': None, 'unparsed': 0}
+    present = set()
+
+    for batch in iter_upload_batches(filepath):
+        rows += batch.num_rows
+        for name, column in zip(batch.schema.names, batch.columns):
+            present.add(name)
+            nulls[name] += column.null_count
+
+            if name in scores:
+                scores[name].add(column.to_numpy(zero_copy_only=False))
+            elif name in top_values:
+                counts = column.to_pandas().value_counts(dropna=True)
+                top_values[name].update(counts[counts > 0].to_dict())
+            elif name == TIMESTAMP_COLUMN:
+                _update_time_range(timestamps, column.to_pandas())
+
+    profile = {
+        'rows': rows,
+        'columns': {name: {'nulls': int(nulls[name])} for name in nulls},
+        'scores': {c: acc.summary() for c, acc in scores.items() if c in present},
+        'top_values': {
+            c: {
+                'distinct': len(counts),
+                'values': [{'value': str(v), 'count': int(n)} for v, n in counts.most_common(TOP_K)]
+            }
+            for c, counts in top_values.items() if c in present
+        },
+        'timestamp': {
+            'min': timestamps['min'].isoformat() if timestamps['min'] is not None else None,
+            'max': timestamps['max'].isoformat() if timestamps['max'] is not None else None,
+            'unparsed': timestamps['unparsed']
+        } if TIMESTAMP_COLUMN in present else None,
+        'built_at': datetime.utcnow().isoformat(),
+        'build_seconds': 0.0
+    }
+    profile['build_seconds'] = round(time.time() - start_time, 3)
+    return profile
+
+
+class _ScoreAccumulator:
+    """Streaming count/min/max/mean plus a bottom-k random-key sample for quantiles"""
+
+    def __init__(self, sample_size: int = RESERVOIR_SIZE, seed: int = 42):
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.nulls = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.keys = np.empty(0)
+        self.values = np.empty(0)
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype='float64')
+        valid = values[~np.isnan(values)]
+        self.nulls += len(values) - len(valid)
+        if len(valid) == 0:
+            return
+
+        self.count += len(valid)
+        self.total += float(valid.sum())
+        low, high = float(valid.min()), float(valid.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+        # Keeping the values with the smallest random keys is a uniform sample of everything seen
+        keys = np.concatenate([self.keys, self.rng.random(len(valid))])
+        values = np.concatenate([self.values, valid])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            keys, values = keys[keep], values[keep]
+        self.keys, self.values = keys, values
+
+    def summary(self) -> Dict:
+        quantiles = np.quantile(self.values, QUANTILES) if len(self.values) else [None] * len(QUANTILES)
+        return {
+            'count': self.count,
+            'nulls': self.nulls,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else None,
+            'quantiles': {f'p{int(q * 100)}': None if v is None else float(v) for q, v in zip(QUANTILES, quantiles)},
+            'quantiles_exact': self.count <= self.sample_size
+        }
+
+
+def _update_time_range(timestamps: Dict, values: pd.Series) -> None:
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    timestamps['unparsed'] += int((values.notna() & parsed.isna()).sum())
+    if parsed.notna().any():
+        low, high = parsed.min(), parsed.max()
+        timestamps['min'] = low if timestamps['min'] is None else min(timestamps['min'], low)
+        timestamps['max'] = high if timestamps['max'] is None else max(timestamps['max'], high)
+
+def _load_profile(path: str):
+    with open(path) as f:
+        profile = json.load(f)
+    return profile, profile.get('source')
+
+def _save_profile(path: str, profile: Dict, stamp: Dict) -> None:
+    profile['source'] = stamp
+    with replacing(path) as tmp_path:
+        with open(tmp_path, 'w') as f:
+            json.dump(profile, f)
+
+_profiles = SidecarCache(PROFILE_SUFFIX, build_profile, _load_profile, _save_profile)
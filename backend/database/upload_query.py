@@ -0,0 +1,165 @@
+# database/upload_query.py - Filtered group-by aggregation over an upload's columnar copy
+
+import os
+import re
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Dict, List
+
+from database.upload_store import source_stamp, load_upload, upload_dtypes, json_records
+
+NUMERIC_FUNCS = ['mean', 'min', 'max', 'sum', 'std']
+PERCENTILE_FUNC = re.compile(r'^p(\d{1,2}(?:\.\d+)?)$')  # p50, p95, p99.9
+RANGE_OPERATORS = {
+    'gt': lambda values, bound: values > bound,
+    'gte': lambda values, bound: values >= bound,
+    'lt': lambda values, bound: values < bound,
+    'lte': lambda values, bound: values <= bound
+}
+MAX_GROUP_COLUMNS = 3
+DEFAULT_LIMIT = 100
+
+# Columns of recently queried uploads stay in memory (upload path -> (stamp, frame))
+MAX_CACHED_FRAMES = 4
+# Repeated dashboard queries are answered from here ((path, stamp, query) -> result)
+MAX_CACHED_RESULTS = 256
+
+_frames: 'OrderedDict[str, tuple]' = OrderedDict()
+_results: 'OrderedDict[tuple, Dict]' = OrderedDict()
+_lock = threading.Lock()
+
+def run_query(filepath: str, query: Dict) -> Dict:
+    """Group-by ``query`` over an upload; raises ValueError for invalid queries"""
+    start_time = time.time()
+    stamp = source_stamp(filepath)
+    if stamp is None:
+        raise ValueError('Upload has no columnar copy to query')
+
+    spec = _normalize(query, upload_dtypes(filepath))
+    key = (os.path.abspath(filepath), json.dumps(stamp, sort_keys=True), json.dumps(spec, sort_keys=True))
+    with _lock:
+        cached = _results.get(key)
+        if cached is not None:
+            _results.move_to_end(key)
+    if cached is not None:
+        return {**cached, 'cached': True, 'elapsed_ms': round((time.time() - start_time) * 1000, 2)}
+
+    df = _columns(filepath, stamp, spec['columns'])
+    result = _execute(df, spec)
+
+    with _lock:
+        _results[key] = result
+        while len(_results) > MAX_CACHED_RESULTS:
+            _results.popitem(last=False)
+    return {**result, 'cached': False, 'elapsed_ms': round((time.time() - start_time) * 1000, 2)}
+
+def _normalize(query: Dict, dtypes: Dict[str, str]) -> Dict:
+    """Validate a query against the upload's columns; the result is also the cache key"""
+    numeric = {c for c, t in dtypes.items() if t.startswith(('int', 'float', 'double'))}
+
+    group_by = query.get('group_by') or []
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    if not group_by or len(group_by) > MAX_GROUP_COLUMNS:
+        raise ValueError(f'group_by needs 1 to {MAX_GROUP_COLUMNS} columns')
+
+    if not isinstance(query.get('aggregates') or [], list) or not isinstance(query.get('filters') or {}, dict):
+        raise ValueError('aggregates must be a list and filters an object')
+
+    aggregates = []
+    for aggregate in query.get('aggregates') or []:
+        if not isinstance(aggregate, dict):
+            raise ValueError(f'Each aggregate needs a column and a func, e.g. {{"column": "amount", "func": "mean"}}: {aggregate!r}')
+        column, func = aggregate.get('column'), str(aggregate.get('func', 'mean')).lower()
+        if column not in numeric:
+            raise ValueError(f'Cannot aggregate non-numeric or unknown column: {column}')
+        if func not in NUMERIC_FUNCS and not PERCENTILE_FUNC.match(func):
+            raise ValueError(f'Unknown aggregate: {func} (use {", ".join(NUMERIC_FUNCS)} or pNN)')
+        aggregates.append([column, func])
+
+    filters = {}
+    for column, condition in (query.get('filters') or {}).items():
+        if column not in dtypes:
+            raise ValueError(f'Unknown filter column: {column}')
+        if isinstance(condition, dict):
+            if column not in numeric or not set(condition) <= set(RANGE_OPERATORS):
+                raise ValueError(f'Range filters ({", ".join(RANGE_OPERATORS)}) need a numeric column: {column}')
+            filters[column] = {op: float(bound) for op, bound in condition.items()}
+        else:
+            values = condition if isinstance(condition, list) else [condition]
+            filters[column] = sorted(str(v) for v in values)
+
+    for column in group_by:
+        if column not in dtypes:
+            raise ValueError(f'Unknown group_by column: {column}')
+
+    sort = query.get('sort') or 'count'
+    columns = sorted(set(group_by) | {c for c, _ in aggregates} | set(filters))
+    return {
+        'group_by': list(group_by),
+        'aggregates': aggregates,
+        'filters': filters,
+        'sort': sort,
+        'descending': bool(query.get('descending', True)),
+        'limit': int(query.get('limit') or DEFAULT_LIMIT),
+        'columns': columns
+    }
+
+def _columns(filepath: str, stamp: Dict, columns: List[str]) -> pd.DataFrame:
+    """Cached columns of an upload, reading only the ones not yet in memory"""
+    key = os.path.abspath(filepath)
+    with _lock:
+        cached = _frames.get(key)
+        frame = cached[1] if cached and cached[0] == stamp else pd.DataFrame()
+
+    missing = [c for c in columns if c not in frame.columns]
+    if missing:
+        loaded = load_upload(filepath, columns=missing)
+        frame = loaded if frame.empty and not len(frame.columns) else pd.concat([frame, loaded], axis=1)
+        with _lock:
+            _frames[key] = (stamp, frame)
+            while len(_frames) > MAX_CACHED_FRAMES:
+                _frames.popitem(last=False)
+
+    with _lock:
+        if key in _frames:
+            _frames.move_to_end(key)
+    return frame[columns]
+
+def _execute(df: pd.DataFrame, spec: Dict) -> Dict:
+    mask = np.ones(len(df), dtype=bool)
+    for column, condition in spec['filters'].items():
+        values = df[column]
+        if isinstance(condition, dict):
+            numbers = values.to_numpy(dtype='float64', na_value=np.nan)
+            for op, bound in condition.items():
+                mask &= RANGE_OPERATORS[op](numbers, bound)
+        else:
+            mask &= values.astype(str).isin(condition).to_numpy() & values.notna().to_numpy()
+
+    matched = df[mask] if not mask.all() else df
+    grouped = matched.groupby(spec['group_by'], observed=True, dropna=False, sort=False)
+
+    result = grouped.size().rename('count').to_frame()
+    for column, func in spec['aggregates']:
+        name = f'{column}_{func}'
+        series = grouped[column]
+        percentile = PERCENTILE_FUNC.match(func)
+        result[name] = series.quantile(float(percentile.group(1)) / 100) if percentile else series.agg(func)
+
+    sort_column = spec['sort'] if spec['sort'] in result.columns else 'count'
+    result = result.sort_values(sort_column, ascending=not spec['descending'], kind='stable')
+    total_groups = len(result)
+    page = result.head(spec['limit']).reset_index()
+
+    return {
+        'groups': json_records(page),
+        'total_groups': total_groups,
+        'matched_rows': int(len(matched)),
+        'rows': int(len(df)),
+        'query': {k: v for k, v in spec.items() if k != 'columns'}
+    }
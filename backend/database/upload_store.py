@@ -0,0 +1,296 @@
+# database/upload_store.py - Columnar (Parquet) copies of uploaded datasets
+
+import os
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pipeline.schema import SIEM_COLUMNS, SCHEMA_VERSION, ROW_ID, column_dtype, apply_schema
+
+# Keys under which the column dtypes / schema version are stored in the Parquet metadata
+DTYPES_METADATA_KEY = b'siem.dtypes'
+VERSION_METADATA_KEY = b'siem.schema_version'
+
+# Registry dtypes -> Arrow types (categoricals are dictionary-encoded, so they load as pandas categories)
+_ARROW_TYPES = {
+    'int32': pa.int32(),
+    'int64': pa.int64(),
+    'float64': pa.float64(),
+    'category': pa.dictionary(pa.int32(), pa.string()),
+    'string': pa.string()
+}
+
+@contextmanager
+def replacing(target: str) -> Iterator[str]:
+    """A temp path of its own next to ``target``, moved over it if the block succeeds (removed if not)"""
+    fd, tmp_target = tempfile.mkstemp(dir=os.path.dirname(target) or '.', prefix=os.path.basename(target) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_target
+        os.replace(tmp_target, target)
+    finally:
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+
+def content_file_id(sha256: str, extension: str) -> str:
+    """Content-addressed file_id: byte-identical uploads share one id"""
+    return f"{sha256}.{extension}"
+
+def sidecar_path(filepath: str, suffix: str) -> str:
+    """Path of a file stored next to an upload (metadata, profile, indexes)"""
+    return os.path.splitext(filepath)[0] + suffix
+
+def metadata_path(filepath: str) -> str:
+    """Path of the JSON metadata sidecar of an upload (shared by an Excel upload and its CSV)"""
+    return sidecar_path(filepath, '.meta.json')
+
+def save_upload_metadata(filepath: str, metadata: Dict) -> None:
+    """Write the metadata sidecar atomically"""
+    with replacing(metadata_path(filepath)) as tmp_target:
+        with open(tmp_target, 'w') as f:
+            json.dump(metadata, f)
+
+def load_upload_metadata(filepath: str) -> Optional[Dict]:
+    """Stored metadata of an upload, or None if it was never recorded"""
+    target = metadata_path(filepath)
+    if not os.path.exists(target):
+        return None
+    try:
+        with open(target) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def columnar_path(filepath: str) -> str:
+    """Path of the Parquet copy that sits next to an upload"""
+    return os.path.splitext(filepath)[0] + '.parquet'
+
+def convert_to_columnar(filepath: str, block_size: int = 16 * 1024 * 1024) -> str:
+    """Stream a CSV upload into Parquet with the fixed SIEM schema; returns the Parquet path"""
+    target = columnar_path(filepath)
+
+    # Types for SIEM columns absent from this file are ignored by the reader
+    column_types = {c: _ARROW_TYPES[column_dtype(c)] for c in SIEM_COLUMNS}
+    reader = pacsv.open_csv(
+        filepath,
+        read_options=pacsv.ReadOptions(block_size=block_size),
+        convert_options=pacsv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+    )
+
+    dtypes = {field.name: str(field.type) for field in reader.schema}
+    schema = reader.schema.with_metadata({
+        DTYPES_METADATA_KEY: json.dumps(dtypes).encode(),
+        VERSION_METADATA_KEY: SCHEMA_VERSION.encode()
+    })
+
+    with replacing(target) as tmp_target:
+        with pq.ParquetWriter(tmp_target, schema) as writer:
+            for batch in reader:
+                writer.write_table(pa.Table.from_batches([batch], schema=schema))
+    return target
+
+def write_columnar(df: pd.DataFrame, target: str) -> str:
+    """Write an in-memory frame (e.g. an Excel sheet) as a Parquet dataset with the SIEM schema"""
+    # Excel cells come back as mixed Python objects; text columns go through strings first
+    df = df.assign(**{
+        c: df[c].astype('string') for c in df.columns
+        if column_dtype(c) in ('string', 'category') and not isinstance(df[c].dtype, pd.CategoricalDtype)
+    })
+    df = apply_schema(df)
+
+    fields = [pa.field(str(c), _ARROW_TYPES[column_dtype(c)]) for c in df.columns]
+    dtypes = {field.name: str(field.type) for field in fields}
+    schema = pa.schema(fields).with_metadata({
+        DTYPES_METADATA_KEY: json.dumps(dtypes).encode(),
+        VERSION_METADATA_KEY: SCHEMA_VERSION.encode()
+    })
+
+    with replacing(target) as tmp_target:
+        pq.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False), tmp_target)
+    return target
+
+def ensure_columnar(filepath: str) -> Optional[str]:
+    """Parquet copy of an upload, converting on first use; None if it cannot be built"""
+    if filepath.endswith('.parquet'):
+        # Datasets converted from Excel are stored as Parquet only
+        return filepath if os.path.exists(filepath) else None
+
+    target = columnar_path(filepath)
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(filepath):
+        metadata = pq.read_schema(target).metadata or {}
+        if metadata.get(VERSION_METADATA_KEY) == SCHEMA_VERSION.encode():
+            return target
+    try:
+        return convert_to_columnar(filepath)
+    except Exception as e:
+        print(f"Warning: Could not build columnar copy of {filepath}: {str(e)}")
+        return None
+
+def load_upload(filepath: str, columns: Optional[List[str]] = None, row_id: bool = False) -> pd.DataFrame:
+    """Read an upload (memory-mapped Parquet, falling back to CSV), optionally only some columns"""
+    parquet_file = ensure_columnar(filepath)
+    if parquet_file is None:
+        df = apply_schema(pd.read_csv(filepath, usecols=_usecols(columns)))
+    else:
+        table = pq.read_table(parquet_file, columns=_present(parquet_file, columns), memory_map=True)
+        df = table.to_pandas()
+    return _with_row_id(df, np.arange(len(df))) if row_id else df
+
+def load_upload_rows(filepath: str, positions, columns: Optional[List[str]] = None, row_id: bool = False) -> pd.DataFrame:
+    """Read only the given row positions of an upload"""
+    positions = np.asarray(positions, dtype=np.int64)
+    parquet_file = ensure_columnar(filepath)
+    if parquet_file is None:
+        df = apply_schema(pd.read_csv(filepath, usecols=_usecols(columns))).iloc[positions]
+    else:
+        table = pq.read_table(parquet_file, columns=_present(parquet_file, columns), memory_map=True)
+        df = table.take(pa.array(positions, type=pa.int64())).to_pandas()
+    df.index = pd.Index(positions)
+    return _with_row_id(df, positions) if row_id else df
+
+def iter_upload_chunks(filepath: str, chunk_size: int, columns: Optional[List[str]] = None,
+                       row_id: bool = False) -> Iterator[pd.DataFrame]:
+    """Yield an upload in row chunks without materializing the whole file"""
+    parquet_file = ensure_columnar(filepath)
+    if parquet_file is None:
+        chunks = (apply_schema(chunk) for chunk in pd.read_csv(filepath, chunksize=chunk_size, usecols=_usecols(columns)))
+    else:
+        source = pq.ParquetFile(parquet_file, memory_map=True)
+        chunks = (batch.to_pandas() for batch in source.iter_batches(batch_size=chunk_size, columns=_present(parquet_file, columns)))
+
+    offset = 0
+    for chunk in chunks:
+        if row_id:
+            chunk = _with_row_id(chunk.reset_index(drop=True), np.arange(offset, offset + len(chunk)))
+        offset += len(chunk)
+        yield chunk
+
+def source_stamp(filepath: str) -> Optional[Dict]:
+    """Identity of an upload's columnar copy; derived sidecars are stale once it changes"""
+    parquet_file = ensure_columnar(filepath)
+    if parquet_file is None:
+        return None
+    stat = os.stat(parquet_file)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'schema_version': SCHEMA_VERSION}
+
+class SidecarCache:
+    """Something derived from an upload (profile, index), kept in memory and in a sidecar file.
+
+    Both copies are tagged with the upload's source_stamp and rebuilt once it changes.
+    ``load(path)`` returns ``(value, stamp)`` and ``save(path, value, stamp)`` writes atomically.
+    """
+
+    def __init__(self, suffix: str, build: Callable[[str], Any],
+                 load: Callable[[str], Tuple[Any, Optional[Dict]]], save: Callable[[str, Any, Dict], None]):
+        self.suffix = suffix
+        self.build = build
+        self.load = load
+        self.save = save
+        self._values: Dict[str, Tuple[Dict, Any]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, filepath: str) -> str:
+        return sidecar_path(filepath, self.suffix)
+
+    def get(self, filepath: str, refresh: bool = False) -> Any:
+        stamp = source_stamp(filepath)
+        if stamp is None:
+            raise ValueError('Upload has no columnar copy')
+
+        key = os.path.abspath(filepath)
+        cached = self._values.get(key)
+        if not refresh and cached and cached[0] == stamp:
+            return cached[1]
+
+        with self._lock:
+            cached = self._values.get(key)
+            if not refresh and cached and cached[0] == stamp:
+                return cached[1]
+
+            value = None if refresh else self._load(filepath, stamp)
+            if value is None:
+                value = self.build(filepath)
+                self.save(self.path(filepath), value, stamp)
+            self._values[key] = (stamp, value)
+        return value
+
+    def _load(self, filepath: str, stamp: Dict) -> Any:
+        path = self.path(filepath)
+        if not os.path.exists(path):
+            return None
+        try:
+            value, stored_stamp = self.load(path)
+        except Exception as e:
+            print(f"Warning: Could not read {path}: {str(e)}")
+            return None
+        return value if stored_stamp == stamp else None
+
+def iter_upload_batches(filepath: str, columns: Optional[List[str]] = None,
+                        batch_size: int = 256 * 1024) -> Iterator[pa.RecordBatch]:
+    """Stream an upload's columnar copy as Arrow record batches (one pass, bounded memory)"""
+    parquet_file = ensure_columnar(filepath)
+    if parquet_file is None:
+        raise ValueError(f"No columnar copy of {filepath}")
+    source = pq.ParquetFile(parquet_file, memory_map=True)
+    yield from source.iter_batches(batch_size=batch_size, columns=_present(parquet_file, columns))
+
+def upload_stats(filepath: str) -> Dict:
+    """Row/row-group counts and numeric min/max/nulls, read from the Parquet footer (no data scan)"""
+    parquet_file = ensure_columnar(filepath)
+    if parquet_file is None:
+        return {}
+
+    metadata = pq.ParquetFile(parquet_file).metadata
+    columns = {}
+    for rg in range(metadata.num_row_groups):
+        row_group = metadata.row_group(rg)
+        for i in range(row_group.num_columns):
+            chunk = row_group.column(i)
+            stats = chunk.statistics
+            if stats is None or chunk.physical_type not in ('INT32', 'INT64', 'FLOAT', 'DOUBLE'):
+                continue
+            entry = columns.setdefault(chunk.path_in_schema, {'min': None, 'max': None, 'nulls': 0})
+            entry['nulls'] += int(stats.null_count or 0)
+            if stats.has_min_max:
+                entry['min'] = stats.min if entry['min'] is None else min(entry['min'], stats.min)
+                entry['max'] = stats.max if entry['max'] is None else max(entry['max'], stats.max)
+
+    return {'rows': metadata.num_rows, 'row_groups': metadata.num_row_groups, 'columns': columns}
+
+def json_records(df: pd.DataFrame) -> List[Dict]:
+    """Frame rows as JSON-safe dicts (NaN/NA -> None)"""
+    columns = {}
+    for column in df.columns:
+        values = df[column].astype(object)
+        columns[column] = values.where(values.notna(), None)
+    return pd.DataFrame(columns, index=df.index).to_dict('records')
+
+def upload_dtypes(filepath: str) -> Dict[str, str]:
+    """Column dtypes recorded when the upload was converted"""
+    parquet_file = ensure_columnar(filepath)
+    if parquet_file is None:
+        return {}
+    metadata = pq.read_schema(parquet_file).metadata or {}
+    return json.loads(metadata.get(DTYPES_METADATA_KEY, b'{}'))
+
+def _with_row_id(df: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+    return df.assign(**{ROW_ID: positions.astype(np.int64)})
+
+def _present(parquet_file: str, columns: Optional[List[str]]) -> Optional[List[str]]:
+    if columns is None:
+        return None
+    names = pq.read_schema(parquet_file).names
+    return [c for c in columns if c in names]
+
+def _usecols(columns: Optional[List[str]]):
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return lambda c: c in wanted
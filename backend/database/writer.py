@@ -0,0 +1,101 @@
+# database/writer.py - Background writer that applies queued storage writes in groups
+
+import time
+import queue
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+# Writes arriving within this many seconds of the first queued one share a flush
+WRITE_WINDOW = 0.02
+MAX_BATCH = 5000
+
+
+class StorageWriter:
+    """One thread draining a queue of (table, item) writes.
+
+    Items queued within ``window`` seconds of each other are handed to their table's
+    handler together, so a burst of writes costs one flush per table instead of one
+    per call. ``submit`` returns a Future that resolves once the item's flush is done.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[List[Any]], None]], window: float = WRITE_WINDOW,
+                 max_batch: int = MAX_BATCH):
+        self.handlers = handlers
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._idle = threading.Condition()
+        self._pending = 0
+
+    def submit(self, table: str, item: Any) -> Future:
+        if table not in self.handlers:
+            raise ValueError(f'No writer for table: {table}')
+        future = Future()
+        with self._idle:
+            self._pending += 1
+        self._ensure_thread()
+        self._queue.put((table, item, future))
+        return future
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until every write queued so far has been flushed"""
+        if threading.current_thread() is self._thread:
+            return True
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _ensure_thread(self) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='storage-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Per table, in arrival order
+            groups: Dict[str, list] = {}
+            for table, item, future in batch:
+                groups.setdefault(table, []).append((item, future))
+
+            for table, entries in groups.items():
+                try:
+                    self.handlers[table]([item for item, _ in entries])
+                    for item, future in entries:
+                        future.set_result(item)
+                except Exception as e:
+                    print(f"Error flushing {len(entries)} {table} writes: {str(e)}")
+                    for _, future in entries:
+                        future.set_exception(e)
+
+            with self._idle:
+                self._pending -= len(batch)
+                self._idle.notify_all()
+
+
+_writers: List[StorageWriter] = []
+
+def create_writer(handlers: Dict[str, Callable[[List[Any]], None]], **kwargs) -> StorageWriter:
+    """A writer whose queued writes are flushed before the process exits"""
+    writer = StorageWriter(handlers, **kwargs)
+    _writers.append(writer)
+    return writer
+
+@atexit.register
+def _flush_on_exit() -> None:
+    for writer in _writers:
+        writer.wait_idle(timeout=5)
@@ -0,0 +1,111 @@
+import os
+import json
+import shutil
+import pandas as pd
+from typing import Dict, Optional
+from datetime import datetime
+
+CHECKPOINT_DIR = './data/checkpoints'
+
+class CheckpointStore:
+    """Persist each stage's output for a run so a retry can resume after a failure"""
+
+    def __init__(self, run_id: str, base_dir: str = CHECKPOINT_DIR):
+        self.run_id = run_id
+        self.run_dir = os.path.join(base_dir, run_id)
+        self.manifest_file = os.path.join(self.run_dir, 'manifest.json')
+
+    def open(self, file_id: str, mode: str) -> None:
+        """Start or reopen the run; stale checkpoints from another file/mode are dropped"""
+        manifest = self._read_manifest()
+
+        if manifest and (manifest.get('file_id') != file_id or manifest.get('mode') != mode):
+            print(f"Checkpoint run {self.run_id} was for {manifest.get('file_id')} ({manifest.get('mode')}) - discarding")
+            self.clear()
+            manifest = None
+
+        if not manifest:
+            os.makedirs(self.run_dir, exist_ok=True)
+            self._write_manifest({
+                'run_id': self.run_id,
+                'file_id': file_id,
+                'mode': mode,
+                'completed': {},
+                'created_at': datetime.utcnow().isoformat()
+            })
+
+    def last_completed(self) -> Optional[str]:
+        """Name of the most recently checkpointed stage, or None"""
+        completed = [stage for stage in self._completed() if self.has(stage)]
+        return completed[-1] if completed else None
+
+    def has(self, stage: str) -> bool:
+        """Check whether the stage's output is on disk"""
+        return stage in self._completed() and os.path.exists(self._path(stage))
+
+    # ---- stage outputs ----
+
+    def save(self, stage: str, value) -> None:
+        """Checkpoint a stage output (DataFrame, list of pairs or knowledge base dict) as Parquet"""
+        try:
+            if isinstance(value, pd.DataFrame):
+                df, kind = value, 'frame'
+            elif isinstance(value, list):
+                df, kind = pd.DataFrame(value, columns=['action', 'reason']), 'pairs'
+            else:
+                rows = [dict(entry or {}, key=key) for key, entry in value.items()]
+                df, kind = pd.DataFrame(rows, columns=None if rows else ['key']), 'kb'
+
+            df.reset_index(drop=True).to_parquet(self._path(stage), index=False)
+            self._mark_completed(stage, kind)
+        except Exception as e:
+            # A failed checkpoint only costs resumability, never the run itself
+            print(f"Warning: Could not checkpoint stage '{stage}': {str(e)}")
+
+    def load(self, stage: str):
+        """Read back a checkpoint written with save()"""
+        kind = self._completed().get(stage)
+        df = pd.read_parquet(self._path(stage))
+
+        if kind == 'pairs':
+            return df.to_dict('records')
+        if kind == 'kb':
+            kb = {}
+            for record in df.to_dict('records'):
+                key = record.pop('key')
+                values = {k: v for k, v in record.items() if not pd.isna(v)}
+                kb[key] = values or None
+            return kb
+        return df
+
+    # ---- lifecycle ----
+
+    def clear(self) -> None:
+        """Garbage-collect the run's checkpoints (called once the run succeeds)"""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.run_dir, f"{stage}.parquet")
+
+    def _completed(self) -> Dict[str, str]:
+        """Checkpointed stages (in completion order) mapped to their output kind"""
+        return (self._read_manifest() or {}).get('completed', {})
+
+    def _mark_completed(self, stage: str, kind: str) -> None:
+        manifest = self._read_manifest() or {'run_id': self.run_id, 'completed': {}}
+        manifest['completed'][stage] = kind
+        manifest['updated_at'] = datetime.utcnow().isoformat()
+        self._write_manifest(manifest)
+
+    def _read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        tmp_file = self.manifest_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, self.manifest_file)
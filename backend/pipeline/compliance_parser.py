@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from typing import Dict
 import json
@@ -7,65 +8,84 @@ import os
 class ComplianceParser:
     """Parse all records using KB (with LLM fallback if not in KB)"""
     
+    # Columns parse() reads (action/reason come from the rule engine)
+    COLUMNS = ['action', 'reason', 'final_confidence_score']
+    
     def __init__(self, knowledge_base: Dict, mode: str = 'full'):
         self.kb = knowledge_base
         self.mode = mode
         self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))  # NEW: Modern client
     
     def parse(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Parse all records and fill compliance columns"""
+        """Parse all records and fill compliance columns (resolved once per action-reason pair)"""
         
-        results = []
+        if len(df) == 0:
+            return df.assign(framework=[], obligationId=[], description=[], category=[],
+                             severity=[], status=[], confidence_score=[])
         
-        for _, row in df.iterrows():
-            record = row.to_dict()
-            
-            action = record.get('action', '')
-            reason = record.get('reason', '')
-            key = f"{action}||{reason}"
-            
-            # Check KB first
-            if key in self.kb and self.kb[key] is not None:
-                compliance_data = self.kb[key]
-            else:
-                # Not in KB - fallback to LLM (only in full mode)
-                if self.mode == 'full':
-                    print(f"Calling LLM directly for: {key}")
-                    compliance_data = self._call_llm_directly(action, reason)
-                else:
-                    # Quick mode - use defaults
-                    compliance_data = {
-                        'compliance_framework': 'ISO 27001',
-                        'obligation_id': 'UNKNOWN',
-                        'description': f'{action}: {reason}',
-                        'category': 'Security',
-                        'severity': 'Medium'
-                    }
-            
-            # Add compliance data to record
-            record['framework'] = compliance_data['compliance_framework']
-            record['obligationId'] = compliance_data['obligation_id']
-            record['description'] = compliance_data['description']
-            record['category'] = compliance_data['category']
-            record['severity'] = compliance_data['severity']
-            
-            # Determine status based on action
-            if action == 'deny':
-                record['status'] = 'Non-Compliant'
-            elif action in ['quarantine', 'mfa']:
-                record['status'] = 'Requires Action'
-            elif action in ['monitor', 'allow']:
-                record['status'] = 'Compliant'
-            else:
-                record['status'] = 'Unknown'
-            
-            # Calculate confidence score (convert to 0-100 scale)
-            confidence = float(record.get('final_confidence_score', 0.5))
-            record['confidence_score'] = round(confidence * 100, 2)
+        actions = df['action'] if 'action' in df.columns else pd.Series('', index=df.index)
+        reasons = df['reason'] if 'reason' in df.columns else pd.Series('', index=df.index)
+        pair_codes, pairs = pd.factorize(pd.MultiIndex.from_arrays([actions, reasons]), use_na_sentinel=False)
+        
+        fields = {name: [] for name in ['framework', 'obligationId', 'description', 'category', 'severity', 'status']}
+        for action, reason in pairs:
+            compliance_data = self._compliance_data(action, reason)
             
-            results.append(record)
+            fields['framework'].append(compliance_data['compliance_framework'])
+            fields['obligationId'].append(compliance_data['obligation_id'])
+            fields['description'].append(compliance_data['description'])
+            fields['category'].append(compliance_data['category'])
+            fields['severity'].append(compliance_data['severity'])
+            fields['status'].append(self._status(action))
+        
+        columns = {name: self._categorical(values, pair_codes, df.index) for name, values in fields.items()}
         
-        return pd.DataFrame(results)
+        # Calculate confidence score (convert to 0-100 scale)
+        if 'final_confidence_score' in df.columns:
+            confidence = pd.to_numeric(df['final_confidence_score'], errors='coerce').astype('float64')
+        else:
+            confidence = pd.Series(0.5, index=df.index)
+        columns['confidence_score'] = (confidence * 100).round(2)
+        
+        return df.assign(**columns)
+    
+    def _compliance_data(self, action: str, reason: str) -> Dict:
+        """Compliance metadata for one pair: KB first, then LLM (full mode) or defaults"""
+        key = f"{action}||{reason}"
+        
+        # Check KB first
+        if key in self.kb and self.kb[key] is not None:
+            return self.kb[key]
+        
+        # Not in KB - fallback to LLM (only in full mode)
+        if self.mode == 'full':
+            print(f"Calling LLM directly for: {key}")
+            return self._call_llm_directly(action, reason)
+        
+        # Quick mode - use defaults
+        return {
+            'compliance_framework': 'ISO 27001',
+            'obligation_id': 'UNKNOWN',
+            'description': f'{action}: {reason}',
+            'category': 'Security',
+            'severity': 'Medium'
+        }
+    
+    def _status(self, action: str) -> str:
+        """Determine status based on action"""
+        if action == 'deny':
+            return 'Non-Compliant'
+        elif action in ['quarantine', 'mfa']:
+            return 'Requires Action'
+        elif action in ['monitor', 'allow']:
+            return 'Compliant'
+        return 'Unknown'
+    
+    @staticmethod
+    def _categorical(values, pair_codes: np.ndarray, index) -> pd.Series:
+        """Spread per-pair values to rows as a categorical column"""
+        inverse, categories = pd.factorize(np.asarray(values, dtype=object))
+        return pd.Series(pd.Categorical.from_codes(inverse[pair_codes], categories), index=index)
     
     def _call_llm_directly(self, action: str, reason: str) -> Dict:
         """Direct LLM call if not in KB"""
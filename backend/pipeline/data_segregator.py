@@ -13,11 +13,4 @@ class DataSegregator:
         # Get unique combinations
         unique = df[['action', 'reason']].drop_duplicates()
         
-        pairs = []
-        for _, row in unique.iterrows():
-            pairs.append({
-                'action': row['action'],
-                'reason': row['reason']
-            })
-        
-        return pairs
+        return unique.astype(object).to_dict('records')
@@ -0,0 +1,79 @@
+import csv
+import hashlib
+import io
+from typing import BinaryIO, Dict, List, Optional
+
+from pipeline.schema import validate_header
+
+class StreamingIngest:
+    """Write an upload to disk in one pass while hashing it and, for CSV, counting rows and reading the header"""
+
+    def __init__(self, filepath: str, is_csv: bool = True, chunk_size: int = 1024 * 1024):
+        self.filepath = filepath
+        self.is_csv = is_csv
+        self.chunk_size = chunk_size
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.records = 0
+        self.header: Optional[List[str]] = None
+        self._header_bytes = bytearray()
+        self._in_quotes = False
+        self._last_byte = b''
+
+    def ingest(self, stream: BinaryIO) -> Dict:
+        """Copy ``stream`` to ``filepath`` chunk by chunk and return the upload metadata"""
+        with open(self.filepath, 'wb') as out:
+            while True:
+                chunk = stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                out.write(chunk)
+                self._consume(chunk)
+        return self.metadata()
+
+    def metadata(self) -> Dict:
+        info = {'size': self.size, 'sha256': self.sha256.hexdigest()}
+        if self.is_csv:
+            records = self.records + (1 if self._last_byte not in (b'', b'\n') else 0)
+            if self.header is None and self._header_bytes:
+                self.header = self._parse_header(bytes(self._header_bytes))
+            info['rows'] = max(records - 1, 0)
+            info['schema'] = validate_header(self.header or [])
+        return info
+
+    def _consume(self, chunk: bytes) -> None:
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+        if not self.is_csv:
+            return
+
+        if self.header is None:
+            self._collect_header(chunk)
+
+        # Count record-terminating newlines, ignoring ones inside quoted fields
+        if b'"' not in chunk:
+            if not self._in_quotes:
+                self.records += chunk.count(b'\n')
+        else:
+            for i, part in enumerate(chunk.split(b'"')):
+                if i > 0:
+                    self._in_quotes = not self._in_quotes
+                if not self._in_quotes:
+                    self.records += part.count(b'\n')
+        self._last_byte = chunk[-1:]
+
+    def _collect_header(self, chunk: bytes) -> None:
+        self._header_bytes.extend(chunk)
+        in_quotes = False
+        for i, byte in enumerate(self._header_bytes):
+            if byte == 0x22:  # '"'
+                in_quotes = not in_quotes
+            elif byte == 0x0A and not in_quotes:  # '\n'
+                self.header = self._parse_header(bytes(self._header_bytes[:i]))
+                self._header_bytes = bytearray()
+                return
+
+    @staticmethod
+    def _parse_header(raw: bytes) -> List[str]:
+        text = raw.decode('utf-8-sig', errors='replace').rstrip('\r')
+        return next(csv.reader(io.StringIO(text)), [])
@@ -1,42 +1,63 @@
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from pipeline.schema import ROW_ID
 
 class ReportGenerator:
     """Generate final compliance report from parsed data"""
     
-    def generate(self, df: pd.DataFrame) -> Dict:
-        """Generate comprehensive compliance report"""
+    def generate(self, df: pd.DataFrame, display: Optional[pd.DataFrame] = None) -> Dict:
+        """Generate comprehensive compliance report (``display`` holds extra upload columns, row-aligned with ``df``)"""
         
-        obligations = []
+        # Report fields with the default used when a column is missing
+        fields = {
+            'framework': 'Unknown',
+            'obligationId': 'UNKNOWN',
+            'description': '',
+            'status': 'Unknown',
+            'confidence_score': 0,
+            'category': 'Security',
+            'severity': 'Medium',
+            'action': 'unknown',
+            'reason': ''
+        }
         
-        for _, row in df.iterrows():
-            obligations.append({
-                'framework': row.get('framework', 'Unknown'),
-                'obligationId': row.get('obligationId', 'UNKNOWN'),
-                'description': row.get('description', ''),
-                'status': row.get('status', 'Unknown'),
-                'confidence_score': row.get('confidence_score', 0),
-                'category': row.get('category', 'Security'),
-                'severity': row.get('severity', 'Medium'),
-                'action': row.get('action', 'unknown'),
-                'reason': row.get('reason', '')
-            })
+        columns = {
+            field: (df[field].astype(object) if field in df.columns else pd.Series(default, index=df.index, dtype=object))
+            for field, default in fields.items()
+        }
+        if ROW_ID in df.columns:
+            columns[ROW_ID] = df[ROW_ID].astype(object)
         
-        # Generate summary statistics
-        total = len(obligations)
-        compliant = sum(1 for o in obligations if o['status'] == 'Compliant')
-        non_compliant = sum(1 for o in obligations if o['status'] == 'Non-Compliant')
-        requires_action = sum(1 for o in obligations if o['status'] == 'Requires Action')
+        # Extra upload columns asked for by the caller; they never replace report fields
+        if display is not None:
+            for column in display.columns:
+                if column in columns:
+                    continue
+                values = display[column].astype(object)
+                columns[column] = pd.Series(values.where(values.notna(), None).to_numpy(), index=df.index, dtype=object)
+        
+        obligations = pd.DataFrame(columns, index=df.index).to_dict('records')
         
         report = {
             'obligations': obligations,
-            'summary': {
-                'total': total,
-                'compliant': compliant,
-                'non_compliant': non_compliant,
-                'requires_action': requires_action,
-                'compliance_rate': round((compliant / total * 100) if total > 0 else 0, 1)
-            }
+            'summary': self.summarize(obligations)
         }
         
         return report
+    
+    @staticmethod
+    def summarize(obligations: List[Dict]) -> Dict:
+        """Summary statistics over a list of obligations"""
+        total = len(obligations)
+        compliant = sum(1 for o in obligations if o['status'] == 'Compliant')
+        non_compliant = sum(1 for o in obligations if o['status'] == 'Non-Compliant')
+        requires_action = sum(1 for o in obligations if o['status'] == 'Requires Action')
+        
+        return {
+            'total': total,
+            'compliant': compliant,
+            'non_compliant': non_compliant,
+            'requires_action': requires_action,
+            'compliance_rate': round((compliant / total * 100) if total > 0 else 0, 1)
+        }
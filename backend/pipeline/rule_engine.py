@@ -1,10 +1,13 @@
 import yaml
+import numpy as np
 import pandas as pd
-from typing import Dict, Any
 
 class RuleEngine:
     """Apply policy_rules.yaml to determine action and reason for each record"""
     
+    # Upload columns the rule conditions read
+    COLUMNS = ['final_confidence_score', 'false_positive_likelihood', 'correlation_score', 'severity']
+    
     def __init__(self, policy_file: str):
         with open(policy_file, 'r') as f:
             self.policy = yaml.safe_load(f)
@@ -12,66 +15,62 @@ class RuleEngine:
         self.rules = sorted(self.policy['rules'], key=lambda x: x['priority'])
     
     def apply_rules(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Apply policy rules to entire dataframe"""
-        
-        results = []
-        
-        for _, row in df.iterrows():
-            record = row.to_dict()
-            
-            # Find matching rule
-            matched_rule = self._match_rule(record)
-            
-            if matched_rule:
-                record['action'] = matched_rule['action']
-                record['reason'] = matched_rule['reason']
-                record['rule_id'] = matched_rule['id']
-            else:
-                record['action'] = 'allow'
-                record['reason'] = 'No matching rule found - default allow'
-                record['rule_id'] = 'default'
-            
-            results.append(record)
-        
-        return pd.DataFrame(results)
-    
-    def _match_rule(self, record: Dict[str, Any]) -> Dict[str, Any]:
-        """Find first matching rule for this record"""
+        """Apply policy rules to entire dataframe (vectorized; existing column dtypes are kept)"""
         
-        confidence = float(record.get('final_confidence_score', 0))
-        fp_likelihood = float(record.get('false_positive_likelihood', 0))
-        correlation = float(record.get('correlation_score', 0))
-        severity = str(record.get('severity', 'low')).lower()
+        confidence = self._numeric(df, 'final_confidence_score')
+        fp_likelihood = self._numeric(df, 'false_positive_likelihood')
+        correlation = self._numeric(df, 'correlation_score')
+        severity = df['severity'] if 'severity' in df.columns else pd.Series('low', index=df.index)
         
+        # First matching rule wins - np.select picks the first true condition
+        masks = []
         for rule in self.rules:
             conditions = rule['conditions']
-            
-            # Check all conditions
-            if not self._check_condition(confidence, conditions['final_confidence_score']):
-                continue
-            
-            if not self._check_condition(fp_likelihood, conditions['false_positive_likelihood']):
-                continue
-            
-            if not self._check_condition(correlation, conditions['correlation_score']):
-                continue
-            
-            if severity not in conditions['severity']:
-                continue
-            
-            # All conditions matched!
-            return rule
+            masks.append(
+                self._condition_mask(confidence, conditions['final_confidence_score']) &
+                self._condition_mask(fp_likelihood, conditions['false_positive_likelihood']) &
+                self._condition_mask(correlation, conditions['correlation_score']) &
+                self._severity_mask(severity, conditions['severity'])
+            )
         
-        return None
+        default = len(self.rules)
+        matched = np.select(masks, np.arange(len(self.rules)), default=default) if masks else np.full(len(df), default)
+        
+        actions = [rule['action'] for rule in self.rules] + ['allow']
+        reasons = [rule['reason'] for rule in self.rules] + ['No matching rule found - default allow']
+        rule_ids = [rule['id'] for rule in self.rules] + ['default']
+        
+        return df.assign(
+            action=self._categorical(actions, matched, df.index),
+            reason=self._categorical(reasons, matched, df.index),
+            rule_id=self._categorical(rule_ids, matched, df.index)
+        )
+    
+    def _numeric(self, df: pd.DataFrame, column: str) -> np.ndarray:
+        if column not in df.columns:
+            return np.zeros(len(df))
+        return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64')
     
-    def _check_condition(self, value: float, condition: str) -> bool:
-        """Check if value meets condition string"""
+    def _condition_mask(self, values: np.ndarray, condition: str) -> np.ndarray:
+        """Rows meeting a condition string such as '>=0.7' or '<0.3' (NaN never matches)"""
         
         if '>=' in condition:
-            threshold = float(condition.replace('>=', ''))
-            return value >= threshold
+            return values >= float(condition.replace('>=', ''))
         elif '<' in condition:
-            threshold = float(condition.replace('<', ''))
-            return value < threshold
+            return values < float(condition.replace('<', ''))
         
-        return False
\ No newline at end of file
+        return np.zeros(len(values), dtype=bool)
+    
+    def _severity_mask(self, severity: pd.Series, allowed) -> np.ndarray:
+        """Case-insensitive severity membership; categoricals are matched on their categories only"""
+        allowed = set(allowed)
+        if isinstance(severity.dtype, pd.CategoricalDtype):
+            hits = [c for c in severity.cat.categories if str(c).lower() in allowed]
+            return severity.isin(hits).to_numpy()
+        return severity.astype(str).str.lower().isin(allowed).to_numpy()
+    
+    @staticmethod
+    def _categorical(values, codes: np.ndarray, index) -> pd.Series:
+        """Categorical column from per-rule values (rule values may repeat, e.g. actions)"""
+        categories, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+        return pd.Series(pd.Categorical.from_codes(inverse[codes], categories), index=index)
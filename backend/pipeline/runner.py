@@ -0,0 +1,295 @@
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+class Stage:
+    """A pipeline step: reads named inputs from the run context and returns named outputs"""
+
+    def __init__(self, name: str, description: str, func: Callable[..., Dict[str, Any]],
+                 inputs: List[str] = None, outputs: List[str] = None, process: str = 'System',
+                 start_message: str = None, done_message: str = None, count: Callable[[Dict], int] = None,
+                 checkpoint: str = None, enabled: bool = True, disabled_outputs: Dict[str, Any] = None,
+                 disabled_message: str = 'Skipped', merge: Dict[str, Callable[[List[Any]], Any]] = None):
+        self.name = name
+        self.description = description
+        self.func = func
+        self.inputs = inputs or []
+        self.outputs = outputs or []
+        self.process = process
+        self.start_message = start_message or f'{name}...'
+        # Formatted with {count} once the stage has run
+        self.done_message = done_message or f'{name} completed ({{count}} records)'
+        self.count = count or (lambda outputs: 0)
+        # Name of the CheckpointStore entry holding this stage's (single) output
+        self.checkpoint = checkpoint
+        self.enabled = enabled
+        self.disabled_outputs = disabled_outputs or {}
+        self.disabled_message = disabled_message
+        # Chunked runs: how to combine each output's per-chunk values (default: keep the last)
+        self.merge = merge or {}
+
+    def report(self) -> Dict:
+        """Initial stage entry in the format the frontend renders"""
+        return {'name': self.name, 'description': self.description, 'status': 'pending'}
+
+
+class PipelineRunner:
+    """Run stages in dependency order with centralized timing, logging and checkpointing"""
+
+    def __init__(self, stages: List[Stage], checkpoints=None, log: Callable = None):
+        self.stages = self._order(stages)
+        self.checkpoints = checkpoints
+        self.log = log
+        self.stage_reports = [stage.report() for stage in stages]
+        self._reports_by_name = {r['name']: r for r in self.stage_reports}
+
+    # ---- straight-line runs ----
+
+    def run(self, context: Dict[str, Any], targets: List[str] = None) -> Dict[str, Any]:
+        """Run every stage needed to produce ``targets`` (default: all outputs)"""
+        plan = self._plan(targets)
+
+        for stage in self.stages:
+            action = plan[stage.name]
+            if action == 'resume':
+                for key in stage.outputs:
+                    context[key] = self.checkpoints.load(stage.checkpoint)
+                self._resumed(stage, self._count(stage, context))
+            elif action == 'skip':
+                self._resumed(stage, 0)
+            else:
+                outputs = self._execute(stage, {key: context[key] for key in stage.inputs})
+                context.update(outputs)
+                if stage.checkpoint and self.checkpoints is not None:
+                    self.checkpoints.save(stage.checkpoint, outputs[stage.outputs[0]])
+
+        return context
+
+    # ---- chunked runs ----
+
+    def run_chunked(self, chunks: Iterable[Dict[str, Any]], source: str, chunk_stages: List[str],
+                    context: Dict[str, Any] = None, max_pending: int = 2) -> Dict[str, Any]:
+        """Stream chunks through ``chunk_stages`` with one worker per stage, then run the rest.
+
+        ``chunks`` stands in for the ``source`` stage and yields that stage's outputs
+        one chunk at a time. Each chunk stage works on its own thread, so stage N+1 of
+        chunk K overlaps with stage N of chunk K+1 (e.g. KB resolution of one chunk
+        while rules are applied to the next). Per-chunk outputs are combined with the
+        stage's ``merge`` functions before the remaining stages run on the merged context.
+        """
+        context = dict(context or {})
+        source_stage = next(s for s in self.stages if s.name == source)
+        pipeline = [s for s in self.stages if s.name in chunk_stages]
+        remaining = [s for s in self.stages if s.name not in chunk_stages and s is not source_stage]
+
+        # Per worker: which chunk keys are still read further down the line or merged at the end
+        merged_keys = set(k for s in pipeline for k in s.merge)
+        downstream = [set(k for s in pipeline[i + 1:] + remaining for k in s.inputs) | merged_keys
+                      for i in range(len(pipeline))]
+
+        queues = [queue.Queue(maxsize=max_pending) for _ in range(len(pipeline) + 1)]
+        failure = []
+        stop = threading.Event()
+        totals = {stage.name: {'time': 0.0, 'count': 0} for stage in [source_stage] + pipeline}
+        _DONE = object()
+
+        for stage in [source_stage] + pipeline:
+            self._started(stage)
+
+        def worker(index, stage):
+            inbox, outbox = queues[index], queues[index + 1]
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    outbox.put(_DONE)
+                    return
+                if stop.is_set():
+                    # Keep draining so upstream workers never block on a full queue
+                    continue
+                try:
+                    if stage.enabled:
+                        start_time = time.time()
+                        outputs = stage.func(**{key: item.get(key, context.get(key)) for key in stage.inputs})
+                        totals[stage.name]['time'] += time.time() - start_time
+                        totals[stage.name]['count'] += self._count(stage, outputs)
+                    else:
+                        outputs = dict(stage.disabled_outputs)
+                    item.update(outputs)
+                    outbox.put({key: value for key, value in item.items() if key in downstream[index]})
+                except Exception as e:
+                    failure.append((stage, e))
+                    stop.set()
+
+        threads = [threading.Thread(target=worker, args=(i, s), daemon=True) for i, s in enumerate(pipeline)]
+        for thread in threads:
+            thread.start()
+
+        collected = []
+
+        def collector():
+            while True:
+                item = queues[-1].get()
+                if item is _DONE:
+                    return
+                collected.append(item)
+
+        collector_thread = threading.Thread(target=collector, daemon=True)
+        collector_thread.start()
+
+        try:
+            chunks = iter(chunks)
+            while not stop.is_set():
+                start_time = time.time()
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                totals[source]['time'] += time.time() - start_time
+                totals[source]['count'] += self._count(source_stage, chunk)
+                queues[0].put(dict(chunk))
+        finally:
+            queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+            collector_thread.join()
+
+        if failure:
+            stage, error = failure[0]
+            self._failed(stage, error)
+            raise error
+
+        self._completed(source_stage, totals[source]['time'], totals[source]['count'])
+
+        # Combine per-chunk outputs; merged outputs give exact (deduplicated) counts
+        for stage in pipeline:
+            merged = {}
+            for key in stage.outputs:
+                if key in stage.merge:
+                    merged[key] = stage.merge[key]([item[key] for item in collected if key in item])
+            context.update(merged)
+
+            if not stage.enabled:
+                self._disabled(stage)
+                continue
+            count = totals[stage.name]['count']
+            if stage.outputs and len(merged) == len(stage.outputs):
+                count = self._count(stage, merged)
+            self._completed(stage, totals[stage.name]['time'], count)
+
+        for stage in remaining:
+            context.update(self._execute(stage, {key: context[key] for key in stage.inputs}))
+
+        return context
+
+    # ---- internals ----
+
+    def _execute(self, stage: Stage, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        if not stage.enabled:
+            self._disabled(stage)
+            return dict(stage.disabled_outputs)
+
+        self._started(stage)
+        start_time = time.time()
+        try:
+            outputs = stage.func(**inputs)
+        except Exception as e:
+            self._failed(stage, e)
+            raise
+
+        self._completed(stage, time.time() - start_time, self._count(stage, outputs))
+        return outputs
+
+    def _plan(self, targets: Optional[List[str]]) -> Dict[str, str]:
+        """Decide per stage whether to run it, restore it from a checkpoint, or skip it"""
+        if targets is None:
+            targets = [key for stage in self.stages for key in stage.outputs]
+
+        needed = set(targets)
+        plan = {}
+        for stage in reversed(self.stages):
+            if not needed & set(stage.outputs):
+                plan[stage.name] = 'skip'
+            elif self._has_checkpoint(stage):
+                plan[stage.name] = 'resume'
+            else:
+                plan[stage.name] = 'run'
+                needed |= set(stage.inputs)
+        return plan
+
+    def _has_checkpoint(self, stage: Stage) -> bool:
+        return bool(stage.checkpoint) and self.checkpoints is not None and self.checkpoints.has(stage.checkpoint)
+
+    def _count(self, stage: Stage, outputs: Dict[str, Any]) -> int:
+        try:
+            return int(stage.count(outputs))
+        except Exception:
+            return 0
+
+    def _started(self, stage: Stage) -> None:
+        print(f"\n--- {stage.name} ---")
+        self._reports_by_name[stage.name]['status'] = 'running'
+        self._log(stage.name, stage.start_message, 'info', stage.process)
+
+    def _completed(self, stage: Stage, execution_time: float, count: int) -> None:
+        report = self._reports_by_name[stage.name]
+        report['status'] = 'completed'
+        report['executionTime'] = round(execution_time, 2)
+        report['recordsProcessed'] = count
+
+        print(f"{stage.name} completed: {count} records in {execution_time:.2f}s")
+        self._log(stage.name, stage.done_message.format(count=count), 'success', stage.process)
+
+    def _resumed(self, stage: Stage, count: int) -> None:
+        report = self._reports_by_name[stage.name]
+        report['status'] = 'completed'
+        report['executionTime'] = 0.0
+        report['recordsProcessed'] = count
+        report['resumed'] = True
+        print(f"\n--- {stage.name} (RESUMED FROM CHECKPOINT) ---")
+
+    def _disabled(self, stage: Stage) -> None:
+        report = self._reports_by_name[stage.name]
+        report['status'] = 'completed'
+        report['executionTime'] = 0.0
+        report['recordsProcessed'] = 0
+        print(f"\n--- {stage.name} ({stage.disabled_message.upper()}) ---")
+        self._log(stage.name, stage.disabled_message, 'info', stage.process)
+
+    def _failed(self, stage: Stage, error: Exception) -> None:
+        self._reports_by_name[stage.name]['status'] = 'error'
+        self._reports_by_name[stage.name]['error'] = str(error)
+        self._log(stage.name, f'{stage.name} failed: {str(error)}', 'error', stage.process)
+
+    def _log(self, stage: str, message: str, log_type: str, process: str) -> None:
+        if self.log is None:
+            return
+        try:
+            self.log(stage, message, log_type, process)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _order(stages: List[Stage]) -> List[Stage]:
+        """Topologically order stages by their declared inputs/outputs"""
+        producers = {}
+        for stage in stages:
+            for key in stage.outputs:
+                producers[key] = stage.name
+
+        ordered, done = [], set()
+        by_name = {stage.name: stage for stage in stages}
+
+        def visit(stage, path):
+            if stage.name in done:
+                return
+            if stage.name in path:
+                raise ValueError(f"Pipeline has a cycle through stage '{stage.name}'")
+            for key in stage.inputs:
+                if key in producers and producers[key] != stage.name:
+                    visit(by_name[producers[key]], path | {stage.name})
+            done.add(stage.name)
+            ordered.append(stage)
+
+        for stage in stages:
+            visit(stage, set())
+        return ordered
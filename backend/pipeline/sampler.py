@@ -0,0 +1,184 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from database.upload_store import load_upload, load_upload_rows
+
+# Status counts reported by ReportGenerator.summarize, keyed by summary field
+SUMMARY_STATUSES = {
+    'compliant': 'Compliant',
+    'non_compliant': 'Non-Compliant',
+    'requires_action': 'Requires Action'
+}
+
+class StratifiedSampler:
+    """Draw a stratified sample of an upload and scale sample statistics back to the full file"""
+
+    STRATA_COLUMNS = ['severity', 'primary_domain']
+    STRATUM_COLUMN = '_stratum'
+    # Strata too small to get this many sampled rows are merged with their neighbours,
+    # so every stratum's variance can be estimated from its own sample
+    MIN_PER_STRATUM = 2
+
+    def __init__(self, sample_size: int = 1000, seed: int = 42, z: float = 1.96):
+        self.sample_size = sample_size
+        self.seed = seed
+        self.z = z  # 1.96 -> 95% confidence intervals
+        self.strata = pd.DataFrame()
+        self.population = 0
+
+    def sample_upload(self, filepath: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Sample an upload reading only the strata columns, then just the selected rows (and ``columns``)"""
+        strata_df = load_upload(filepath, columns=self.STRATA_COLUMNS)
+        selected = self.select_rows(strata_df)
+
+        sample = load_upload_rows(filepath, selected.index.to_numpy(), columns=columns, row_id=True)
+        sample[self.STRATUM_COLUMN] = selected.to_numpy()
+        return sample.reset_index(drop=True)
+
+    def sample(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Sample an in-memory frame"""
+        selected = self.select_rows(df)
+        sample = df.loc[selected.index].copy()
+        sample[self.STRATUM_COLUMN] = selected
+        return sample.reset_index(drop=True)
+
+    def select_rows(self, df: pd.DataFrame) -> pd.Series:
+        """Pick row positions per stratum (proportional allocation); returns position -> stratum id"""
+        keys = self._stratum_keys(df)
+        codes, labels = pd.factorize(keys, sort=True)
+        sizes = np.bincount(codes, minlength=len(labels)) if len(codes) else np.array([], dtype=int)
+
+        # Merge neighbouring strata (in label order) that are too small for MIN_PER_STRATUM rows
+        groups = self._collapse(sizes)
+        codes = groups[codes] if len(codes) else codes
+        labels = [[str(label) for label, group in zip(labels, groups) if group == g] for g in range(groups.max() + 1)] \
+            if len(groups) else []
+        sizes = np.bincount(codes, minlength=len(labels)) if len(codes) else np.array([], dtype=int)
+        allocation = self._allocate(sizes)
+
+        rng = np.random.default_rng(self.seed)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+
+        picked = []
+        for stratum, take in enumerate(allocation):
+            members = order[bounds[stratum]:bounds[stratum + 1]]
+            picked.append(rng.choice(members, size=take, replace=False) if take < len(members) else members)
+
+        positions = np.sort(np.concatenate(picked)) if picked else np.array([], dtype=int)
+
+        self.population = int(len(df))
+        self.strata = pd.DataFrame({'stratum': labels, 'population': sizes, 'sampled': allocation})
+        return pd.Series(codes[positions], index=df.index[positions])
+
+    def estimate_summary(self, parsed: pd.DataFrame) -> Dict:
+        """Scale the sample's ReportGenerator summary up to the population, with confidence intervals"""
+        N = self.population
+        strata = self.strata.set_index(pd.RangeIndex(len(self.strata)))
+
+        summary = {'total': N}
+        intervals = {}
+        for field, status in SUMMARY_STATUSES.items():
+            hits = (parsed['status'] == status).groupby(parsed[self.STRATUM_COLUMN]).sum() if len(parsed) else pd.Series(dtype=float)
+            estimate, variance = 0.0, 0.0
+            for stratum, row in strata.iterrows():
+                N_h, n_h = int(row['population']), int(row['sampled'])
+                if n_h == 0:
+                    continue
+                p_h = float(hits.get(stratum, 0)) / n_h
+                estimate += N_h * p_h
+                if n_h < N_h:
+                    # Conservative: the proportion is shrunk towards 1/2 for the variance, so a
+                    # stratum whose few sampled rows all agree still contributes uncertainty
+                    hits_h = p_h * n_h
+                    q_h = (hits_h + 0.5) / (n_h + 1)
+                    variance += N_h ** 2 * (1 - n_h / N_h) * q_h * (1 - q_h) / max(n_h - 1, 1)
+
+            margin = self.z * math.sqrt(variance)
+            summary[field] = int(round(estimate))
+            intervals[field] = {
+                'low': int(max(0, math.floor(estimate - margin))),
+                'high': int(min(N, math.ceil(estimate + margin)))
+            }
+
+        rate = (summary['compliant'] / N * 100) if N > 0 else 0
+        summary['compliance_rate'] = round(rate, 1)
+        intervals['compliance_rate'] = {
+            'low': round(intervals['compliant']['low'] / N * 100, 1) if N > 0 else 0,
+            'high': round(intervals['compliant']['high'] / N * 100, 1) if N > 0 else 0
+        }
+
+        return {
+            'summary': summary,
+            'confidence_intervals': intervals,
+            'confidence_level': 0.95 if self.z == 1.96 else None,
+            'sample': {
+                'population': N,
+                'sample_size': int(self.strata['sampled'].sum()) if len(self.strata) else 0,
+                'strata': self._strata_report()
+            }
+        }
+
+    def _collapse(self, sizes: np.ndarray) -> np.ndarray:
+        """Group id per stratum: consecutive strata merged until each group's share of the sample is MIN_PER_STRATUM rows"""
+        total = int(sizes.sum())
+        groups = np.zeros(len(sizes), dtype=int)
+        if total == 0 or self.sample_size >= total:
+            return np.arange(len(sizes))
+
+        rows_per_unit = self.sample_size / total
+        group, filled = 0, 0
+        for stratum, size in enumerate(sizes):
+            groups[stratum] = group
+            filled += size
+            if filled * rows_per_unit >= self.MIN_PER_STRATUM and stratum < len(sizes) - 1:
+                group, filled = group + 1, 0
+        # A short last group joins the one before it
+        if group > 0 and filled * rows_per_unit < self.MIN_PER_STRATUM:
+            groups[groups == group] = group - 1
+        return groups
+
+    def _allocate(self, sizes: np.ndarray) -> np.ndarray:
+        """Proportional allocation adding up to exactly sample_size (each collapsed stratum gets its minimum)"""
+        total = int(sizes.sum())
+        if total == 0:
+            return sizes.copy()
+        if self.sample_size >= total:
+            return sizes.copy()
+
+        raw = sizes * (self.sample_size / total)
+        minimum = np.minimum(sizes, self.MIN_PER_STRATUM) if self.sample_size >= self.MIN_PER_STRATUM * len(sizes) else 0
+        allocation = np.minimum(np.maximum(np.floor(raw).astype(int), minimum), sizes)
+
+        # Hand out rows lost to flooring by largest remainder
+        shortfall = self.sample_size - int(allocation.sum())
+        if shortfall > 0:
+            for stratum in np.argsort(-(raw - np.floor(raw))):
+                if shortfall == 0:
+                    break
+                if allocation[stratum] < sizes[stratum]:
+                    allocation[stratum] += 1
+                    shortfall -= 1
+        return allocation
+
+    def _stratum_keys(self, df: pd.DataFrame) -> pd.Series:
+        parts = []
+        for column in self.STRATA_COLUMNS:
+            if column in df.columns:
+                parts.append(df[column].astype(str).str.lower())
+            else:
+                parts.append(pd.Series('unknown', index=df.index))
+        return parts[0].str.cat(parts[1:], sep='|') if parts else pd.Series('all', index=df.index)
+
+    def _strata_report(self) -> List[Dict]:
+        report = []
+        for _, row in self.strata.iterrows():
+            members = [dict(zip(self.STRATA_COLUMNS, label.split('|'))) for label in row['stratum']]
+            # A merged stratum lists what it is made of
+            entry = dict(members[0]) if len(members) == 1 else {'strata': members}
+            entry['population'] = int(row['population'])
+            entry['sampled'] = int(row['sampled'])
+            report.append(entry)
+        return report
@@ -0,0 +1,87 @@
+import pandas as pd
+from typing import Dict, List
+
+# Bump when SIEM_DTYPES changes so stored columnar copies are rebuilt
+SCHEMA_VERSION = '2'
+
+# Columns of a SIEM incident export, in export order
+SIEM_COLUMNS = [
+    'row_index', 'keyword', 'timestamp', 'correlation_id', 'incident_title',
+    'domains_involved', 'primary_domain', 'correlation_score', 'mitre_tactic',
+    'mitre_technique', 'attack_stage', 'affected_users', 'affected_hosts',
+    'severity', 'status', 'false_positive_likelihood', 'analyst_assigned',
+    'response_actions', 'final_confidence_score'
+]
+
+# Columns the pipeline cannot run without (rule conditions)
+REQUIRED_COLUMNS = [
+    'final_confidence_score', 'false_positive_likelihood', 'correlation_score', 'severity'
+]
+
+# Position of a record in its upload; carried through the pipeline so columns a stage
+# did not read can be joined back later
+ROW_ID = 'row_id'
+
+# Schema registry: compact dtype per column (SIEM upload columns and pipeline-derived ones).
+# Scores stay float64: they are compared against rule thresholds and returned by the APIs as
+# uploaded, which float32 would not preserve (0.3 becomes 0.30000001).
+SIEM_DTYPES = {
+    ROW_ID: 'int64',
+    'row_index': 'int32',
+    'correlation_score': 'float64',
+    'false_positive_likelihood': 'float64',
+    'final_confidence_score': 'float64',
+    # Low-cardinality upload columns
+    'keyword': 'category',
+    'primary_domain': 'category',
+    'mitre_tactic': 'category',
+    'mitre_technique': 'category',
+    'attack_stage': 'category',
+    'severity': 'category',
+    'status': 'category',
+    # Added by the rule engine and compliance parser
+    'action': 'category',
+    'reason': 'category',
+    'rule_id': 'category',
+    'framework': 'category',
+    'obligationId': 'category',
+    'description': 'category',
+    'category': 'category',
+    'confidence_score': 'float64'
+}
+
+def column_dtype(column: str) -> str:
+    """Registered dtype of a column (free text defaults to string)"""
+    return SIEM_DTYPES.get(column, 'string')
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the registered columns of a frame to their compact dtypes"""
+    casts = {}
+    for column in df.columns:
+        dtype = SIEM_DTYPES.get(column)
+        if dtype is None or str(df[column].dtype) == dtype:
+            continue
+        if dtype == 'category':
+            casts[column] = df[column].astype('category')
+        elif dtype.startswith('int'):
+            values = pd.to_numeric(df[column], errors='coerce')
+            # Integers with gaps cannot be held in a plain int column
+            casts[column] = values.astype(dtype) if not values.isna().any() else values
+        else:
+            casts[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
+    return df.assign(**casts) if casts else df
+
+def validate_header(columns: List[str]) -> Dict:
+    """Compare an upload header with the SIEM schema"""
+    present = [str(c).strip() for c in columns]
+    missing_required = [c for c in REQUIRED_COLUMNS if c not in present]
+    missing = [c for c in SIEM_COLUMNS if c not in present and c not in missing_required]
+    unexpected = [c for c in present if c not in SIEM_COLUMNS]
+
+    return {
+        'valid': not missing_required,
+        'columns': present,
+        'missing_required': missing_required,
+        'missing_optional': missing,
+        'unexpected': unexpected
+    }
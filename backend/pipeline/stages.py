@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+
+from pipeline.runner import Stage
+from pipeline.rule_engine import RuleEngine
+from pipeline.data_segregator import DataSegregator
+from pipeline.llm_reasoner import LLMReasoner
+from pipeline.compliance_parser import ComplianceParser
+from pipeline.report_generator import ReportGenerator
+from pipeline.schema import SIEM_COLUMNS, ROW_ID, apply_schema
+from database.upload_store import load_upload, load_upload_rows
+from database.time_index import get_time_index, NO_TIME
+from database.dedup_index import DEDUP_KEY
+
+# Upload columns the stages declare they read; the rest stays on disk until a report asks for it
+INPUT_COLUMNS = [c for c in dict.fromkeys(RuleEngine.COLUMNS + ComplianceParser.COLUMNS) if c in SIEM_COLUMNS]
+
+def load_projected(filepath: str, columns: List[str]) -> pd.DataFrame:
+    """Default loader: just ``columns`` of an upload, plus the row id"""
+    return load_upload(filepath, columns=columns, row_id=True)
+
+def build_execute_stages(policy_file: str, mode: str, loader: Callable[[str, List[str]], pd.DataFrame] = load_projected,
+                         display_columns: Optional[List[str]] = None, dedup=None, file_id: str = None) -> List[Stage]:
+    """The six compliance stages for a single upload (``loader`` reads the file).
+
+    ``display_columns`` are extra upload columns joined onto the report's obligations by row id.
+    With a ``dedup`` index, incidents another upload already brought in are dropped before the rules run.
+    """
+    rule_engine = RuleEngine(policy_file)
+    segregator = DataSegregator()
+    generator = ReportGenerator()
+    resolve_pairs = _pair_resolver()
+
+    def deduplicate(loaded):
+        records, skipped = dedup.filter({file_id: loaded})
+        return {'records': records[file_id], 'dedup_skipped': skipped[file_id]}
+
+    def parse(ruled, knowledge_base):
+        return {'parsed': ComplianceParser(knowledge_base, mode=mode).parse(ruled)}
+
+    def report(parsed, filepath):
+        return {'report': generator.generate(parsed, _display_frame(filepath, parsed, display_columns))}
+
+    source = 'loaded' if dedup is not None else 'records'
+    columns = INPUT_COLUMNS + [DEDUP_KEY] if dedup is not None else INPUT_COLUMNS
+
+    return [
+        Stage('Data Upload', 'File uploaded and validated',
+              lambda filepath: {source: loader(filepath, columns)},
+              inputs=['filepath'], outputs=[source], process='System',
+              start_message='Reading uploaded file...', done_message='Loaded {count} records',
+              count=lambda o: len(o[source])),
+        *_dedup_stages(dedup, deduplicate, count=lambda o: len(o['records']), merge={'dedup_skipped': sum}),
+        Stage('Rule Application', 'Applying policy rules to data',
+              lambda records: {'ruled': rule_engine.apply_rules(records)},
+              inputs=['records'], outputs=['ruled'], process='rule_engine', checkpoint='rules',
+              start_message='Applying policy rules...', done_message='Applied rules to {count} records',
+              count=lambda o: len(o['ruled'])),
+        Stage('Data Segregation', 'Extracting unique action-reason pairs',
+              lambda ruled: {'pairs': segregator.extract_unique_pairs(ruled)},
+              inputs=['ruled'], outputs=['pairs'], process='data_segregation', checkpoint='pairs',
+              start_message='Extracting unique action-reason pairs...', done_message='Extracted {count} unique pairs',
+              count=lambda o: len(o['pairs']), merge={'pairs': _union_pairs}),
+        Stage('LLM Reasoner', 'Fetching compliance metadata',
+              lambda pairs: {'knowledge_base': resolve_pairs(pairs)},
+              inputs=['pairs'], outputs=['knowledge_base'], process='llm_reasoner', checkpoint='kb',
+              start_message='Fetching compliance metadata from LLM...', done_message='Built KB with {count} entries',
+              count=lambda o: len(o['knowledge_base']), merge={'knowledge_base': _union_kb},
+              enabled=(mode == 'full'), disabled_outputs={'knowledge_base': {}},
+              disabled_message=f'Skipped ({mode} mode)'),
+        Stage('Compliance Parser', 'Parsing compliance obligations', parse,
+              inputs=['ruled', 'knowledge_base'], outputs=['parsed'], process='compliance_parser', checkpoint='parsed',
+              start_message='Parsing compliance obligations...', done_message='Parsed {count} records',
+              count=lambda o: len(o['parsed']), merge={'parsed': _concat_frames}),
+        Stage('Report Generation', 'Generating final report', report,
+              inputs=['parsed', 'filepath'], outputs=['report'], process='report_generation',
+              start_message='Generating compliance report...', done_message='Report generated with {count} obligations',
+              count=lambda o: len(o['report']['obligations']))
+    ]
+
+# Stages that run per chunk (and overlap with each other) in chunked mode
+CHUNK_STAGES = ['Deduplication', 'Rule Application', 'Data Segregation', 'LLM Reasoner', 'Compliance Parser']
+
+def build_batch_stages(policy_file: str, mode: str, pool, display_columns: Optional[List[str]] = None,
+                       dedup=None) -> List[Stage]:
+    """The same six stages over several uploads, with one shared KB resolution"""
+    rule_engine = RuleEngine(policy_file)
+    segregator = DataSegregator()
+    generator = ReportGenerator()
+    resolve_pairs = _pair_resolver()
+
+    def per_file(func, frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        file_ids = list(frames)
+        return dict(zip(file_ids, pool.map(func, [frames[f] for f in file_ids])))
+
+    source = 'loaded' if dedup is not None else 'records'
+    columns = INPUT_COLUMNS + [DEDUP_KEY] if dedup is not None else INPUT_COLUMNS
+
+    def read(filepaths):
+        return {source: per_file(lambda filepath: load_projected(filepath, columns), filepaths)}
+
+    def deduplicate(loaded):
+        # In request order, so the first file of the batch keeps an incident shared with later ones
+        records, skipped = dedup.filter(loaded)
+        return {'records': records, 'dedup_skipped': skipped}
+
+    def segregate(ruled):
+        pair_frames = [df[['action', 'reason']] for df in ruled.values() if 'action' in df.columns]
+        if not pair_frames:
+            return {'pairs': []}
+        return {'pairs': segregator.extract_unique_pairs(pd.concat(pair_frames, ignore_index=True))}
+
+    def parse(ruled, knowledge_base):
+        parser = ComplianceParser(knowledge_base, mode=mode)
+        return {'parsed': per_file(parser.parse, ruled)}
+
+    def report(parsed, filepaths):
+        file_reports = []
+        combined_obligations = []
+        for file_id, df in parsed.items():
+            file_report = generator.generate(df, _display_frame(filepaths[file_id], df, display_columns))
+            for obligation in file_report['obligations']:
+                obligation['file_id'] = file_id
+            combined_obligations.extend(file_report['obligations'])
+            file_reports.append({
+                'file_id': file_id,
+                'records_processed': len(df),
+                'obligations_generated': len(file_report['obligations']),
+                'summary': file_report['summary']
+            })
+        combined = {'obligations': combined_obligations, 'summary': ReportGenerator.summarize(combined_obligations)}
+        return {'file_reports': file_reports, 'report': combined}
+
+    def total_rows(frames):
+        return sum(len(df) for df in frames.values())
+
+    return [
+        Stage('Data Upload', 'Files uploaded and validated', read,
+              inputs=['filepaths'], outputs=[source], process='System',
+              start_message='Reading uploaded files...', done_message='Loaded {count} records',
+              count=lambda o: total_rows(o[source])),
+        *_dedup_stages(dedup, deduplicate, count=lambda o: total_rows(o['records'])),
+        Stage('Rule Application', 'Applying policy rules to each file',
+              lambda records: {'ruled': per_file(rule_engine.apply_rules, records)},
+              inputs=['records'], outputs=['ruled'], process='rule_engine',
+              start_message='Applying policy rules...', done_message='Applied rules to {count} records',
+              count=lambda o: total_rows(o['ruled'])),
+        Stage('Data Segregation', 'Extracting unique action-reason pairs across all files', segregate,
+              inputs=['ruled'], outputs=['pairs'], process='data_segregation',
+              start_message='Extracting unique action-reason pairs...', done_message='Extracted {count} unique pairs',
+              count=lambda o: len(o['pairs'])),
+        Stage('LLM Reasoner', 'Fetching compliance metadata once for the batch',
+              lambda pairs: {'knowledge_base': resolve_pairs(pairs)},
+              inputs=['pairs'], outputs=['knowledge_base'], process='llm_reasoner',
+              start_message='Fetching compliance metadata from LLM...', done_message='Built KB with {count} entries',
+              count=lambda o: len(o['knowledge_base']),
+              enabled=(mode == 'full'), disabled_outputs={'knowledge_base': {}},
+              disabled_message=f'Skipped ({mode} mode)'),
+        Stage('Compliance Parser', 'Parsing compliance obligations per file', parse,
+              inputs=['ruled', 'knowledge_base'], outputs=['parsed'], process='compliance_parser',
+              start_message='Parsing compliance obligations...', done_message='Parsed {count} records',
+              count=lambda o: total_rows(o['parsed'])),
+        Stage('Report Generation', 'Generating per-file and combined reports', report,
+              inputs=['parsed', 'filepaths'], outputs=['file_reports', 'report'], process='report_generation',
+              start_message='Generating compliance reports...', done_message='Reports generated with {count} obligations',
+              count=lambda o: len(o['report']['obligations']))
+    ]
+
+def _dedup_stages(dedup, func: Callable, count: Callable[[Dict], int], merge: Dict = None) -> List[Stage]:
+    """The Deduplication stage, when a dedup index is in use"""
+    if dedup is None:
+        return []
+    return [Stage('Deduplication', 'Skipping incidents seen in earlier uploads', func,
+                  inputs=['loaded'], outputs=['records', 'dedup_skipped'], process='System',
+                  start_message=f'Checking {DEDUP_KEY} against earlier uploads...',
+                  done_message='Kept {count} new incidents', count=count, merge=merge)]
+
+def _display_frame(filepath: str, parsed: pd.DataFrame, columns: Optional[List[str]]) -> Optional[pd.DataFrame]:
+    """Upload fields joined onto the report by row id: the incident's event_time plus any requested ``columns``"""
+    if ROW_ID not in parsed.columns:
+        return None
+    row_ids = parsed[ROW_ID].to_numpy()
+    display = load_upload_rows(filepath, row_ids, columns=columns) if columns else pd.DataFrame(index=pd.Index(row_ids))
+    display['event_time'] = _event_times(filepath, row_ids)
+    return display
+
+def _event_times(filepath: str, row_ids: np.ndarray) -> np.ndarray:
+    """Normalized ISO incident times from the upload's time index (None where unparsable)"""
+    try:
+        epochs = get_time_index(filepath).epochs[row_ids]
+    except Exception as e:
+        print(f"Warning: Could not read incident times: {str(e)}")
+        return np.full(len(row_ids), None, dtype=object)
+    times = np.datetime_as_string(epochs.astype('datetime64[s]')).astype(object)
+    times[epochs == NO_TIME] = None
+    return times
+
+def _pair_resolver():
+    """Resolve pairs through the LLM reasoner, remembering what earlier calls resolved"""
+    resolved = {}
+    reasoner = []
+
+    def resolve(pairs: List[Dict]) -> Dict:
+        keys = [f"{p.get('action', '')}||{p.get('reason', '')}" for p in pairs]
+        missing = [p for p, key in zip(pairs, keys) if key not in resolved]
+        if missing:
+            if not reasoner:
+                reasoner.append(LLMReasoner())
+            resolved.update(reasoner[0].build_knowledge_base(missing))
+        return {key: resolved[key] for key in keys if key in resolved}
+
+    return resolve
+
+def _union_pairs(chunk_pairs: List[List[Dict]]) -> List[Dict]:
+    seen = {}
+    for pairs in chunk_pairs:
+        for pair in pairs:
+            seen.setdefault((pair['action'], pair['reason']), pair)
+    return list(seen.values())
+
+def _union_kb(chunk_kbs: List[Dict]) -> Dict:
+    kb = {}
+    for chunk_kb in chunk_kbs:
+        kb.update(chunk_kb)
+    return kb
+
+def _concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    # Chunks carry their own categories, so re-apply the schema after concatenating
+    return apply_schema(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
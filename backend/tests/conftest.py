@@ -0,0 +1,51 @@
+# tests/conftest.py - Run every test from a fresh working directory (storage paths are relative to it)
+
+import os
+import sys
+import shutil
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """A scratch backend directory with the policy rules and empty data folders"""
+    shutil.copy(os.path.join(BACKEND, 'policy_rules.yaml'), tmp_path)
+    for folder in ('data/uploads', 'data/processed', 'data/kb_cache'):
+        os.makedirs(tmp_path / folder)
+    monkeypatch.chdir(tmp_path)
+    _reset_module_state()
+    yield tmp_path
+    _reset_module_state()
+
+
+def _reset_module_state():
+    """Forget what storage modules cached about the previous test's files"""
+    from database import csv_storage, sqlite_storage, dedup_index, run_archive
+    # Queued log/KB writes belong to the previous test's directory
+    csv_storage._writer.wait_idle(timeout=5)
+    csv_storage._log_rows.clear()
+    csv_storage._files_ready.clear()
+    csv_storage._tables._tables.clear()
+    csv_storage._aggregates.reset(None)
+    sqlite_storage._aggregates.reset(None)
+    # The per-thread SQLite connection points at the previous test's database file
+    conn = getattr(sqlite_storage._local, 'conn', None)
+    if conn is not None:
+        conn.close()
+    sqlite_storage._local.__dict__.clear()
+    sqlite_storage._initialized.clear()
+    dedup_index._index = None
+    run_archive._archive = None
+
+
+@pytest.fixture
+def client():
+    from app import app
+    import api.compliance
+    api.compliance.clear_compliance_results()
+    app.config['TESTING'] = True
+    return app.test_client()
@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+
+from pipeline.checkpoint import CheckpointStore
+
+
+def _store(run_id='run-1', file_id='events.csv', mode='full'):
+    store = CheckpointStore(run_id)
+    store.open(file_id, mode)
+    return store
+
+
+def test_stage_outputs_round_trip():
+    store = _store()
+    store.save('frame', pd.DataFrame({'a': [1, 2]}))
+    store.save('pairs', [{'action': 'alert', 'reason': 'r'}])
+    store.save('kb', {'k1': {'answer': 'yes'}, 'k2': None})
+
+    assert store.load('frame')['a'].tolist() == [1, 2]
+    assert store.load('pairs') == [{'action': 'alert', 'reason': 'r'}]
+    assert store.load('kb') == {'k1': {'answer': 'yes'}, 'k2': None}
+
+
+def test_resume_point_is_the_last_stage_on_disk():
+    store = _store()
+    assert store.last_completed() is None
+    store.save('parsed', pd.DataFrame({'a': [1]}))
+    store.save('pairs', [])
+    assert store.last_completed() == 'pairs'
+    assert store.has('parsed') and store.has('pairs') and not store.has('kb')
+
+    # A reopened run sees the same checkpoints; a lost file is no longer a resume point
+    reopened = _store()
+    os.remove(reopened._path('pairs'))
+    assert reopened.last_completed() == 'parsed'
+
+
+def test_checkpoints_of_another_file_or_mode_are_discarded():
+    _store().save('parsed', pd.DataFrame({'a': [1]}))
+    assert _store(file_id='other.csv').last_completed() is None
+    _store().save('parsed', pd.DataFrame({'a': [1]}))
+    assert _store(mode='sample').last_completed() is None
+
+
+def test_clear_removes_the_run():
+    store = _store()
+    store.save('parsed', pd.DataFrame({'a': [1]}))
+    store.clear()
+    assert not os.path.exists(store.run_dir)
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+
+import api.compliance
+from database.run_archive import get_run_archive
+
+
+def _results(count):
+    frameworks, statuses = ['GDPR', 'HIPAA'], ['Compliant', 'Non-Compliant', 'Requires Action']
+    return [{
+        'obligationId': f'OB-{i}', 'framework': frameworks[i % 2], 'status': statuses[i % 3],
+        'severity': 'high' if i % 4 == 0 else 'low', 'action': 'monitor', 'confidence_score': round(50 + i / 3, 2),
+        'event_time': f'2024-01-{1 + i % 20:02d}T{i % 24:02d}:00:00'
+    } for i in range(count)]
+
+
+@pytest.fixture
+def results(client):
+    records = _results(120)
+    api.compliance.replace_compliance_results(records)
+    return records
+
+
+def test_results_filters_and_pages(client, results):
+    body = client.get('/api/compliance/results?framework=GDPR&status=Compliant&limit=5&offset=5').get_json()
+    expected = [r for r in results if r['framework'] == 'GDPR' and r['status'] == 'Compliant']
+    assert body['total'] == len(expected)
+    assert (body['count'], body['limit'], body['offset']) == (5, 5, 5)
+    assert [r['obligationId'] for r in body['results']] == [r['obligationId'] for r in expected[5:10]]
+    assert body['results'][0]['confidence_score'] == expected[5]['confidence_score']
+
+
+def test_results_time_window(client, results):
+    body = client.get('/api/compliance/results?start=2024-01-05T00:00:00&end=2024-01-07T00:00:00&limit=500').get_json()
+    expected = [r for r in results if '2024-01-05' <= r['event_time'] < '2024-01-07']
+    assert body['total'] == len(expected) > 0
+
+
+def test_unfiltered_page_past_the_end_is_empty(client, results):
+    body = client.get('/api/compliance/results?offset=500').get_json()
+    assert (body['results'], body['count'], body['total']) == ([], 0, 120)
+
+
+def test_result_by_id_and_bulk(client, results):
+    ids = [r['id'] for r in results]
+    one = client.get(f'/api/compliance/results/{ids[7]}')
+    assert one.status_code == 200 and one.get_json()['obligationId'] == 'OB-7'
+    assert client.get('/api/compliance/results/nope').status_code == 404
+
+    body = client.post('/api/compliance/results/bulk', json={'ids': [ids[3], 'nope', ids[1]]}).get_json()
+    assert [r['obligationId'] for r in body['results']] == ['OB-3', 'OB-1']
+    assert (body['count'], body['missing']) == (2, ['nope'])
+    by_query = client.get(f'/api/compliance/results/bulk?ids={ids[2]},{ids[0]}').get_json()
+    assert [r['obligationId'] for r in by_query['results']] == ['OB-2', 'OB-0']
+    assert client.post('/api/compliance/results/bulk', json={'ids': 'x'}).status_code == 400
+
+
+def test_summary(client, results):
+    body = client.get('/api/compliance/summary').get_json()
+    assert body['total'] == 120
+    assert body['compliant'] + body['non_compliant'] + body['requires_action'] == 120
+    assert body['by_framework'] == {'GDPR': 60, 'HIPAA': 60}
+
+
+def test_history_across_runs(client):
+    archive = get_run_archive()
+    archive.archive_run('r1', _results(30), mode='full', run_time=datetime(2024, 3, 1, 12))
+    archive.archive_run('r2', _results(20), mode='full', run_time=datetime(2024, 3, 5, 12))
+
+    body = client.get('/api/compliance/history?start_date=2024-03-02&framework=GDPR&limit=100').get_json()
+    assert body['total'] == 10
+    assert {r['run_id'] for r in body['results']} == {'r2'}
+
+    paged = client.get('/api/compliance/history?limit=7&offset=45&columns=run_id,status').get_json()
+    assert (paged['total'], paged['count']) == (50, 5)
+    assert set(paged['results'][0]) == {'run_id', 'status'}
+
+    runs = client.get('/api/compliance/history/runs').get_json()
+    assert [r['run_id'] for r in runs['runs']] == ['r1', 'r2']
+    trend = client.get('/api/compliance/history/trend?group_by=framework').get_json()['trend']
+    assert {(t['run_date'], t['framework']): t['count'] for t in trend}[('2024-03-01', 'GDPR')] == 15
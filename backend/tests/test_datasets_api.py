@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from database.upload_store import convert_to_columnar
+
+
+@pytest.fixture
+def dataset():
+    """Events whose timestamps run backwards through the file, so row order and time order differ"""
+    count = 200
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=count, freq='h')[::-1].strftime('%Y-%m-%dT%H:%M:%S'),
+        'severity': np.where(np.arange(count) % 2, 'high', 'low'),
+        'affected_users': [f'user{i % 3};user9' for i in range(count)],
+        'response_actions': ['notify_admin'] * count,
+        'correlation_score': np.arange(count) / 4
+    })
+    df.to_csv('data/uploads/events.csv', index=False)
+    convert_to_columnar('data/uploads/events.csv')
+    return df
+
+
+def test_lookup_by_term(client, dataset):
+    response = client.get('/api/datasets/events.csv/lookup?affected_users=user1&limit=1000')
+    assert response.status_code == 200
+    assert response.get_json()['row_ids'] == [i for i in range(len(dataset)) if i % 3 == 1]
+
+
+def test_lookup_returns_the_page_rows(client, dataset):
+    body = client.get('/api/datasets/events.csv/lookup?affected_users=user2&affected_users=user9'
+                      '&limit=2&offset=1&columns=correlation_score').get_json()
+    assert body['total'] == len(range(2, len(dataset), 3))
+    assert body['row_ids'] == [5, 8]
+    assert [row['correlation_score'] for row in body['rows']] == [1.25, 2.0]
+
+
+def test_lookup_in_window_with_terms_is_in_time_order(client, dataset):
+    response = client.get('/api/datasets/events.csv/lookup?affected_users=user1'
+                          '&start=2024-01-02T00:00:00&end=2024-01-05T00:00:00&limit=1000&columns=timestamp')
+    body = response.get_json()
+    times = pd.to_datetime(dataset['timestamp'])
+    in_window = (times >= '2024-01-02') & (times < '2024-01-05') & (np.arange(len(dataset)) % 3 == 1)
+    assert body['total'] == int(in_window.sum())
+    assert sorted(body['row_ids']) == list(np.flatnonzero(in_window))
+    returned = [row['timestamp'] for row in body['rows']]
+    assert returned == sorted(returned)
+
+
+def test_timeline_counts_by_day(client, dataset):
+    body = client.get('/api/datasets/events.csv/timeline?granularity=day&start=2024-01-08T00:00:00').get_json()
+    assert [(b['start'], b['count']) for b in body['buckets']] == [('2024-01-08T00:00:00', 24), ('2024-01-09T00:00:00', 8)]
+    assert body['buckets'][0]['severity'] == {'high': 12, 'low': 12}
+    assert body['range']['min'] == '2024-01-01T00:00:00'
+
+
+def test_lookup_needs_a_term_or_window(client, dataset):
+    assert client.get('/api/datasets/events.csv/lookup').status_code == 400
+    assert client.get('/api/datasets/missing.csv/lookup?affected_users=user1').status_code == 404
+
+
+def test_profile(client, dataset):
+    profile = client.get('/api/datasets/events.csv/profile').get_json()['profile']
+    scores = profile['scores']['correlation_score']
+    assert (scores['count'], scores['min'], scores['max']) == (200, 0.0, 49.75)
+    assert scores['mean'] == dataset['correlation_score'].mean()
+    assert scores['quantiles']['p50'] == dataset['correlation_score'].quantile(0.5)
+    assert {v['value']: v['count'] for v in profile['top_values']['severity']['values']} == {'high': 100, 'low': 100}
+    assert profile['timestamp']['min'] == '2024-01-01T00:00:00'
+    assert client.get('/api/datasets/events.csv/profile').get_json()['profile'] == profile
+
+
+def test_query_endpoint(client, dataset):
+    response = client.post('/api/datasets/events.csv/query', json={
+        'group_by': 'severity', 'aggregates': [{'column': 'correlation_score', 'func': 'max'}]})
+    groups = {g['severity']: g for g in response.get_json()['groups']}
+    assert groups['high']['count'] == 100
+    assert groups['high']['correlation_score_max'] == 49.75
+    bad = client.post('/api/datasets/events.csv/query', json={'group_by': 'severity', 'aggregates': ['mean']})
+    assert bad.status_code == 400
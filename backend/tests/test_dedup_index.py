@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from database.dedup_index import DEDUP_KEY, DedupIndex, hash_keys
+from database.upload_store import convert_to_columnar
+
+
+def _upload(name, ids):
+    path = f'data/uploads/{name}'
+    pd.DataFrame({DEDUP_KEY: ids, 'severity': 'low'}).to_csv(path, index=False)
+    convert_to_columnar(path)
+    return path
+
+
+@pytest.fixture(params=[True, False], ids=['bloom', 'exact'])
+def index(request):
+    return DedupIndex(bloom=request.param)
+
+
+def test_incidents_of_earlier_uploads_are_dropped(index):
+    assert index.register('a.csv', _upload('a.csv', ['c1', 'c2', 'c3'])) == 3
+    frames = {'b.csv': pd.DataFrame({DEDUP_KEY: ['c2', 'c4', None, 'c3'], 'value': [1, 2, 3, 4]})}
+    filtered, skipped = index.filter(frames)
+    assert skipped == {'b.csv': 2}
+    assert filtered['b.csv']['value'].tolist() == [2, 3]
+    assert DEDUP_KEY not in filtered['b.csv'].columns
+
+
+def test_an_upload_never_dedups_against_itself(index):
+    index.register('a.csv', _upload('a.csv', ['c1', 'c2']))
+    filtered, skipped = index.filter({'a.csv': pd.DataFrame({DEDUP_KEY: ['c1', 'c2'], 'value': [1, 2]})})
+    assert skipped == {'a.csv': 0}
+    # Registering it again adds nothing
+    assert index.register('a.csv', _upload('a.csv', ['c1', 'c2'])) == 0
+
+
+def test_earlier_files_of_the_same_batch_win(index):
+    frames = {
+        'a.csv': pd.DataFrame({DEDUP_KEY: ['x', 'y'], 'value': [1, 2]}),
+        'b.csv': pd.DataFrame({DEDUP_KEY: ['y', 'z'], 'value': [3, 4]})
+    }
+    filtered, skipped = index.filter(frames)
+    assert skipped == {'a.csv': 0, 'b.csv': 1}
+    assert filtered['b.csv']['value'].tolist() == [4]
+
+
+def test_other_processes_see_registrations_and_clear(index):
+    index.register('a.csv', _upload('a.csv', [f'id{i}' for i in range(1000)]))
+    other = DedupIndex()
+    assert other.stats()['incidents'] == 1000
+    owners = other.owners_of(hash_keys(pd.Series(['id5', 'unknown', None])))
+    assert owners.tolist() == [0, -1, -1]
+
+    index.clear()
+    assert other.stats()['incidents'] == 0
+
+
+def test_bloom_filter_has_no_false_negatives():
+    index = DedupIndex(bloom=True)
+    ids = [f'id{i}' for i in range(20000)]
+    index.register('a.csv', _upload('a.csv', ids))
+    assert (index.owners_of(hash_keys(pd.Series(ids))) == 0).all()
+    unseen = hash_keys(pd.Series([f'other{i}' for i in range(20000)]))
+    assert index.bloom.might_contain(unseen).mean() < 0.03
+    assert (index.owners_of(unseen) == -1).all()
+
+
+def test_bloom_bits_are_persisted_and_extended_in_place():
+    index = DedupIndex(bloom=True)
+    index.register('a.csv', _upload('a.csv', [f'a{i}' for i in range(1000)]))
+    size, bits = index.bloom.size, np.array(index.bloom.bits)
+
+    # Room for twice the incidents: the second upload only sets its own bits
+    index.register('b.csv', _upload('b.csv', [f'b{i}' for i in range(500)]))
+    assert index.bloom.size == size
+    assert ((np.asarray(index.bloom.bits) & bits) == bits).all()
+
+    other = DedupIndex(bloom=True)
+    other.stats()
+    assert isinstance(other.bloom.bits, np.memmap)
+    assert other.bloom.size == size
+    assert (other.owners_of(hash_keys(pd.Series(['a1', 'b1', 'c1']))) == [0, 1, -1]).all()
+
+    # Past its capacity the filter is rebuilt larger
+    index.register('c.csv', _upload('c.csv', [f'c{i}' for i in range(1000)]))
+    assert index.bloom.size > size
+    assert (index.owners_of(hash_keys(pd.Series(['a1', 'b1', 'c1']))) == [0, 1, 2]).all()
@@ -0,0 +1,36 @@
+import pytest
+
+import api.compliance
+import database
+from api.execute import _publish_results
+from app import app
+from database.run_archive import get_run_archive
+
+
+def _obligations(count):
+    return [{'framework': 'GDPR', 'obligationId': f'OB-{i}', 'status': 'Compliant', 'severity': 'low',
+             'action': 'monitor', 'confidence_score': 70.0} for i in range(count)]
+
+
+def test_published_results_carry_storage_ids(client):
+    with app.app_context():
+        _publish_results(_obligations(3), 'run-1', 'full')
+    current = api.compliance.compliance_results
+    assert [r['obligationId'] for r in current] == ['OB-0', 'OB-1', 'OB-2']
+    assert sorted(r['id'] for r in current) == sorted(r['id'] for r in database.get_compliance_results(limit=10))
+
+    archived = get_run_archive().query(columns=['run_id', 'id'], limit=10)['results']
+    assert sorted(r['id'] for r in archived) == sorted(r['id'] for r in current)
+
+
+def test_failed_save_keeps_the_previous_results(client, monkeypatch):
+    with app.app_context():
+        _publish_results(_obligations(2), 'run-1', 'full')
+        previous = list(api.compliance.compliance_results)
+
+        monkeypatch.setattr(database, 'save_compliance_results', lambda records, replace=False: [])
+        with pytest.raises(RuntimeError):
+            _publish_results(_obligations(5), 'run-2', 'full')
+    assert list(api.compliance.compliance_results) == previous
+    # Only the stored run is archived
+    assert [run['run_id'] for run in get_run_archive().runs()] == ['run-1']
@@ -0,0 +1,51 @@
+import numpy as np
+
+from database.result_index import ResultIndex
+
+
+def _records(count):
+    frameworks, statuses = ['GDPR', 'HIPAA', 'SOX'], ['Compliant', 'Non-Compliant']
+    return [{'framework': frameworks[i % 3], 'status': statuses[i % 2], 'severity': 'high' if i % 5 == 0 else 'low',
+             'action': None if i % 7 == 0 else 'monitor', 'confidence_score': i / 2} for i in range(count)]
+
+
+def _expected(records, **filters):
+    return [i for i, r in enumerate(records) if all(r.get(k) == v for k, v in filters.items())]
+
+
+def test_positions_match_a_scan():
+    records = _records(1000)
+    index = ResultIndex(records)
+    for filters in ({'framework': 'GDPR'}, {'framework': 'HIPAA', 'status': 'Compliant'},
+                    {'framework': 'SOX', 'status': 'Non-Compliant', 'severity': 'high', 'action': 'monitor'},
+                    {'framework': 'PCI'}):
+        assert index.positions(filters).tolist() == _expected(records, **filters)
+    assert index.positions({}) is None
+    assert index.positions({'framework': None, 'unknown': 'x'}) is None
+
+
+def test_rows_added_after_a_query_are_indexed():
+    records = _records(10)
+    index = ResultIndex(records[:5])
+    assert index.positions({'framework': 'GDPR'}).tolist() == [0, 3]
+    index.add(records[5])
+    index.extend(records[6:])
+    assert index.positions({'framework': 'GDPR'}).tolist() == [0, 3, 6, 9]
+    assert len(index) == 10
+
+
+def test_ids_are_assigned_and_looked_up():
+    index = ResultIndex(_records(20) + [{'id': 'given', 'framework': 'GDPR'}])
+    ids = [index.records[i]['id'] for i in range(20)]
+    assert len(set(ids)) == 20
+    assert index.get('given')['framework'] == 'GDPR'
+    assert index.get(ids[7])['confidence_score'] == 3.5
+    assert index.get('missing') is None
+    assert [r and r['id'] for r in index.get_many([ids[3], 'missing', ids[1]])] == [ids[3], None, ids[1]]
+
+
+def test_missing_values_are_their_own_posting():
+    records = _records(50)
+    index = ResultIndex(records)
+    assert index.positions({'action': 'monitor'}).tolist() == _expected(records, action='monitor')
+    assert np.all(np.diff(index.positions({'action': 'monitor'})) > 0)
@@ -0,0 +1,76 @@
+import json
+import math
+import random
+
+from flask import Flask, jsonify
+
+from database.result_store import ResultStore
+
+
+def _records(count=200, seed=7):
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        records.append({
+            'id': str(i),
+            'framework': rng.choice(['GDPR', 'HIPAA', None]),
+            'status': rng.choice(['Compliant', 'Non-Compliant']),
+            'confidence_score': round(rng.uniform(0, 100), 2),
+            'row_id': i,
+            'description': f'desc {i}',
+            'event_time': '2026-01-01T00:00:00'
+        })
+    return records
+
+
+def _json(value):
+    app = Flask(__name__)
+    with app.app_context():
+        return jsonify(value).get_data(as_text=True)
+
+
+def _cleaned(record):
+    """What the endpoints returned before the columnar store: NaN/inf cleaned per key"""
+    return {k: (None if isinstance(v, float) and (math.isnan(v) or math.isinf(v)) else v) for k, v in record.items()}
+
+
+def test_records_serialize_like_the_cleaned_dicts():
+    records = _records()
+    records[3]['confidence_score'] = float('nan')
+    records[4]['confidence_score'] = float('inf')
+    records[5].update(confidence_score=21.99)
+    records[6].update(confidence_score=20.56)
+    records[7].update(confidence_score=20.71)
+    store = ResultStore([dict(r) for r in records])
+
+    assert json.loads(_json(store.take(range(len(records))))) == [_cleaned(r) for r in records]
+    assert store.record(3) == _cleaned(records[3])
+    assert json.loads(_json(store.record(-1))) == records[-1]
+    text = _json(store.take([5, 6, 7]))
+    assert '21.99' in text and '20.56' in text and '20.71' in text
+    assert '999999' not in text and '000000' not in text
+
+
+def test_masks_nan_and_inf_on_insert():
+    store = ResultStore([{'score': 1.5}, {'score': float('nan')}, {'score': float('-inf')}])
+    assert [r['score'] for r in store] == [1.5, None, None]
+
+
+def test_appends_fold_into_columns_and_keep_types():
+    store = ResultStore([{'id': str(i), 'status': 'Compliant', 'row_id': i} for i in range(4)])
+    store.append({'id': '4', 'status': 'New', 'row_id': 4})
+    store.append({'id': '5', 'status': 'Compliant'})
+
+    assert len(store) == 6
+    assert store[4] == {'id': '4', 'status': 'New', 'row_id': 4}
+    assert store[5]['row_id'] is None
+    assert store[-1]['id'] == '5'
+    assert [r['id'] for r in store.take([5, 0])] == ['5', '0']
+    assert store.value_counts('status') == {'Compliant': 5, 'New': 1}
+    assert store.value_counts('missing_field') == {'Unknown': 6}
+
+
+def test_empty_page():
+    store = ResultStore()
+    assert store.take([]) == []
+    assert list(store) == []
@@ -0,0 +1,37 @@
+import itertools
+
+import pandas as pd
+
+from database.upload_store import load_upload
+from pipeline.rule_engine import RuleEngine
+
+
+def _first_match(rules, row):
+    """The rule a row gets, checked one condition at a time"""
+    def meets(value, condition):
+        if '>=' in condition:
+            return value >= float(condition.replace('>=', ''))
+        return value < float(condition.replace('<', ''))
+    for rule in rules:
+        c = rule['conditions']
+        if (meets(row['final_confidence_score'], c['final_confidence_score'])
+                and meets(row['false_positive_likelihood'], c['false_positive_likelihood'])
+                and meets(row['correlation_score'], c['correlation_score'])
+                and row['severity'].lower() in c['severity']):
+            return rule['id']
+    return 'default'
+
+
+def test_rules_on_a_loaded_upload_match_row_by_row_evaluation():
+    # Every combination around the thresholds, including values exactly on them
+    combos = itertools.product([0.499999999, 0.5, 0.7], [0.3, 0.49, 0.5, 0.51], [79.99, 80.0, 80.01], ['Low', 'high', 'CRITICAL'])
+    df = pd.DataFrame(combos, columns=['final_confidence_score', 'false_positive_likelihood', 'correlation_score', 'severity'])
+    df.to_csv('data/uploads/events.csv', index=False)
+
+    loaded = load_upload('data/uploads/events.csv')
+    assert loaded['false_positive_likelihood'].tolist() == df['false_positive_likelihood'].tolist()
+
+    engine = RuleEngine('policy_rules.yaml')
+    result = engine.apply_rules(loaded)
+    expected = [_first_match(engine.rules, row) for row in df.to_dict('records')]
+    assert result['rule_id'].astype(str).tolist() == expected
@@ -0,0 +1,83 @@
+import os
+
+import pandas as pd
+import pytest
+
+from pipeline.checkpoint import CheckpointStore
+from pipeline.runner import PipelineRunner, Stage
+
+
+class Calls:
+    def __init__(self, fail_at=None):
+        self.made = []
+        self.fail_at = fail_at
+
+    def stage(self, name, func):
+        def run(**inputs):
+            self.made.append(name)
+            if name == self.fail_at:
+                raise RuntimeError(f'{name} broke')
+            return func(**inputs)
+        return run
+
+
+def _stages(calls):
+    return [
+        Stage('Parse', 'parse', calls.stage('Parse', lambda raw: {'parsed': raw.assign(score=raw['value'] * 2)}),
+              inputs=['raw'], outputs=['parsed'], checkpoint='parsed'),
+        Stage('Rules', 'rules', calls.stage('Rules', lambda parsed: {'pairs': [
+                  {'action': 'monitor', 'reason': f'score {s}'} for s in parsed['score']]}),
+              inputs=['parsed'], outputs=['pairs'], checkpoint='pairs', count=lambda o: len(o['pairs'])),
+        Stage('Report', 'report', calls.stage('Report', lambda pairs: {'report': {'total': len(pairs)}}),
+              inputs=['pairs'], outputs=['report'])
+    ]
+
+
+def test_failed_run_resumes_from_its_last_checkpoint():
+    raw = pd.DataFrame({'value': [1, 2, 3]})
+    store = CheckpointStore('run-1')
+    store.open('events.csv', 'full')
+
+    failing = Calls(fail_at='Report')
+    with pytest.raises(RuntimeError):
+        PipelineRunner(_stages(failing), checkpoints=store).run({'raw': raw})
+    assert failing.made == ['Parse', 'Rules', 'Report']
+    assert store.last_completed() == 'pairs'
+
+    # A retry of the same run skips Parse entirely and restores Rules' output
+    retry = Calls()
+    store = CheckpointStore('run-1')
+    store.open('events.csv', 'full')
+    runner = PipelineRunner(_stages(retry), checkpoints=store)
+    context = runner.run({'raw': raw})
+    assert retry.made == ['Report']
+    assert context['report'] == {'total': 3}
+    assert context['pairs'][2] == {'action': 'monitor', 'reason': 'score 6'}
+    reports = {r['name']: r for r in runner.stage_reports}
+    assert reports['Rules']['resumed'] and reports['Rules']['recordsProcessed'] == 3
+    assert reports['Report']['status'] == 'completed'
+
+    store.clear()
+    assert not os.path.exists(store.run_dir)
+
+
+def test_chunked_run_merges_chunk_outputs():
+    calls = Calls()
+    stages = _stages(calls)
+    stages[1].merge = {'pairs': lambda parts: [pair for part in parts for pair in part]}
+    chunks = ({'parsed': pd.DataFrame({'score': [i, i + 1]})} for i in range(0, 10, 2))
+
+    runner = PipelineRunner(stages)
+    context = runner.run_chunked(chunks, source='Parse', chunk_stages=['Rules'])
+    assert context['report'] == {'total': 10}
+    assert calls.made.count('Rules') == 5
+    assert {r['name']: r['recordsProcessed'] for r in runner.stage_reports}['Rules'] == 10
+
+
+def test_chunked_run_stops_on_a_failing_stage():
+    stages = _stages(Calls(fail_at='Rules'))
+    chunks = ({'parsed': pd.DataFrame({'score': [i]})} for i in range(100))
+    runner = PipelineRunner(stages)
+    with pytest.raises(RuntimeError, match='Rules broke'):
+        runner.run_chunked(chunks, source='Parse', chunk_stages=['Rules'])
+    assert {r['name']: r['status'] for r in runner.stage_reports}['Rules'] == 'error'
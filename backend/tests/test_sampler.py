@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from pipeline.sampler import StratifiedSampler
+
+SEVERITIES = ['critical', 'high', 'medium', 'low']
+DOMAINS = ['access', 'data', 'network', 'finance', 'hr']
+
+
+def _population(seed, rows_per_stratum=990):
+    """20 equal strata (severity x domain), each with its own compliance rate"""
+    rates = np.random.default_rng(0).uniform(0.05, 0.95, len(SEVERITIES) * len(DOMAINS))
+    stratum = np.repeat(np.arange(len(rates)), rows_per_stratum)
+    compliant = np.random.default_rng(seed).random(len(stratum)) < rates[stratum]
+    return pd.DataFrame({
+        'severity': np.array(SEVERITIES)[stratum // len(DOMAINS)],
+        'primary_domain': np.array(DOMAINS)[stratum % len(DOMAINS)],
+        'status': np.where(compliant, 'Compliant', 'Non-Compliant')
+    })
+
+
+def _coverage(sample_size, runs=100):
+    covered, widths = 0, []
+    for seed in range(runs):
+        df = _population(seed)
+        sampler = StratifiedSampler(sample_size=sample_size, seed=seed)
+        report = sampler.estimate_summary(sampler.sample(df))
+        interval = report['confidence_intervals']['compliant']
+        truth = int((df['status'] == 'Compliant').sum())
+        covered += interval['low'] <= truth <= interval['high']
+        widths.append(interval['high'] - interval['low'])
+    return covered / runs, min(widths)
+
+
+def test_allocation_never_exceeds_sample_size():
+    df = _population(1)
+    for sample_size in (1, 5, 19, 20, 21, 40, 333):
+        sampler = StratifiedSampler(sample_size=sample_size)
+        sample = sampler.sample(df)
+        assert len(sample) == sampler.strata['sampled'].sum() == sample_size
+
+
+def test_small_strata_are_merged_so_each_has_two_rows():
+    sampler = StratifiedSampler(sample_size=20)
+    sampler.sample(_population(1))
+    assert (sampler.strata['sampled'] >= 2).all()
+    assert sampler.strata['population'].sum() == 19_800
+    report = sampler.estimate_summary(sampler.sample(_population(1)))['sample']['strata']
+    assert all(len(entry['strata']) == 2 for entry in report)
+
+
+def test_intervals_cover_the_truth_with_fewer_rows_than_strata():
+    coverage, narrowest = _coverage(sample_size=20)
+    assert coverage >= 0.9
+    assert narrowest > 0
+
+
+def test_intervals_cover_the_truth_at_larger_samples():
+    coverage, narrowest = _coverage(sample_size=500)
+    assert coverage >= 0.88
+    assert narrowest > 0
+
+
+def test_sample_at_least_population_is_exact():
+    df = _population(3, rows_per_stratum=5)
+    sampler = StratifiedSampler(sample_size=1000)
+    report = sampler.estimate_summary(sampler.sample(df))
+    truth = int((df['status'] == 'Compliant').sum())
+    assert report['summary']['compliant'] == truth
+    assert report['confidence_intervals']['compliant'] == {'low': truth, 'high': truth}
+    assert len(report['sample']['strata']) == 20
+    assert set(report['sample']['strata'][0]) == {'severity', 'primary_domain', 'population', 'sampled'}
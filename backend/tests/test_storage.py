@@ -0,0 +1,190 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from database import csv_storage, sqlite_storage
+from database.writer import StorageWriter
+from database.storage_common import COMPLIANCE_RESULTS_FILE, LOGS_FILE, log_segments
+
+# Small log segments keep the retention tests quick
+LOG_SEGMENT_ROWS = 20
+LOG_RETENTION = 60
+
+
+def _result(i, status='Compliant', framework='GDPR'):
+    return {'framework': framework, 'obligationId': f'OB-{i}', 'status': status, 'severity': 'high',
+            'action': 'monitor', 'confidence_score': 80.5}
+
+
+def _results(count, status='Compliant', framework='GDPR'):
+    return [{**_result(i, status, framework), 'file_id': 'events.csv'} for i in range(count)]
+
+
+@pytest.fixture(autouse=True)
+def small_log_segments(monkeypatch):
+    for module in (csv_storage, sqlite_storage):
+        monkeypatch.setattr(module, 'LOG_SEGMENT_ROWS', LOG_SEGMENT_ROWS)
+        monkeypatch.setattr(module, 'LOG_RETENTION', LOG_RETENTION)
+
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def backend(request):
+    return csv_storage if request.param == 'csv' else sqlite_storage
+
+
+def test_results_and_metrics(backend):
+    for i in range(6):
+        backend.save_compliance_result(_result(i, status='Non-Compliant' if i % 3 else 'Compliant'))
+
+    stored = backend.get_compliance_results(limit=100)
+    assert sorted(r['obligationId'] for r in stored) == [f'OB-{i}' for i in range(6)]
+    metrics = backend.get_dashboard_metrics()
+    assert (metrics['total_processed'], metrics['compliant'], metrics['non_compliant']) == (6, 2, 4)
+
+
+def test_filters_and_paging(backend):
+    for i in range(10):
+        backend.save_compliance_result({**_result(i, framework='HIPAA' if i >= 4 else 'GDPR'), 'file_id': 'events.csv'})
+    assert len(backend.get_compliance_results({'framework': 'HIPAA'}, limit=100)) == 6
+    assert len(backend.get_compliance_results({'framework': 'HIPAA'}, limit=4, offset=4)) == 2
+    # Fields outside the fixed columns survive and can be filtered on
+    assert len(backend.get_compliance_results({'file_id': 'events.csv'}, limit=100)) == 10
+
+
+def test_batches_are_appended_with_unique_ids(backend):
+    first = backend.save_compliance_results(_results(3))
+    second = backend.save_compliance_results(_results(2, status='Non-Compliant'))
+    ids = [r['id'] for r in first + second]
+    assert len(set(ids)) == 5
+
+    stored = backend.get_compliance_results(limit=100)
+    assert sorted(r['id'] for r in stored) == sorted(ids)
+    assert {r['file_id'] for r in stored} == {'events.csv'}
+
+    metrics = backend.get_dashboard_metrics()
+    assert (metrics['total_processed'], metrics['compliant'], metrics['non_compliant']) == (5, 3, 2)
+
+
+def test_batch_values_are_cleaned(backend):
+    saved = backend.save_compliance_results([{**_result(0), 'confidence_score': float('nan')},
+                                             {**_result(1), 'confidence_score': float('inf')}])
+    assert [r['confidence_score'] for r in saved] == [None, None]
+    assert len({r['created_at'] for r in saved}) == 1
+
+
+def test_replace_keeps_only_the_latest_run(backend):
+    backend.save_compliance_results(_results(5))
+    for _ in range(3):
+        backend.save_compliance_results(_results(4), replace=True)
+    assert len(backend.get_compliance_results(limit=100)) == 4
+    assert backend.get_dashboard_metrics()['total_processed'] == 4
+
+    backend.save_compliance_results([], replace=True)
+    assert backend.get_compliance_results(limit=100) == []
+    assert backend.get_dashboard_metrics()['total_processed'] == 0
+
+
+def test_metrics_follow_a_clear(backend):
+    backend.save_compliance_results(_results(3))
+    assert backend.get_dashboard_metrics()['total_processed'] == 3
+    assert backend.clear_all_compliance_results()
+    assert backend.get_dashboard_metrics()['total_processed'] == 0
+    backend.save_compliance_results(_results(2, status='Non-Compliant'))
+    backend.save_compliance_results(_results(1), replace=True)
+    metrics = backend.get_dashboard_metrics()
+    assert (metrics['total_processed'], metrics['compliant'], metrics['non_compliant']) == (1, 1, 0)
+
+
+def test_logs_keep_the_retention_window(backend):
+    total = LOG_RETENTION + 3 * LOG_SEGMENT_ROWS + 10
+    for i in range(total):
+        backend.save_log('Stage', f'message {i:04d}', wait=True)
+    logs = backend.get_logs(limit=10 * total)
+    assert LOG_RETENTION <= len(logs) < LOG_RETENTION + 2 * LOG_SEGMENT_ROWS
+    assert max(log['message'] for log in logs) == f'message {total - 1:04d}'
+
+
+def test_csv_appends_do_not_rewrite_the_file():
+    for i in range(3):
+        csv_storage.save_compliance_result(_result(i))
+    with open(COMPLIANCE_RESULTS_FILE, 'rb') as f:
+        before = f.read()
+    csv_storage.save_compliance_result(_result(3, status='Non-Compliant'))
+    with open(COMPLIANCE_RESULTS_FILE, 'rb') as f:
+        after = f.read()
+    assert after.startswith(before)
+    assert len(csv_storage.get_compliance_results(limit=100)) == 4
+    assert len(csv_storage.get_compliance_results({'status': 'Non-Compliant'}, limit=100)) == 1
+
+
+def test_csv_cache_notices_outside_changes():
+    csv_storage.save_compliance_results(_results(3))
+    assert len(csv_storage.get_compliance_results(limit=100)) == 3
+    csv_storage.save_compliance_results(_results(2))
+    assert len(csv_storage.get_compliance_results(limit=100)) == 5
+    df = pd.read_csv(COMPLIANCE_RESULTS_FILE, dtype={'id': str})
+    df.iloc[:1].to_csv(COMPLIANCE_RESULTS_FILE, index=False)
+    assert len(csv_storage.get_compliance_results(limit=100)) == 1
+
+
+def test_csv_new_column_widens_the_header_once():
+    csv_storage.save_compliance_result(_result(0))
+    csv_storage.save_compliance_result({**_result(1), 'file_id': 'events.csv'})
+    csv_storage.save_compliance_result(_result(2))
+    df = pd.read_csv(COMPLIANCE_RESULTS_FILE)
+    assert 'file_id' in df.columns
+    assert df['file_id'].tolist()[1] == 'events.csv'
+    assert df['obligationId'].tolist() == ['OB-0', 'OB-1', 'OB-2']
+
+
+def test_csv_log_file_rotates_into_segments():
+    for i in range(2 * LOG_SEGMENT_ROWS + 5):
+        csv_storage.save_log('Stage', f'message {i}', wait=True)
+    segments = log_segments()
+    assert [number for number, _ in segments] == [1, 2]
+    assert all(len(pd.read_csv(path)) == LOG_SEGMENT_ROWS for _, path in segments)
+    assert len(pd.read_csv(LOGS_FILE)) == 5
+
+    assert csv_storage.clear_all_logs()
+    assert log_segments() == []
+    assert csv_storage.get_logs() == []
+
+
+def test_writer_groups_queued_writes():
+    flushed = []
+    writer = StorageWriter({'rows': flushed.append}, window=0.2)
+    futures = [writer.submit('rows', i) for i in range(5)]
+    assert [future.result(timeout=5) for future in futures] == list(range(5))
+    assert writer.wait_idle(timeout=5)
+    assert flushed == [[0, 1, 2, 3, 4]]
+    with pytest.raises(ValueError):
+        writer.submit('missing', 1)
+
+
+def test_csv_kb_upserts_from_many_threads():
+    def upsert(n):
+        for i in range(10):
+            csv_storage.save_kb_entry(f'key-{i}', {'writer': n, 'compliance_framework': 'GDPR'})
+
+    threads = [threading.Thread(target=upsert, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    entries = csv_storage.get_all_kb_entries()
+    assert sorted(entry['key'] for entry in entries) == sorted(f'key-{i}' for i in range(10))
+    assert csv_storage.save_kb_entry('key-0', {'writer': 'last'}, wait=True)
+    assert csv_storage.get_kb_entry('key-0') == {'writer': 'last'}
+
+
+def test_sqlite_starts_from_csv_storage():
+    for i in range(3):
+        csv_storage.save_compliance_result(_result(i))
+    csv_storage.save_log('Stage', 'from csv', wait=True)
+    assert not os.path.exists(sqlite_storage.DB_FILE)
+    assert len(sqlite_storage.get_compliance_results(limit=100)) == 3
+    assert [log['message'] for log in sqlite_storage.get_logs()] == ['from csv']
+    # Migrating again skips what is already there
+    assert sqlite_storage.migrate_from_csv()['compliance_results'] == 0
@@ -0,0 +1,87 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from pipeline.ingest import StreamingIngest
+
+CSV = (
+    'severity,correlation_score,false_positive_likelihood,final_confidence_score,primary_domain\n'
+    + ''.join(f'{s},{i / 4},{(i % 100) / 100},0.{i:09d},example.com\n' for i, s in enumerate(['low', 'high'] * 50))
+).encode()
+
+
+@pytest.fixture
+def upload(client):
+    def post(data=CSV, name='events.csv'):
+        return client.post('/api/upload', data={'file': (io.BytesIO(data), name)}, content_type='multipart/form-data')
+    return post
+
+
+def _stored():
+    return [name for name in os.listdir('data/uploads') if not name.endswith('.lock')]
+
+
+def test_upload_reports_rows_hash_and_schema(upload):
+    body = upload().get_json()
+    assert body['rows'] == 100
+    assert body['sha256'] == hashlib.sha256(CSV).hexdigest()
+    assert body['schema']['valid']
+
+
+def test_upload_is_stored_under_its_sha256(upload):
+    body = upload().get_json()
+    digest = hashlib.sha256(CSV).hexdigest()
+    assert body['file_id'] == f'{digest}.csv'
+    assert body['duplicate'] is False
+    assert sorted(_stored()) == [f'{digest}.csv', f'{digest}.meta.json', f'{digest}.parquet']
+
+
+def test_reupload_is_a_duplicate_without_new_files(upload):
+    first = upload().get_json()
+    files = set(os.listdir('data/uploads'))
+    second = upload(name='renamed.csv').get_json()
+    assert second['duplicate'] is True
+    assert second['file_id'] == first['file_id']
+    assert second['filename'] == 'renamed.csv'
+    assert second['stats'] == first['stats']
+    assert set(os.listdir('data/uploads')) == files
+
+
+def test_missing_required_columns_are_rejected(upload):
+    response = upload(b'severity,primary_domain\nlow,example.com\n')
+    assert response.status_code == 400
+    assert 'correlation_score' in response.get_json()['schema']['missing_required']
+    assert _stored() == []
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1024 * 1024])
+def test_rows_are_counted_across_chunks_and_quoted_newlines(chunk_size):
+    data = b'severity,reason\nlow,"line one\nline two"\nhigh,plain\nlow,"a ""quoted"" value"'
+    info = StreamingIngest('data/uploads/quoted.csv', chunk_size=chunk_size).ingest(io.BytesIO(data))
+    assert info['rows'] == 3
+    assert info['size'] == len(data)
+    assert info['sha256'] == hashlib.sha256(data).hexdigest()
+    with open('data/uploads/quoted.csv', 'rb') as f:
+        assert f.read() == data
+
+
+def test_workbook_sheets_become_datasets(client, upload):
+    import pandas as pd
+    from database.excel_converter import wait_for_conversion
+
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        pd.read_csv(io.BytesIO(CSV)).to_excel(writer, sheet_name='events', index=False)
+        pd.DataFrame({'note': ['x']}).to_excel(writer, sheet_name='notes', index=False)
+    response = upload(buffer.getvalue(), 'book.xlsx')
+    assert response.status_code == 202
+    file_id = response.get_json()['file_id']
+
+    wait_for_conversion(os.path.join('data/uploads', file_id), timeout=30)
+    status = client.get(f'/api/upload/{file_id}/status').get_json()
+    assert status['status'] == 'ready'
+    assert [(d['sheet'], d['rows']) for d in status['datasets']] == [('events', 100)]
+    assert [s['sheet'] for s in status['skipped_sheets']] == ['notes']
+    assert os.path.exists(os.path.join('data/uploads', status['datasets'][0]['file_id']))
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from database.upload_store import convert_to_columnar
+from database.upload_query import run_query
+
+
+@pytest.fixture
+def upload():
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame({
+        'severity': rng.choice(['low', 'medium', 'high'], 3000),
+        'correlation_score': rng.integers(0, 10000, 3000) / 100,
+        'false_positive_likelihood': rng.integers(0, 100, 3000) / 100
+    })
+    path = 'data/uploads/events.csv'
+    df.to_csv(path, index=False)
+    convert_to_columnar(path)
+    return path, df
+
+
+def test_aggregates_match_pandas(upload):
+    path, df = upload
+    result = run_query(path, {'group_by': 'severity', 'aggregates': [
+        {'column': 'correlation_score', 'func': 'mean'},
+        {'column': 'correlation_score', 'func': 'p95'},
+        {'column': 'false_positive_likelihood', 'func': 'sum'}
+    ]})
+    expected = df.groupby('severity')
+    for group in result['groups']:
+        severity = group['severity']
+        assert group['count'] == len(expected.get_group(severity))
+        assert group['correlation_score_mean'] == expected['correlation_score'].mean()[severity]
+        assert group['correlation_score_p95'] == expected['correlation_score'].quantile(0.95)[severity]
+        assert group['false_positive_likelihood_sum'] == expected['false_positive_likelihood'].sum()[severity]
+
+
+def test_range_filter_bound_is_inclusive(upload):
+    path, df = upload
+    bound = float(df['correlation_score'].iloc[0])
+    result = run_query(path, {'group_by': 'severity', 'filters': {'correlation_score': {'gte': bound}}})
+    assert result['matched_rows'] == int((df['correlation_score'] >= bound).sum())
+
+
+def test_repeated_query_is_cached(upload):
+    path, _ = upload
+    query = {'group_by': ['severity'], 'filters': {'severity': ['low', 'high']}}
+    first = run_query(path, query)
+    second = run_query(path, query)
+    assert (first['cached'], second['cached']) == (False, True)
+    assert second['groups'] == first['groups']
+    assert {g['severity'] for g in first['groups']} == {'low', 'high'}
+
+
+@pytest.mark.parametrize('aggregates', [['mean'], [{'column': 'severity', 'func': 'mean'}], [{'column': 'correlation_score', 'func': 'median'}], 'mean'])
+def test_invalid_aggregates_raise_value_error(upload, aggregates):
+    path, _ = upload
+    with pytest.raises(ValueError):
+        run_query(path, {'group_by': 'severity', 'aggregates': aggregates})
@@ -0,0 +1,58 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database.upload_store import convert_to_columnar, load_upload, load_upload_rows, iter_upload_chunks, replacing
+
+
+@pytest.fixture
+def upload():
+    path = 'data/uploads/events.csv'
+    df = pd.DataFrame({'severity': ['low', 'high'] * 5000, 'correlation_score': np.arange(10000) / 4})
+    df.to_csv(path, index=False)
+    return path, df
+
+
+def test_reads_are_column_projected_and_by_position(upload):
+    path, df = upload
+    assert list(load_upload(path, columns=['severity', 'missing']).columns) == ['severity']
+    rows = load_upload_rows(path, [9999, 3, 10], columns=['correlation_score'])
+    assert rows.index.tolist() == [9999, 3, 10]
+    assert rows['correlation_score'].tolist() == df['correlation_score'].iloc[[9999, 3, 10]].tolist()
+    assert sum(len(chunk) for chunk in iter_upload_chunks(path, 3000)) == 10000
+
+
+def test_concurrent_conversions_do_not_share_a_temp_file(upload):
+    path, _ = upload
+    errors = []
+    def convert():
+        try:
+            convert_to_columnar(path, block_size=64 * 1024)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=convert) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(load_upload(path)) == 10000
+    assert not [name for name in os.listdir('data/uploads') if name.endswith('.tmp')]
+
+
+def test_failed_write_leaves_target_and_no_temp_file():
+    target = 'data/uploads/keep.json'
+    with open(target, 'w') as f:
+        f.write('old')
+    with pytest.raises(RuntimeError):
+        with replacing(target) as tmp_target:
+            with open(tmp_target, 'w') as f:
+                f.write('new')
+            raise RuntimeError('interrupted')
+    with open(target) as f:
+        assert f.read() == 'old'
+    assert os.listdir('data/uploads') == ['keep.json']